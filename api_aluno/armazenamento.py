@@ -0,0 +1,94 @@
+import hashlib
+import os
+import time
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+
+
+SUFIXO_TEMPORARIO = '.tmp'
+SUFIXO_QUARENTENA = '.coleta'
+
+
+def sha256_do_conteudo(content):
+    # Calculado durante o upload por HistoricoUploadHandler (api_aluno.uploads)
+    if getattr(content, 'sha256', None):
+        return content.sha256
+    sha256 = hashlib.sha256()
+    for chunk in content.chunks():
+        sha256.update(chunk)
+    content.seek(0)
+    return sha256.hexdigest()
+
+
+class ArmazenamentoPorConteudo(FileSystemStorage):
+    """
+    Grava cada arquivo sob o SHA-256 do seu conteúdo, em diretórios de dois níveis
+    (historicos/ab/cd/abcd....pdf), mantendo o diretório do upload_to e a extensão do nome
+    enviado. Envios idênticos compartilham o mesmo arquivo, por isso ele nunca é apagado
+    junto com o registro: os arquivos sem referência são removidos depois, pelo
+    comando coletar_historicos.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # O nome definitivo só é conhecido em _save, depois de calcular o hash
+        return name
+
+    def _save(self, name, content):
+        diretorio, nome = os.path.split(name)
+        sha256 = sha256_do_conteudo(content)
+        name = '/'.join(filter(None, [diretorio, sha256[:2], sha256[2:4], sha256 + os.path.splitext(nome)[1].lower()]))
+        caminho = self.path(name)
+
+        if os.path.exists(caminho):
+            # Renova o arquivo reaproveitado para que a coleta não o remova durante o envio
+            try:
+                os.utime(caminho)
+                return name
+            except FileNotFoundError:
+                # Posto em quarentena pela coleta entre as duas chamadas: é gravado de novo
+                pass
+
+        # Grava ao lado e renomeia: envios simultâneos do mesmo conteúdo não se atrapalham
+        temporario = super()._save(f'{name}.{uuid.uuid4().hex}{SUFIXO_TEMPORARIO}', content)
+        os.replace(self.path(temporario), caminho)
+        return name
+
+
+def coletar_arquivos_sem_referencia(storage, diretorio, referenciados, idade_minima, simular=False, referenciado=None):
+    """
+    Remove os arquivos de diretorio (e subdiretórios) que não estão em referenciados e não
+    foram gravados ou reaproveitados nos últimos idade_minima segundos, e retorna os seus
+    nomes. A idade mínima protege os envios em andamento, cujo registro ainda não foi gravado.
+
+    Cada arquivo é antes renomeado para uma quarentena, o que o tira do alcance de
+    ArmazenamentoPorConteudo._save; a idade e, se informada, a função referenciado(name)
+    são então conferidas de novo, e o arquivo é removido ou devolvido ao lugar.
+    """
+    limite = time.time() - idade_minima
+    removidos = []
+    for raiz, _, arquivos in os.walk(storage.path(diretorio)):
+        for arquivo in arquivos:
+            caminho = os.path.join(raiz, arquivo)
+            name = os.path.relpath(caminho, storage.location).replace(os.sep, '/')
+            if name in referenciados:
+                continue
+            try:
+                if os.stat(caminho).st_mtime > limite:
+                    continue
+                if simular:
+                    removidos.append(name)
+                    continue
+                quarentena = f'{caminho}.{uuid.uuid4().hex}{SUFIXO_QUARENTENA}'
+                os.rename(caminho, quarentena)
+            except FileNotFoundError:
+                continue
+
+            # Reaproveitado entre o stat e o rename: o utime de _save já tinha renovado o arquivo
+            if os.stat(quarentena).st_mtime > limite or (referenciado and referenciado(name)):
+                # Se _save gravou de novo nesse meio tempo, o conteúdo é o mesmo
+                os.replace(quarentena, caminho)
+                continue
+            os.remove(quarentena)
+            removidos.append(name)
+    return sorted(removidos)
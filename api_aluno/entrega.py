@@ -0,0 +1,168 @@
+import os
+import secrets
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_etags, parse_http_date_safe, quote_etag
+
+
+ENTREGA_DJANGO = 'django'
+ENTREGA_X_ACCEL_REDIRECT = 'x-accel-redirect'
+ENTREGA_X_SENDFILE = 'x-sendfile'
+
+# Acima disso (ou com intervalos sobrepostos demais) o Range é ignorado e o PDF vai inteiro
+MAXIMO_DE_INTERVALOS = 16
+TAMANHO_DO_BLOCO = 64 * 1024
+
+
+def interpretar_range(cabecalho, tamanho):
+    """
+    Interpreta o cabeçalho Range de um arquivo com o tamanho dado e retorna os intervalos
+    (início, fim inclusive) em ordem, com os sobrepostos ou contíguos unidos. Retorna None
+    se o cabeçalho é inválido ou deve ser ignorado, e uma lista vazia se nenhum intervalo
+    pode ser atendido.
+    """
+    unidade, _, especificacao = cabecalho.partition('=')
+    if unidade.strip().lower() != 'bytes' or not especificacao.strip():
+        return None
+
+    intervalos = []
+    for parte in especificacao.split(','):
+        inicio, traco, fim = parte.strip().partition('-')
+        if not traco or not (inicio or fim) or (inicio and not inicio.isdigit()) or (fim and not fim.isdigit()):
+            return None
+        if not inicio:
+            # Sufixo: os últimos bytes do arquivo
+            if int(fim) > 0 and tamanho > 0:
+                intervalos.append((max(tamanho - int(fim), 0), tamanho - 1))
+            continue
+        inicio = int(inicio)
+        if fim and int(fim) < inicio:
+            return None
+        if inicio < tamanho:
+            intervalos.append((inicio, min(int(fim), tamanho - 1) if fim else tamanho - 1))
+
+    unidos = []
+    for inicio, fim in sorted(intervalos):
+        if unidos and inicio <= unidos[-1][1] + 1:
+            unidos[-1] = (unidos[-1][0], max(unidos[-1][1], fim))
+        else:
+            unidos.append((inicio, fim))
+    if len(intervalos) > MAXIMO_DE_INTERVALOS:
+        return None
+    return unidos
+
+
+def _if_range_atende(request, etag, last_modified):
+    # Sem If-Range, ou com o validador atual (comparação forte), o Range vale
+    if_range = request.META.get('HTTP_IF_RANGE', '').strip()
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return etag is not None and not if_range.startswith('W/') and parse_etags(if_range) == [etag]
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _ler_intervalo(caminho, inicio, fim):
+    with open(caminho, 'rb') as arquivo:
+        arquivo.seek(inicio)
+        restante = fim - inicio + 1
+        while restante > 0:
+            bloco = arquivo.read(min(TAMANHO_DO_BLOCO, restante))
+            if not bloco:
+                break
+            restante -= len(bloco)
+            yield bloco
+
+
+def _resposta_parcial(caminho, intervalos, tamanho):
+    if len(intervalos) == 1:
+        inicio, fim = intervalos[0]
+        response = StreamingHttpResponse(_ler_intervalo(caminho, inicio, fim), status=206, content_type='application/pdf')
+        response['Content-Range'] = f'bytes {inicio}-{fim}/{tamanho}'
+        response['Content-Length'] = fim - inicio + 1
+        return response
+
+    fronteira = secrets.token_hex(16)
+    cabecalhos = [
+        (f'\r\n--{fronteira}\r\nContent-Type: application/pdf\r\n'
+         f'Content-Range: bytes {inicio}-{fim}/{tamanho}\r\n\r\n').encode()
+        for inicio, fim in intervalos
+    ]
+    final = f'\r\n--{fronteira}--\r\n'.encode()
+
+    def partes():
+        for cabecalho, (inicio, fim) in zip(cabecalhos, intervalos):
+            yield cabecalho
+            yield from _ler_intervalo(caminho, inicio, fim)
+        yield final
+
+    response = StreamingHttpResponse(partes(), status=206, content_type=f'multipart/byteranges; boundary={fronteira}')
+    response['Content-Length'] = (
+        sum(len(cabecalho) for cabecalho in cabecalhos)
+        + sum(fim - inicio + 1 for inicio, fim in intervalos)
+        + len(final)
+    )
+    return response
+
+
+def resposta_do_historico(request, historico, modo=None):
+    """
+    Resposta com o PDF do histórico. No modo 'django' o arquivo vai em um FileResponse,
+    que o servidor WSGI envia com sendfile quando oferece wsgi.file_wrapper. Nos modos
+    'x-accel-redirect' (nginx) e 'x-sendfile' (Apache, lighttpd) a aplicação só verifica
+    a permissão e o proxy reverso lê o arquivo de MEDIA_ROOT.
+
+    A resposta leva ETag (o SHA-256 do PDF) e Last-Modified (o envio do PDF, enviado_em), e requisições condicionais
+    com o PDF inalterado recebem 304 sem o arquivo. No modo 'django', Range com um ou mais
+    intervalos é atendido com 206; nos demais, o proxy atende o Range.
+    """
+    modo = modo or settings.HISTORICO_ENTREGA
+    caminho = historico.historico_pdf.path
+    nome = os.path.basename(historico.historico_pdf.name)
+
+    estado = os.stat(caminho)
+    etag = quote_etag(historico.hash_pdf) if historico.hash_pdf else None
+    last_modified = int(historico.enviado_em.timestamp())
+
+    validadores = HttpResponse(content_type='application/pdf')
+    if etag:
+        validadores['ETag'] = etag
+    validadores['Last-Modified'] = http_date(last_modified)
+    # O PDF só pode ser guardado pelo navegador de quem tem acesso, que revalida a cada uso
+    validadores['Cache-Control'] = 'private, no-cache'
+    condicional = get_conditional_response(request, etag=etag, last_modified=last_modified, response=validadores)
+    if condicional is not validadores:
+        return condicional
+
+    if modo == ENTREGA_DJANGO:
+        intervalos = None
+        if request.method == 'GET' and 'HTTP_RANGE' in request.META and _if_range_atende(request, etag, last_modified):
+            intervalos = interpretar_range(request.META['HTTP_RANGE'], estado.st_size)
+
+        if intervalos == []:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{estado.st_size}'
+        elif intervalos:
+            response = _resposta_parcial(caminho, intervalos, estado.st_size)
+            response['Content-Disposition'] = content_disposition_header(True, nome)
+        else:
+            response = FileResponse(open(caminho, 'rb'), content_type='application/pdf', as_attachment=True, filename=nome)
+        response['Accept-Ranges'] = 'bytes'
+        for cabecalho in ('ETag', 'Last-Modified', 'Cache-Control'):
+            if cabecalho in validadores:
+                response[cabecalho] = validadores[cabecalho]
+        return response
+
+    response = validadores
+    response['Content-Disposition'] = content_disposition_header(True, nome)
+    if modo == ENTREGA_X_ACCEL_REDIRECT:
+        response['X-Accel-Redirect'] = settings.HISTORICO_ENTREGA_PREFIXO_INTERNO.rstrip('/') + '/' + quote(historico.historico_pdf.name)
+    elif modo == ENTREGA_X_SENDFILE:
+        response['X-Sendfile'] = caminho
+    else:
+        raise ImproperlyConfigured(f'HISTORICO_ENTREGA desconhecido: {modo}')
+    return response
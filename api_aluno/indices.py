@@ -0,0 +1,97 @@
+from django.db.models import Count, DecimalField, F, FloatField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Cast, NullIf, Round
+
+from .models import Disciplina_Matriculada, Historico_Academico, Indice_Historico
+
+
+PONTUADA = Q(media__isnull=False, creditos__isnull=False)
+APROVADA = Q(situacao__in=['Aprovado', 'Dispensa'])
+EM_CURSO = Q(situacao='Em Curso')
+
+
+def _media_ponderada(filtro=None):
+    # O PostgreSQL só arredonda com casas decimais valores numeric
+    media = Sum(F('media') * F('creditos'), filter=filtro) / NullIf(Sum('creditos', filter=filtro), 0)
+    return Cast(Round(Cast(media, DecimalField(max_digits=8, decimal_places=4)), 2), FloatField())
+
+
+def disciplinas_pontuadas():
+    """Disciplinas matriculadas que entram no CRA: com média e créditos conhecidos."""
+    return Disciplina_Matriculada.objects.filter(PONTUADA)
+
+
+def expressao_cra():
+    """CRA do histórico da consulta externa (OuterRef('pk')), calculado pelo banco."""
+    return Subquery(
+        disciplinas_pontuadas()
+        .filter(historico=OuterRef('pk'))
+        .values('historico')
+        .annotate(cra=_media_ponderada())
+        .values('cra')[:1],
+        output_field=FloatField()
+    )
+
+
+def recalcular_cra(historicos=None):
+    """
+    Recalcula o CRA dos históricos (todos, por padrão) com um único UPDATE e retorna
+    quantos foram atualizados. Não é preciso interpretar os PDFs de novo.
+    """
+    historicos = Historico_Academico.objects.all() if historicos is None else historicos
+    return historicos.update(cra=expressao_cra())
+
+
+def medias_por_periodo(historico):
+    """Média ponderada pelos créditos e créditos cursados de cada período, em uma consulta."""
+    return list(
+        disciplinas_pontuadas()
+        .filter(historico=historico)
+        .values('periodo')
+        .annotate(media=_media_ponderada(), creditos=Sum('creditos'))
+        .order_by('periodo')
+    )
+
+
+def _agregar(disciplinas, *agrupamento):
+    # Anotações com o nome de um campo (media, creditos) passariam a valer nos filtros seguintes
+    return disciplinas.values(*agrupamento).annotate(
+        media_ponderada=_media_ponderada(PONTUADA),
+        creditos_cursados=Sum('creditos', filter=PONTUADA, default=0),
+        creditos_aprovados=Sum('creditos', filter=APROVADA, default=0),
+        disciplinas=Count('id'),
+        em_curso=Count('id', filter=EM_CURSO)
+    ).order_by()
+
+
+def atualizar_indices(historicos=None):
+    """
+    Refaz a tabela de índices dos históricos (todos, por padrão): uma linha por período
+    e uma linha geral (periodo vazio) por histórico, calculadas com duas consultas agregadas.
+    Deve rodar na mesma transação que grava as disciplinas matriculadas.
+    """
+    indices = Indice_Historico.objects.all()
+    disciplinas = Disciplina_Matriculada.objects.all()
+    if historicos is not None:
+        indices = indices.filter(historico__in=historicos)
+        disciplinas = disciplinas.filter(historico__in=historicos)
+
+    linhas = [
+        Indice_Historico(media=valores.pop('media_ponderada'), **valores)
+        for valores in _agregar(disciplinas, 'historico_id', 'periodo')
+    ]
+    linhas += [
+        Indice_Historico(periodo=Indice_Historico.GERAL, media=valores.pop('media_ponderada'), **valores)
+        for valores in _agregar(disciplinas, 'historico_id')
+    ]
+
+    indices.delete()
+    Indice_Historico.objects.bulk_create(linhas, batch_size=1000)
+    return len(linhas)
+
+
+def historicos_sem_creditos():
+    """Históricos com disciplinas gravadas antes de os créditos serem guardados."""
+    return Historico_Academico.objects.filter(
+        disciplinas_matriculadas__creditos__isnull=True,
+        disciplinas_matriculadas__media__isnull=False
+    ).distinct()
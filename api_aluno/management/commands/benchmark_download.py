@@ -0,0 +1,105 @@
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from api_aluno.entrega import resposta_do_historico, ENTREGA_DJANGO, ENTREGA_X_ACCEL_REDIRECT, ENTREGA_X_SENDFILE
+from api_aluno.models import Historico_Academico
+
+
+REQUISICAO = RequestFactory().get('/aluno/historico/')
+
+
+def _entregar_legado(historico, destino):
+    # Como visualizar_historico entregava antes: gerador Python com leituras de 512 bytes
+    with open(historico.historico_pdf.path, 'rb') as pdf_file:
+        while chunk := pdf_file.read(512):
+            os.write(destino, chunk)
+
+
+def _entregar_iterando(historico, destino):
+    # Servidor WSGI sem wsgi.file_wrapper: os blocos do FileResponse passam pelo Python
+    response = resposta_do_historico(REQUISICAO, historico, ENTREGA_DJANGO)
+    for chunk in response:
+        os.write(destino, chunk)
+    response.close()
+
+
+def _entregar_sendfile(historico, destino):
+    # Servidor WSGI com wsgi.file_wrapper: o kernel copia o arquivo do FileResponse
+    response = resposta_do_historico(REQUISICAO, historico, ENTREGA_DJANGO)
+    origem = response.file_to_stream.fileno()
+    enviado, tamanho = 0, os.fstat(origem).st_size
+    while enviado < tamanho:
+        enviado += os.sendfile(destino, origem, enviado, tamanho - enviado)
+    response.close()
+
+
+def _entregar_pelo_proxy(modo):
+    # O worker só monta os cabeçalhos; o proxy reverso envia os bytes
+    def entregar(historico, destino):
+        resposta_do_historico(REQUISICAO, historico, modo).close()
+    return entregar
+
+
+MODOS = [
+    ('legado (512 B)', _entregar_legado),
+    ('django', _entregar_iterando),
+    ('django + sendfile', _entregar_sendfile),
+    ('x-accel-redirect', _entregar_pelo_proxy(ENTREGA_X_ACCEL_REDIRECT)),
+    ('x-sendfile', _entregar_pelo_proxy(ENTREGA_X_SENDFILE)),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede, para cada forma de entrega do PDF do histórico, quanto tempo o worker fica ocupado '
+        'por download e a vazão correspondente (os bytes são escritos em /dev/null)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pdfs', nargs='*', default=[], help='PDFs a medir, além dos arquivos gerados')
+        parser.add_argument('--tamanhos-mb', type=float, nargs='*', default=[0.05, 1, 10], help='Tamanhos dos arquivos gerados')
+        parser.add_argument('--rodadas', type=int, default=5, help='Downloads medidos por arquivo e modo')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as diretorio:
+            arquivos = []
+            for caminho in options['pdfs']:
+                arquivos.append(os.path.basename(caminho))
+                shutil.copy(caminho, os.path.join(diretorio, arquivos[-1]))
+            for tamanho in options['tamanhos_mb']:
+                arquivos.append(f'historico_{tamanho:g}mb.pdf')
+                with open(os.path.join(diretorio, arquivos[-1]), 'wb') as arquivo:
+                    arquivo.write(b'%PDF-1.4\n')
+                    arquivo.write(os.urandom(int(tamanho * 1024 * 1024)))
+
+            storage = FileSystemStorage(location=diretorio)
+            destino = os.open(os.devnull, os.O_WRONLY)
+            try:
+                for nome in arquivos:
+                    historico = Historico_Academico(historico_pdf=nome)
+                    historico.historico_pdf.storage = storage
+                    self.medir(historico, destino, options['rodadas'])
+            finally:
+                os.close(destino)
+
+    def medir(self, historico, destino, rodadas):
+        tamanho = historico.historico_pdf.size
+        for nome, entregar in MODOS:
+            tempos = []
+            for _ in range(rodadas):
+                inicio = time.perf_counter()
+                entregar(historico, destino)
+                tempos.append(time.perf_counter() - inicio)
+
+            tempo = statistics.median(tempos)
+            self.stdout.write(
+                f'{historico.historico_pdf.name:>24} | {nome:>18} | worker ocupado {tempo * 1000:9.3f} ms | '
+                f'{tamanho / 1024 / 1024 / tempo:10.1f} MB/s por worker'
+            )
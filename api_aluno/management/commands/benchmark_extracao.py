@@ -0,0 +1,60 @@
+import glob
+import os
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api_aluno.sinteticos import gerar_pdf_ampliado
+from api_aluno.utils import extrair_linhas_do_pdf, interpretar_linhas, BACKENDS_DE_EXTRACAO
+
+
+class Command(BaseCommand):
+    help = 'Mede a extração dos históricos em PDF com cada backend, serial e com o pool de processos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pdfs', nargs='*', help='PDFs a medir (padrão: media/historicos e subdiretórios)')
+        parser.add_argument('--repeticoes', type=int, nargs='*', default=[10, 40], help='Fatores de ampliação dos PDFs sintéticos')
+        parser.add_argument('--processos', type=int, nargs='*', default=[1, os.cpu_count() or 1], help='Quantidades de processos comparadas')
+        parser.add_argument('--backends', nargs='*', choices=list(BACKENDS_DE_EXTRACAO), default=list(BACKENDS_DE_EXTRACAO), help='Backends de extração comparados')
+        parser.add_argument('--rodadas', type=int, default=3, help='Medições por PDF')
+
+    def handle(self, *args, **options):
+        pdfs = options['pdfs'] or sorted(glob.glob(os.path.join(settings.MEDIA_ROOT, 'historicos', '**', '*.pdf'), recursive=True))
+        if not pdfs:
+            self.stderr.write('Nenhum PDF encontrado')
+            return
+
+        with tempfile.TemporaryDirectory() as diretorio:
+            sinteticos = []
+            for repeticoes in options['repeticoes']:
+                destino = os.path.join(diretorio, f'sintetico_{repeticoes}x.pdf')
+                gerar_pdf_ampliado(pdfs[0], destino, repeticoes)
+                sinteticos.append(destino)
+
+            for pdf_path in pdfs + sinteticos:
+                self.medir(pdf_path, options['backends'], options['processos'], options['rodadas'])
+
+    def medir(self, pdf_path, backends, quantidades_processos, rodadas):
+        referencia = None
+        for backend in backends:
+            for processos in quantidades_processos:
+                # Aquece o pool para não medir a criação dos processos
+                extrair_linhas_do_pdf(pdf_path, processos, backend)
+
+                tempos = []
+                for _ in range(rodadas):
+                    inicio = time.perf_counter()
+                    registros = interpretar_linhas(extrair_linhas_do_pdf(pdf_path, processos, backend))
+                    tempos.append(time.perf_counter() - inicio)
+
+                if referencia is None:
+                    referencia = registros
+                identico = 'idêntico' if registros == referencia else 'DIVERGENTE'
+
+                self.stdout.write(
+                    f'{os.path.basename(pdf_path):>28} | {backend:>10} | {processos:2d} processos | '
+                    f'{statistics.median(tempos) * 1000:8.1f} ms | {len(registros):4d} disciplinas | {identico}'
+                )
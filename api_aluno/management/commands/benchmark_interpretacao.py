@@ -0,0 +1,65 @@
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from api_aluno.sinteticos import gerar_disciplinas, gerar_historico_sintetico, registros_esperados
+from api_aluno.utils import extrair_registros_do_pdf, BACKENDS_DE_EXTRACAO
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera históricos sintéticos de vários tamanhos e mede, para cada backend de extração, '
+        'o tempo de interpretação, as disciplinas por segundo e o pico de memória Python (tracemalloc)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--disciplinas', type=int, nargs='*', default=[30, 120, 480], help='Disciplinas de cada histórico gerado')
+        parser.add_argument('--backends', nargs='*', choices=list(BACKENDS_DE_EXTRACAO), default=list(BACKENDS_DE_EXTRACAO), help='Backends de extração comparados')
+        parser.add_argument('--rodadas', type=int, default=3, help='Medições por PDF')
+        parser.add_argument('--semente', type=int, default=0, help='Semente do sorteio das disciplinas')
+        parser.add_argument('--diretorio', help='Mantém os PDFs gerados neste diretório')
+
+    def handle(self, *args, **options):
+        if options['diretorio']:
+            os.makedirs(options['diretorio'], exist_ok=True)
+            self.medir_corpus(options['diretorio'], options)
+            return
+
+        with tempfile.TemporaryDirectory() as diretorio:
+            self.medir_corpus(diretorio, options)
+
+    def medir_corpus(self, diretorio, options):
+        for quantidade in options['disciplinas']:
+            disciplinas = gerar_disciplinas(quantidade, options['semente'] + quantidade)
+            pdf_path = os.path.join(diretorio, f'historico_{quantidade}.pdf')
+            paginas = gerar_historico_sintetico(pdf_path, disciplinas)
+            esperados = registros_esperados(disciplinas)
+
+            for backend in options['backends']:
+                self.medir(pdf_path, paginas, backend, esperados, options['rodadas'])
+
+    def medir(self, pdf_path, paginas, backend, esperados, rodadas):
+        tempos = []
+        for _ in range(rodadas):
+            inicio = time.perf_counter()
+            registros = extrair_registros_do_pdf(pdf_path, processos=1, backend=backend)
+            tempos.append(time.perf_counter() - inicio)
+
+        # Medição separada: o tracemalloc deixa a extração bem mais lenta
+        tracemalloc.start()
+        try:
+            extrair_registros_do_pdf(pdf_path, processos=1, backend=backend)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        tempo = statistics.median(tempos)
+        correto = 'correto' if registros == esperados else 'DIVERGENTE'
+        self.stdout.write(
+            f'{os.path.basename(pdf_path):>20} | {paginas:3d} páginas | {backend:>10} | {tempo * 1000:8.1f} ms | '
+            f'{len(registros) / tempo:8.0f} disciplinas/s | {pico / 1024 / 1024:6.1f} MiB | {correto}'
+        )
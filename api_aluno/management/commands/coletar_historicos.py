@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from api_aluno.armazenamento import coletar_arquivos_sem_referencia
+from api_aluno.models import Historico_Academico
+
+
+class Command(BaseCommand):
+    help = 'Remove os PDFs de históricos que nenhum histórico referencia mais (substituídos ou excluídos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--idade-minima', type=int, default=3600,
+            help='Segundos desde a gravação ou o último reaproveitamento para que um arquivo sem referência seja removido'
+        )
+        parser.add_argument('--simular', action='store_true', help='Só lista os arquivos que seriam removidos')
+
+    def handle(self, *args, **options):
+        campo = Historico_Academico._meta.get_field('historico_pdf')
+        # As referências são lidas antes de percorrer os arquivos; os gravados depois disso são recentes
+        referenciados = set(Historico_Academico.objects.exclude(historico_pdf='').values_list('historico_pdf', flat=True))
+
+        removidos = coletar_arquivos_sem_referencia(
+            campo.storage, campo.upload_to, referenciados, options['idade_minima'], options['simular'],
+            referenciado=lambda name: Historico_Academico.objects.filter(historico_pdf=name).exists()
+        )
+        if options['simular'] or options['verbosity'] > 1:
+            for name in removidos:
+                self.stdout.write(name)
+        acao = 'seriam removidos' if options['simular'] else 'removidos'
+        self.stdout.write(self.style.SUCCESS(f'{len(removidos)} arquivos sem referência {acao}'))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api_aluno.processamento import processar_pendentes
+
+
+class Command(BaseCommand):
+    help = 'Processa os históricos enviados, aguardando novos envios. Várias instâncias podem rodar em paralelo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uma-vez', action='store_true', help='Esvazia a fila e encerra')
+        parser.add_argument('--intervalo', type=float, default=2.0, help='Segundos entre consultas à fila vazia')
+
+    def handle(self, *args, **options):
+        if options['uma_vez']:
+            processados = processar_pendentes()
+            self.stdout.write(self.style.SUCCESS(f'{processados} históricos processados'))
+            return
+
+        try:
+            while True:
+                close_old_connections()
+                processados = processar_pendentes()
+                if processados:
+                    self.stdout.write(f'{processados} históricos processados')
+                else:
+                    time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            self.stdout.write('Worker encerrado')
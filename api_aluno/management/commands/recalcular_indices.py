@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api_aluno.indices import atualizar_indices, historicos_sem_creditos, recalcular_cra
+from api_aluno.models import Historico_Academico
+from api_aluno.processamento import enfileirar_processamento
+
+
+class Command(BaseCommand):
+    help = 'Recalcula o CRA e os índices por período de todos os históricos a partir das disciplinas matriculadas, sem interpretar os PDFs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--enfileirar-sem-creditos', action='store_true',
+            help='Enfileira para o worker os históricos gravados antes de os créditos serem guardados'
+        )
+
+    def handle(self, *args, **options):
+        sem_creditos = list(historicos_sem_creditos())
+        # Sem os créditos, o CRA e os índices sairiam sem essas disciplinas: os atuais são mantidos até o worker
+        completos = Historico_Academico.objects.exclude(pk__in=[historico.pk for historico in sem_creditos])
+        with transaction.atomic():
+            atualizados = recalcular_cra(completos)
+            linhas = atualizar_indices(completos)
+        self.stdout.write(self.style.SUCCESS(f'{atualizados} históricos recalculados ({linhas} linhas de índices)'))
+
+        if not sem_creditos:
+            return
+
+        if options['enfileirar_sem_creditos']:
+            for historico in sem_creditos:
+                enfileirar_processamento(historico)
+            self.stdout.write(f'{len(sem_creditos)} históricos sem créditos enfileirados para o worker')
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'{len(sem_creditos)} históricos têm disciplinas sem créditos e não foram recalculados; '
+                'use --enfileirar-sem-creditos para interpretá-los de novo'
+            ))
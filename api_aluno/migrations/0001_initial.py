@@ -0,0 +1,69 @@
+# Generated by Django 5.0.8 on 2026-10-18 17:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('api_professor', '0001_initial'),
+        ('api_rest', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Aluno',
+            fields=[
+                ('matricula', models.CharField(max_length=9, primary_key=True, serialize=False)),
+                ('nome', models.TextField()),
+                ('email', models.TextField(unique=True)),
+                ('curriculo', models.TextField(null=True)),
+                ('github', models.TextField(null=True)),
+                ('linkedin', models.TextField(null=True)),
+                ('experiencias', models.ManyToManyField(related_name='alunos', to='api_rest.experiencia')),
+                ('habilidades', models.ManyToManyField(related_name='alunos', to='api_rest.habilidade')),
+                ('interesses', models.ManyToManyField(related_name='alunos', to='api_rest.interesse')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Avaliacao',
+            fields=[
+                ('id_avaliacao', models.AutoField(primary_key=True, serialize=False)),
+                ('comentario', models.CharField(max_length=280)),
+                ('id_aluno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='avaliacoes', to='api_aluno.aluno')),
+                ('id_professor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api_professor.professor')),
+                ('tags', models.ManyToManyField(related_name='avaliacoes', to='api_rest.feedback')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Historico_Academico',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('historico_pdf', models.FileField(upload_to='historicos/')),
+                ('cra', models.FloatField(blank=True, null=True)),
+                ('aluno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historicos', to='api_aluno.aluno')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Disciplina_Matriculada',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('tipo', models.CharField(max_length=50)),
+                ('media', models.FloatField(blank=True, null=True)),
+                ('situacao', models.CharField(max_length=50)),
+                ('periodo', models.CharField(max_length=10)),
+                ('disciplina', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='disciplina', to='api_rest.disciplina')),
+                ('historico', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='disciplinas_matriculadas', to='api_aluno.historico_academico')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='historico_academico',
+            constraint=models.UniqueConstraint(fields=('aluno',), name='unique_historico_por_aluno'),
+        ),
+    ]
@@ -1,9 +1,10 @@
-import os
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 from api_professor.models import Professor
 from api_rest.models import Habilidade, Experiencia, Interesse, Feedback, Disciplina
+from .armazenamento import ArmazenamentoPorConteudo
 
 
 class Aluno(models.Model):
@@ -32,6 +33,8 @@ class Disciplina_Matriculada(models.Model):
     historico = models.ForeignKey('Historico_Academico', related_name='disciplinas_matriculadas', on_delete=models.CASCADE)
     disciplina = models.ForeignKey(Disciplina, related_name='disciplina', null=False, on_delete=models.CASCADE)
     tipo = models.CharField(max_length=50)
+    # Nulo nas disciplinas gravadas antes de os créditos serem guardados
+    creditos = models.PositiveSmallIntegerField(null=True, blank=True)
     media = models.FloatField(null=True, blank=True)
     situacao = models.CharField(max_length=50)
     periodo = models.CharField(max_length=10)
@@ -43,7 +46,13 @@ class Disciplina_Matriculada(models.Model):
 class Historico_Academico(models.Model):
     id = models.AutoField(primary_key=True)
     aluno = models.ForeignKey(Aluno, on_delete=models.CASCADE, related_name='historicos')
-    historico_pdf = models.FileField(upload_to='historicos/')
+    # Gravado pelo SHA-256 do conteúdo; os arquivos sem referência são removidos por manage.py coletar_historicos
+    historico_pdf = models.FileField(upload_to='historicos/', storage=ArmazenamentoPorConteudo())
+    hash_pdf = models.CharField(max_length=64, blank=True, default='')
+    # Instante do envio do PDF atual, usado como Last-Modified; o mtime do arquivo muda quando outro envio o reaproveita
+    enviado_em = models.DateTimeField(default=timezone.now)
+    # Versão do interpretador que gerou as disciplinas matriculadas (None enquanto não processado)
+    versao_interpretador = models.PositiveIntegerField(null=True, blank=True)
     cra = models.FloatField(null=True, blank=True)
 
     class Meta:
@@ -51,15 +60,80 @@ class Historico_Academico(models.Model):
             models.UniqueConstraint(fields=['aluno'], name='unique_historico_por_aluno')
         ]
 
-    def delete(self, *args, **kwargs):
-        if self.historico_pdf and os.path.isfile(self.historico_pdf.path):
-            os.remove(self.historico_pdf.path)
-        super().delete(*args, **kwargs)
-
     def __str__(self):
         return f"Histórico de {self.aluno.nome}"
 
 
+class Indice_Historico(models.Model):
+    # Período das linhas com os índices do histórico inteiro
+    GERAL = ''
+
+    id = models.AutoField(primary_key=True)
+    historico = models.ForeignKey(Historico_Academico, related_name='indices', on_delete=models.CASCADE)
+    periodo = models.CharField(max_length=10, blank=True, default=GERAL)
+    # Média ponderada pelos créditos das disciplinas com média (o CRA, na linha geral)
+    media = models.FloatField(null=True, blank=True)
+    creditos_cursados = models.PositiveIntegerField(default=0)
+    creditos_aprovados = models.PositiveIntegerField(default=0)
+    disciplinas = models.PositiveIntegerField(default=0)
+    em_curso = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['historico', 'periodo'], name='unique_indice_por_periodo')
+        ]
+
+    def __str__(self):
+        return f"Índices de {self.periodo or 'todo o histórico'} ({self.historico_id})"
+
+
+class Processamento_Historico(models.Model):
+    NA_FILA = 'na_fila'
+    PROCESSANDO = 'processando'
+    CONCLUIDO = 'concluido'
+    FALHOU = 'falhou'
+    STATUS = [
+        (NA_FILA, 'Na fila'),
+        (PROCESSANDO, 'Processando'),
+        (CONCLUIDO, 'Concluído'),
+        (FALHOU, 'Falhou'),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    historico = models.ForeignKey(Historico_Academico, related_name='processamentos', on_delete=models.CASCADE)
+    status = models.CharField(max_length=20, choices=STATUS, default=NA_FILA)
+    erro = models.TextField(blank=True, default='')
+    disciplinas_desconhecidas = models.JSONField(default=list, blank=True)
+    # Quantas vezes um worker já o reivindicou (ver api_aluno.processamento.reivindicar_processamento)
+    tentativas = models.PositiveIntegerField(default=0)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'criado_em'], name='processamento_fila_idx')
+        ]
+
+    def __str__(self):
+        return f"Processamento {self.id} ({self.status})"
+
+
+class Interpretacao_Historico(models.Model):
+    # Registros interpretados de um PDF, guardados pelo worker para que reenvios do mesmo PDF
+    # (de qualquer aluno, em qualquer processo) sejam gravados sem abrir o arquivo
+    id = models.AutoField(primary_key=True)
+    hash_pdf = models.CharField(max_length=64)
+    versao_interpretador = models.PositiveIntegerField()
+    registros = models.JSONField(default=list)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['hash_pdf', 'versao_interpretador'], name='unique_interpretacao_por_pdf')
+        ]
+
+
 class Avaliacao(models.Model):
     id_avaliacao = models.AutoField(primary_key=True)
     id_professor = models.ForeignKey(Professor, null=False, on_delete=models.CASCADE)
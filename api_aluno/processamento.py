@@ -0,0 +1,150 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Historico_Academico, Processamento_Historico
+from .utils import extrair_disciplinas_do_pdf, salvar_registros, calcular_sha256, obter_registros_interpretados, VERSAO_DO_INTERPRETADOR
+
+
+def enfileirar_processamento(historico):
+    return Processamento_Historico.objects.create(historico=historico)
+
+
+def registrar_historico(aluno_id, historico_pdf):
+    """
+    Registra o PDF enviado como histórico do aluno e retorna o processamento
+    correspondente e se uma interpretação anterior do mesmo PDF foi reaproveitada.
+
+    Se o PDF é idêntico (mesmo SHA-256) ao histórico atual, já interpretado pela versão
+    corrente do interpretador ou ainda na fila, nada é gravado. Um PDF diferente substitui
+    o arquivo do histórico existente, que é mantido com as suas disciplinas matriculadas
+    até que o processamento aplique só as diferenças. Se o worker já interpretou um PDF
+    idêntico (Interpretacao_Historico), as disciplinas são gravadas sem abrir o arquivo e
+    sem consultar o Eureca; códigos desconhecidos ou qualquer falha ficam para o worker.
+    Caso contrário, o processamento é enfileirado para o worker.
+    """
+    hash_pdf = calcular_sha256(historico_pdf)
+
+    with transaction.atomic():
+        # Envios simultâneos do mesmo aluno são serializados pelo bloqueio do seu histórico
+        atual = Historico_Academico.objects.select_for_update().filter(aluno_id=aluno_id).first()
+        if atual is None:
+            try:
+                with transaction.atomic():
+                    historico = Historico_Academico.objects.create(aluno_id=aluno_id, historico_pdf=historico_pdf, hash_pdf=hash_pdf)
+            except IntegrityError:
+                # Outro primeiro envio do aluno criou o histórico antes (unique_historico_por_aluno)
+                atual = Historico_Academico.objects.select_for_update().get(aluno_id=aluno_id)
+
+        if atual and atual.hash_pdf == hash_pdf:
+            ultimo = atual.processamentos.order_by('-criado_em').first()
+            em_andamento = ultimo and ultimo.status in (Processamento_Historico.NA_FILA, Processamento_Historico.PROCESSANDO)
+            if ultimo and (em_andamento or atual.versao_interpretador == VERSAO_DO_INTERPRETADOR):
+                return ultimo, True
+
+        if atual:
+            atual.historico_pdf = historico_pdf
+            atual.hash_pdf = hash_pdf
+            atual.enviado_em = timezone.now()
+            # As disciplinas matriculadas ainda são as do PDF anterior até o processamento
+            atual.versao_interpretador = None
+            # O PDF anterior fica para manage.py coletar_historicos, que só o remove se nenhum histórico o usar
+            atual.save(update_fields=['historico_pdf', 'hash_pdf', 'enviado_em', 'versao_interpretador'])
+            historico = atual
+
+        registros = obter_registros_interpretados(hash_pdf)
+        if registros is None:
+            # A extração das disciplinas fica a cargo do worker (manage.py processar_historicos)
+            return enfileirar_processamento(historico), False
+
+    iniciado_em = timezone.now()
+    try:
+        desconhecidas = salvar_registros(historico, registros, sincronizar=False, hash_pdf=hash_pdf)
+    except Exception:
+        # O worker refaz a interpretação e registra o erro, se ele persistir
+        return enfileirar_processamento(historico), False
+
+    if desconhecidas:
+        # O worker sincroniza as disciplinas com o Eureca e grava as que passarem a existir
+        return enfileirar_processamento(historico), True
+
+    processamento = Processamento_Historico.objects.create(
+        historico=historico,
+        status=Processamento_Historico.CONCLUIDO,
+        disciplinas_desconhecidas=desconhecidas,
+        iniciado_em=iniciado_em,
+        concluido_em=timezone.now()
+    )
+    return processamento, True
+
+
+def reivindicar_processamento():
+    """
+    Marca como em andamento o processamento mais antigo da fila e o retorna.
+    Com skip_locked, vários workers disputam a fila sem processar o mesmo histórico;
+    processamentos presos em andamento além de PROCESSAMENTO_HISTORICO_TIMEOUT são retomados,
+    até PROCESSAMENTO_HISTORICO_MAX_TENTATIVAS vezes, e depois marcados como falhos.
+    """
+    agora = timezone.now()
+    limite = agora - timedelta(seconds=settings.PROCESSAMENTO_HISTORICO_TIMEOUT)
+
+    with transaction.atomic():
+        pendentes = (
+            Processamento_Historico.objects.select_for_update(skip_locked=True)
+            .select_related('historico')
+            .filter(Q(status=Processamento_Historico.NA_FILA) | Q(status=Processamento_Historico.PROCESSANDO, iniciado_em__lt=limite))
+            .order_by('criado_em')
+        )
+        while True:
+            processamento = pendentes.first()
+            if processamento is None:
+                return None
+            if processamento.tentativas < settings.PROCESSAMENTO_HISTORICO_MAX_TENTATIVAS:
+                break
+
+            # Um PDF que derruba o worker não volta para a fila indefinidamente
+            processamento.status = Processamento_Historico.FALHOU
+            processamento.erro = f'Interrompido em {processamento.tentativas} tentativas'
+            processamento.concluido_em = agora
+            processamento.save(update_fields=['status', 'erro', 'concluido_em'])
+
+        processamento.status = Processamento_Historico.PROCESSANDO
+        processamento.iniciado_em = agora
+        processamento.tentativas += 1
+        processamento.save(update_fields=['status', 'iniciado_em', 'tentativas'])
+    return processamento
+
+
+def executar_processamento(processamento):
+    try:
+        processamento.disciplinas_desconhecidas = extrair_disciplinas_do_pdf(processamento.historico)
+    except Exception as erro:
+        processamento.status = Processamento_Historico.FALHOU
+        processamento.erro = f'{type(erro).__name__}: {erro}'
+    else:
+        processamento.status = Processamento_Historico.CONCLUIDO
+    processamento.concluido_em = timezone.now()
+
+    # update() em vez de save(): o histórico pode ter sido substituído durante o processamento
+    Processamento_Historico.objects.filter(pk=processamento.pk).update(
+        status=processamento.status,
+        erro=processamento.erro,
+        disciplinas_desconhecidas=processamento.disciplinas_desconhecidas,
+        concluido_em=processamento.concluido_em
+    )
+    return processamento
+
+
+def processar_pendentes(limite=None):
+    """Processa a fila até esvaziá-la (ou até o limite) e retorna quantos foram processados."""
+    processados = 0
+    while limite is None or processados < limite:
+        processamento = reivindicar_processamento()
+        if processamento is None:
+            break
+        executar_processamento(processamento)
+        processados += 1
+    return processados
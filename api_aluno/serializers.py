@@ -8,6 +8,7 @@ from .models import *
 from api_professor.serializers import AvaliacaoInformacoesSerializer
 
 from django.contrib.auth.models import User
+from api_rest.senhas import criar_usuario
 
 
 class AlunoPostSerializer(serializers.ModelSerializer):
@@ -19,11 +20,7 @@ class AlunoPostSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         senha = validated_data.pop('senha')
-        usuario = User.objects.create_user(
-            username=validated_data['email'],
-            email=validated_data['email'],
-            password=senha
-        )
+        usuario = criar_usuario(validated_data['email'], senha, self.context.get('senha_hash'))
         aluno = Aluno.objects.create(user=usuario, **validated_data)
         return aluno
 
@@ -82,25 +79,85 @@ class DisciplinaMatriculadaNotasSerializer(serializers.ModelSerializer):
         return obj.disciplina.nome
 
 
+class IndiceHistoricoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Indice_Historico
+        fields = ['periodo', 'media', 'creditos_cursados', 'creditos_aprovados', 'disciplinas', 'em_curso']
+
+
 class AlunoDadosSerializer(serializers.ModelSerializer):
+    """
+    Dados do aluno para a avaliação de candidatos. Com resumo=True no contexto, as disciplinas
+    matriculadas são omitidas e ficam só os índices do histórico. Os campos leem
+    obj.historicos.all(), aproveitando o prefetch_related de quem lista vários alunos.
+    """
     disciplinas_matriculadas = serializers.SerializerMethodField()
     cra = serializers.SerializerMethodField()
+    indices = serializers.SerializerMethodField()
     habilidades = HabilidadeSerializer(many=True)
     experiencias = ExperienciaSerializer(many=True)
     interesses = InteresseSerializer(many=True)
 
     class Meta:
         model = Aluno
-        fields = ['matricula', 'nome', 'email', 'disciplinas_matriculadas', 'cra', 'habilidades', 'experiencias', 'interesses']
+        fields = ['matricula', 'nome', 'email', 'disciplinas_matriculadas', 'cra', 'indices', 'habilidades', 'experiencias', 'interesses']
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get('resumo'):
+            fields.pop('disciplinas_matriculadas')
+        return fields
+
+    def _historico(self, obj):
+        historicos = list(obj.historicos.all())
+        return historicos[0] if historicos else None
 
     def get_disciplinas_matriculadas(self, obj):
-        historico = obj.historicos.first()
+        historico = self._historico(obj)
         if historico:
             return DisciplinaMatriculadaNotasSerializer(historico.disciplinas_matriculadas, many=True).data
         return []
 
     def get_cra(self, obj):
-        historico = obj.historicos.first()
+        historico = self._historico(obj)
         if historico:
             return historico.cra
         return None
+
+    def get_indices(self, obj):
+        historico = self._historico(obj)
+        if not historico:
+            return None
+
+        geral = None
+        periodos = []
+        for indice in historico.indices.all():
+            if indice.periodo == Indice_Historico.GERAL:
+                geral = indice
+            else:
+                periodos.append(indice)
+        periodos.sort(key=lambda indice: indice.periodo)
+
+        return {
+            'geral': IndiceHistoricoSerializer(geral).data if geral else None,
+            'periodos': IndiceHistoricoSerializer(periodos, many=True).data,
+        }
+
+
+class ProcessamentoHistoricoSerializer(serializers.ModelSerializer):
+    tempo_na_fila = serializers.SerializerMethodField()
+    tempo_de_processamento = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Processamento_Historico
+        fields = ['id', 'status', 'erro', 'disciplinas_desconhecidas', 'criado_em', 'iniciado_em', 'concluido_em', 'tempo_na_fila', 'tempo_de_processamento']
+
+    def get_tempo_na_fila(self, obj):
+        if obj.iniciado_em is None:
+            return None
+        return (obj.iniciado_em - obj.criado_em).total_seconds()
+
+    def get_tempo_de_processamento(self, obj):
+        if obj.iniciado_em is None or obj.concluido_em is None:
+            return None
+        return (obj.concluido_em - obj.iniciado_em).total_seconds()
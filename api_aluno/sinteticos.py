@@ -0,0 +1,219 @@
+import random
+
+import pypdfium2 as pdfium
+
+
+LARGURA_PAGINA = 595
+ALTURA_PAGINA = 842
+TOPO = 800
+RODAPE = 60
+ALTURA_LINHA = 9
+TAMANHO_FONTE = 7
+
+# Colunas da tabela de disciplinas, como no histórico do Controle Acadêmico
+X_CODIGO = 42
+X_DISCIPLINA = 84
+X_TIPO = 310
+X_CREDITOS = 368
+X_CARGA = 396
+X_MEDIA = 436
+X_SITUACAO = 470
+X_PERIODO = 530
+
+PALAVRAS = [
+    'ALGORITMOS', 'ANÁLISE', 'APLICADA', 'ARQUITETURA', 'BANCO', 'CÁLCULO', 'COMPILADORES',
+    'COMPUTAÇÃO', 'DADOS', 'DISTRIBUÍDOS', 'ENGENHARIA', 'ESTATÍSTICA', 'ESTRUTURA', 'GRAFOS',
+    'INTELIGÊNCIA', 'INTRODUÇÃO', 'LABORATÓRIO', 'LINGUAGENS', 'LÓGICA', 'MATEMÁTICA',
+    'ORGANIZAÇÃO', 'PARADIGMAS', 'PROBABILIDADE', 'PROGRAMAÇÃO', 'PROJETO', 'REDES',
+    'SEGURANÇA', 'SISTEMAS', 'SOFTWARE', 'TEORIA', 'VISÃO',
+]
+CABECALHO = [
+    'Universidade Federal de Campina Grande',
+    'Pró-Reitoria de Ensino',
+    'Coordenação de Controle Acadêmico',
+    'Histórico Acadêmico',
+    'Aluno: 120000000 ALUNO SINTÉTICO DE TESTE CPF: 00000000000',
+    'Curso: CIÊNCIA DA COMPUTAÇÃO - D (14102100) Currículo: 2017',
+    'Disciplinas',
+]
+CONECTIVOS = ['DE', 'DA', 'E', 'À', 'PARA']
+NOMES = ['Adalberto', 'Amanda', 'Cláudio', 'Dalton', 'Eliane', 'Fábio', 'Joseana', 'João', 'Lívia', 'Tiago']
+SOBRENOMES = ['Almeida', 'Campelo', 'Farias', 'Fechine', 'Gomes', 'Guerrero', 'Massoni', 'Pereira', 'Rêgo', 'Sampaio']
+
+# Situação, peso e se a disciplina tem média
+SITUACOES = [
+    ('Aprovado', 70, True),
+    ('Em Curso', 12, False),
+    ('Dispensa', 6, False),
+    ('Reprovado', 8, True),
+    ('Aprovado', 4, False),
+]
+
+
+def _escapar(texto):
+    return texto.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _montar_pdf(paginas):
+    """Monta um PDF com as páginas dadas como listas de (x, y, texto), usando a Helvetica padrão."""
+    objetos = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        None,
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+    ]
+    referencias_paginas = []
+    for textos in paginas:
+        conteudo = ''.join(
+            f'BT /F1 {TAMANHO_FONTE} Tf {x} {y} Td ({_escapar(texto)}) Tj ET\n' for x, y, texto in textos
+        ).encode('cp1252')
+        objetos.append(b'<< /Length %d >>\nstream\n' % len(conteudo) + conteudo + b'\nendstream')
+        numero_conteudo = len(objetos)
+        objetos.append((
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {LARGURA_PAGINA} {ALTURA_PAGINA}] '
+            f'/Resources << /Font << /F1 3 0 R >> >> /Contents {numero_conteudo} 0 R >>'
+        ).encode())
+        referencias_paginas.append(f'{len(objetos)} 0 R')
+    objetos[1] = f'<< /Type /Pages /Kids [{" ".join(referencias_paginas)}] /Count {len(paginas)} >>'.encode()
+
+    pdf = bytearray(b'%PDF-1.4\n')
+    deslocamentos = []
+    for numero, objeto in enumerate(objetos, start=1):
+        deslocamentos.append(len(pdf))
+        pdf += b'%d 0 obj\n' % numero + objeto + b'\nendobj\n'
+    inicio_xref = len(pdf)
+    pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objetos) + 1)
+    pdf += b''.join(b'%010d 00000 n \n' % deslocamento for deslocamento in deslocamentos)
+    pdf += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objetos) + 1, inicio_xref)
+    return bytes(pdf)
+
+
+def gerar_disciplinas(quantidade, semente=0):
+    """Sorteia as disciplinas de um histórico, ordenadas por período."""
+    sorteio = random.Random(semente)
+    codigos = sorteio.sample(range(1100000, 1500000), quantidade)
+    situacoes = [situacao for situacao in SITUACOES for _ in range(situacao[1])]
+
+    disciplinas = []
+    for indice, codigo in enumerate(codigos):
+        situacao, _, tem_media = sorteio.choice(situacoes)
+        creditos = sorteio.choice([2, 4, 4, 4, 6])
+        if not tem_media:
+            media = '-'
+        elif situacao == 'Reprovado':
+            media = f'{sorteio.uniform(0, 4.9):.1f}'.replace('.', ',')
+        else:
+            media = f'{sorteio.uniform(5, 10):.1f}'.replace('.', ',')
+
+        palavras = sorteio.sample(PALAVRAS, sorteio.randint(1, 3))
+        if len(palavras) > 1 and sorteio.random() < 0.5:
+            palavras.insert(1, sorteio.choice(CONECTIVOS))
+        nome = ' '.join(palavras) + sorteio.choice(['', ' I', ' II'])
+
+        disciplinas.append({
+            'codigo': str(codigo),
+            'nome': nome,
+            'tipo': sorteio.choice(['Obrigatória', 'Obrigatória', 'Optativa']),
+            'creditos': creditos,
+            'media': media,
+            'situacao': situacao,
+            'periodo': f'{2018 + indice * 8 // max(quantidade, 1)}.{sorteio.randint(1, 2)}',
+            'professores': [
+                f'{sorteio.choice(NOMES)} {sorteio.choice(SOBRENOMES)} {sorteio.choice(SOBRENOMES)}'
+                for _ in range(sorteio.choice([1, 1, 1, 2, 3]))
+            ],
+        })
+    disciplinas.sort(key=lambda disciplina: disciplina['periodo'])
+    return disciplinas
+
+
+def registros_esperados(disciplinas):
+    """Registros que interpretar_linhas deve produzir para as disciplinas do histórico."""
+    return [
+        {
+            'codigo': disciplina['codigo'],
+            'tipo': disciplina['tipo'],
+            'creditos': disciplina['creditos'],
+            'media': None if disciplina['media'] == '-' else float(disciplina['media'].replace(',', '.')),
+            'situacao': disciplina['situacao'],
+            'periodo': disciplina['periodo'],
+        }
+        for disciplina in disciplinas
+        if disciplina['situacao'] in ('Aprovado', 'Em Curso', 'Dispensa')
+    ]
+
+
+def gerar_historico_sintetico(destino, disciplinas):
+    """
+    Grava em destino um histórico no formato do Controle Acadêmico da UFCG com as disciplinas
+    dadas (ver gerar_disciplinas) e retorna a quantidade de páginas. Como no PDF original,
+    cada linha da tabela é escrita em partes (código e nome, professores, demais colunas),
+    e os professores de uma disciplina no fim da página continuam na página seguinte.
+    """
+    paginas = []
+    textos = []
+    y = TOPO
+
+    def cabecalho_da_tabela():
+        nonlocal y
+        textos.append((X_DISCIPLINA + 300, y, 'Carga'))
+        y -= ALTURA_LINHA
+        textos.append((X_CODIGO, y, 'Código Disciplina'))
+        textos.append((X_TIPO, y, 'Tipo Créditos horária Média Situação Período'))
+        y -= ALTURA_LINHA
+
+    def nova_pagina():
+        nonlocal textos, y
+        textos = []
+        paginas.append(textos)
+        y = TOPO
+        cabecalho_da_tabela()
+
+    paginas.append(textos)
+    for linha in CABECALHO:
+        textos.append((X_CODIGO, y, linha))
+        y -= ALTURA_LINHA
+    cabecalho_da_tabela()
+
+    for disciplina in disciplinas:
+        if y < RODAPE:
+            nova_pagina()
+        y_linha = y
+        linha_da_tabela = textos
+        textos.append((X_CODIGO, y_linha, disciplina['codigo']))
+        textos.append((X_DISCIPLINA, y_linha, disciplina['nome']))
+        y -= ALTURA_LINHA
+        for professor in disciplina['professores']:
+            if y < RODAPE:
+                nova_pagina()
+            textos.append((X_DISCIPLINA, y, professor))
+            y -= ALTURA_LINHA
+        for x, valor in [(X_TIPO, disciplina['tipo']), (X_CREDITOS, str(disciplina['creditos'])),
+                         (X_CARGA, str(disciplina['creditos'] * 15)), (X_MEDIA, disciplina['media']),
+                         (X_SITUACAO, disciplina['situacao']), (X_PERIODO, disciplina['periodo'])]:
+            linha_da_tabela.append((x, y_linha, valor))
+
+    if y < RODAPE + 4 * ALTURA_LINHA:
+        nova_pagina()
+    for linha in ['Integralização curricular', 'CRA: 0,00 MC: 0,00 IEA: 0,00', 'Créditos matriculados: 0']:
+        textos.append((X_CODIGO, y, linha))
+        y -= ALTURA_LINHA
+
+    with open(destino, 'wb') as arquivo:
+        arquivo.write(_montar_pdf(paginas))
+    return len(paginas)
+
+
+def gerar_pdf_ampliado(origem, destino, repeticoes):
+    """
+    Monta um histórico maior repetindo as páginas de disciplinas de um histórico real
+    (todas menos a última, que traz os índices e as notas de ingresso).
+    """
+    documento_origem = pdfium.PdfDocument(origem)
+    paginas_disciplinas = list(range(max(1, len(documento_origem) - 1)))
+
+    documento = pdfium.PdfDocument.new()
+    for _ in range(repeticoes):
+        documento.import_pages(documento_origem, paginas_disciplinas)
+    documento.import_pages(documento_origem, [len(documento_origem) - 1])
+    documento.save(destino)
+    return len(documento)
@@ -1,17 +1,50 @@
 import os
-from django.test import TestCase
+import hashlib
+import shutil
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.http import FileResponse
+from django.utils.http import http_date
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopFutureHandlers, StopUpload
+from django.core.management import call_command
 
 from api_aluno.views import *
-from api_aluno.models import Aluno, Historico_Academico, Disciplina_Matriculada
+from api_aluno.models import Aluno, Historico_Academico, Disciplina_Matriculada, Indice_Historico, Interpretacao_Historico, Processamento_Historico
+from api_aluno.sinteticos import gerar_pdf_ampliado, gerar_disciplinas, gerar_historico_sintetico, registros_esperados
+from api_aluno.armazenamento import coletar_arquivos_sem_referencia
+from api_aluno.entrega import interpretar_range
+from api_aluno.uploads import HistoricoUploadHandler, ERRO_FORMATO, ERRO_TAMANHO
+from api_aluno.indices import atualizar_indices, medias_por_periodo, recalcular_cra
+from api_aluno.processamento import executar_processamento, processar_pendentes, registrar_historico, reivindicar_processamento
+from api_aluno.utils import calcular_sha256, extrair_linhas_do_pdf, extrair_registros_do_pdf, interpretar_linhas, iterar_linhas_do_pdf, iterar_registros, contar_paginas, BACKENDS_DE_EXTRACAO, salvar_registros, guardar_registros_interpretados, VERSAO_DO_INTERPRETADOR
 from api_professor.models import Professor
 from api_projeto.models import Projeto
 from api_rest.models import *
 
 
+class MediaTemporariaMixin:
+    # Os PDFs são gravados por conteúdo e não saem do disco com o histórico (ver coletar_historicos);
+    # sem isto, os testes deixariam arquivos em media/historicos
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.media_root, ignore_errors=True)
+        configuracao = override_settings(MEDIA_ROOT=cls.media_root)
+        configuracao.enable()
+        cls.addClassCleanup(configuracao.disable)
+
+
 
 class AlunoModelTestCase(TestCase):
 
@@ -130,6 +163,20 @@ class CriarAlunoViewTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('senha', response.data)
 
+    def test_criar_aluno_async_sucesso(self):
+        response = self.client.post(reverse('criar_aluno_async'), self.aluno_data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['matricula'], self.aluno_data['matricula'])
+        aluno = Aluno.objects.get(pk=self.aluno_data['matricula'])
+        self.assertTrue(aluno.user.check_password(self.aluno_data['senha']))
+
+    def test_criar_aluno_async_com_senha_vazia(self):
+        invalid_data = dict(self.aluno_data, senha='')
+        response = self.client.post(reverse('criar_aluno_async'), invalid_data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('senha', response.json())
 
 class getAllAlunoViewTestCase(APITestCase):
 
@@ -203,7 +250,7 @@ class getAlunoPorMatriculaTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
-class UploadHistoricoAcademicoViewTestCase(APITestCase):
+class UploadHistoricoAcademicoViewTestCase(MediaTemporariaMixin, APITestCase):
     def setUp(self):
         self.client = APIClient()
         self.usuario = User.objects.create_user(
@@ -235,7 +282,8 @@ class UploadHistoricoAcademicoViewTestCase(APITestCase):
                 data={'aluno': self.aluno.matricula, 'historico_pdf': SimpleUploadedFile('historico.pdf', pdf_file.read())},
                 format='multipart'
             )
-            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            processar_pendentes()
             historico = Historico_Academico.objects.get(aluno=self.aluno)
             self.assertIsNotNone(historico)
             self.assertTrue(os.path.isfile(historico.historico_pdf.path))
@@ -243,14 +291,15 @@ class UploadHistoricoAcademicoViewTestCase(APITestCase):
             disciplinas_matriculadas = Disciplina_Matriculada.objects.filter(historico=historico)
             self.assertGreater(len(disciplinas_matriculadas), 0)
 
-    def test_upload_novo_historico_apaga_antigo(self):
+    def test_upload_novo_historico_substitui_antigo(self):
         with open(self.pdf_path, 'rb') as pdf_file:
             response = self.client.post(
                 self.url_upload,
                 data={'historico_pdf': SimpleUploadedFile('historico.pdf', pdf_file.read())},
                 format='multipart'
             )
-            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            processar_pendentes()
 
         historico = Historico_Academico.objects.get(aluno=self.aluno)
         caminho_pdf_antigo = historico.historico_pdf.path
@@ -261,17 +310,23 @@ class UploadHistoricoAcademicoViewTestCase(APITestCase):
         with open(self.pdf_path, 'rb') as novo_pdf_file:
             response = self.client.post(
                 self.url_upload,
-                data={'aluno': self.aluno.matricula, 'historico_pdf': SimpleUploadedFile('historico_novo.pdf', novo_pdf_file.read())},
+                # Bytes após o %%EOF mudam o hash sem mudar o conteúdo, evitando o reaproveitamento
+                data={'aluno': self.aluno.matricula, 'historico_pdf': SimpleUploadedFile('historico_novo.pdf', novo_pdf_file.read() + b'\n% reenvio\n')},
                 format='multipart'
             )
-            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            processar_pendentes()
 
-        self.assertFalse(os.path.isfile(caminho_pdf_antigo))
         historico_atualizado = Historico_Academico.objects.get(aluno=self.aluno)
         caminho_pdf_novo = historico_atualizado.historico_pdf.path
+        self.assertNotEqual(caminho_pdf_novo, caminho_pdf_antigo)
         self.assertTrue(os.path.isfile(caminho_pdf_novo))
+        # O PDF antigo só é removido por manage.py coletar_historicos
+        self.assertTrue(os.path.isfile(caminho_pdf_antigo))
+        self.assertEqual(historico_atualizado.id, historico.id)
+        # O conteúdo é o mesmo: as disciplinas matriculadas são mantidas, com os mesmos ids
         disciplinas_novas = Disciplina_Matriculada.objects.filter(historico=historico_atualizado)
-        self.assertNotEqual(list(disciplinas_anteriores), list(disciplinas_novas))
+        self.assertEqual(sorted(d.id for d in disciplinas_anteriores), sorted(d.id for d in disciplinas_novas))
 
     def test_upload_historico_aluno_nao_existe(self):
         user = User.objects.create_user(
@@ -299,13 +354,13 @@ class UploadHistoricoAcademicoViewTestCase(APITestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
-    def test_delete_historico_removes_pdf(self):
+    def test_delete_historico_mantem_pdf_para_coleta(self):
         self.test_upload_historico()
         historico = Historico_Academico.objects.get(aluno=self.aluno)
         pdf_file_path = historico.historico_pdf.path
         self.assertTrue(os.path.isfile(pdf_file_path))
         historico.delete()
-        self.assertFalse(os.path.isfile(pdf_file_path))
+        self.assertTrue(os.path.isfile(pdf_file_path))
         self.assertEqual(Historico_Academico.objects.filter(aluno=self.aluno).count(), 0)
         self.assertEqual(Disciplina_Matriculada.objects.filter(historico__aluno=self.aluno).count(), 0)
 
@@ -336,7 +391,7 @@ class UploadHistoricoAcademicoViewTestCase(APITestCase):
         self.assertEqual(response.data['messages'][0]['message'], "Token tem tipo errado")
 
 
-class VisualizarHistoricoAcademicoViewTestCase(APITestCase):
+class VisualizarHistoricoAcademicoViewTestCase(MediaTemporariaMixin, APITestCase):
     def setUp(self):
         self.usuario = User.objects.create_user(
             username='joao.silva@example.com',
@@ -368,7 +423,8 @@ class VisualizarHistoricoAcademicoViewTestCase(APITestCase):
                 data={'aluno': self.aluno.matricula, 'historico_pdf': SimpleUploadedFile('historico.pdf', pdf_file.read())},
                 format='multipart'
             )
-            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            processar_pendentes()
             historico = Historico_Academico.objects.get(aluno=self.aluno)
             self.assertIsNotNone(historico)
             self.assertTrue(os.path.isfile(historico.historico_pdf.path))
@@ -449,6 +505,918 @@ class VisualizarHistoricoAcademicoViewTestCase(APITestCase):
         self.assertGreater(len(disciplinas_matriculadas), 0)
 
 
+class StatusProcessamentoHistoricoTestCase(MediaTemporariaMixin, APITestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_user(
+            username='joao.silva@example.com',
+            email='joao.silva@example.com',
+            password='senhaSegura'
+        )
+        self.aluno = Aluno.objects.create(
+            matricula="123456789",
+            nome="João da Silva",
+            email="joao.silva@example.com",
+            user=self.usuario
+        )
+        self.client.force_authenticate(user=self.usuario)
+
+    def enviar(self, conteudo=b'%PDF-1.4 corrompido'):
+        return self.client.post(
+            reverse('upload_historico'),
+            data={'historico_pdf': SimpleUploadedFile('historico.pdf', conteudo)},
+            format='multipart'
+        )
+
+    def test_upload_retorna_processamento_na_fila(self):
+        response = self.enviar()
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], Processamento_Historico.NA_FILA)
+        self.assertEqual(response['Location'], reverse('status_processamento_historico', kwargs={'id_processamento': response.data['id']}))
+        self.assertEqual(Disciplina_Matriculada.objects.count(), 0)
+
+    def test_status_apos_falha(self):
+        id_processamento = self.enviar().data['id']
+
+        processar_pendentes()
+        response = self.client.get(reverse('status_processamento_historico', kwargs={'id_processamento': id_processamento}))
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], Processamento_Historico.FALHOU)
+        self.assertNotEqual(response.data['erro'], '')
+        self.assertIsNotNone(response.data['tempo_na_fila'])
+        self.assertIsNotNone(response.data['tempo_de_processamento'])
+
+    def test_status_de_outro_aluno(self):
+        id_processamento = self.enviar().data['id']
+        outro_usuario = User.objects.create_user(username='outro@example.com', email='outro@example.com', password='senhaSegura')
+        Aluno.objects.create(matricula="987654321", nome="Outro", email="outro@example.com", user=outro_usuario)
+        self.client.force_authenticate(user=outro_usuario)
+
+        response = self.client.get(reverse('status_processamento_historico', kwargs={'id_processamento': id_processamento}))
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_status_processamento_inexistente(self):
+        response = self.client.get(reverse('status_processamento_historico', kwargs={'id_processamento': 999}))
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_processamento_preso_volta_para_fila(self):
+        id_processamento = self.enviar().data['id']
+        Processamento_Historico.objects.filter(pk=id_processamento).update(
+            status=Processamento_Historico.PROCESSANDO,
+            iniciado_em=timezone.now() - timedelta(hours=1)
+        )
+
+        processamento = reivindicar_processamento()
+
+        # Asserts
+        self.assertEqual(processamento.id, id_processamento)
+        self.assertEqual(processamento.tentativas, 1)
+        self.assertIsNone(reivindicar_processamento())
+
+    @override_settings(PROCESSAMENTO_HISTORICO_MAX_TENTATIVAS=2)
+    def test_processamento_preso_alem_das_tentativas_falha(self):
+        id_processamento = self.enviar().data['id']
+        Processamento_Historico.objects.filter(pk=id_processamento).update(
+            status=Processamento_Historico.PROCESSANDO,
+            iniciado_em=timezone.now() - timedelta(hours=1),
+            tentativas=2
+        )
+
+        processamento = reivindicar_processamento()
+
+        # Asserts
+        self.assertIsNone(processamento)
+        processamento = Processamento_Historico.objects.get(pk=id_processamento)
+        self.assertEqual(processamento.status, Processamento_Historico.FALHOU)
+        self.assertIn('2 tentativas', processamento.erro)
+
+
+class DeduplicacaoHistoricoTestCase(MediaTemporariaMixin, APITestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_user(
+            username='joao.silva@example.com',
+            email='joao.silva@example.com',
+            password='senhaSegura'
+        )
+        self.aluno = Aluno.objects.create(
+            matricula="123456789",
+            nome="João da Silva",
+            email="joao.silva@example.com",
+            user=self.usuario
+        )
+        self.client.force_authenticate(user=self.usuario)
+        self.conteudo = b'%PDF-1.4 historico de teste'
+
+    def enviar(self, conteudo):
+        return self.client.post(
+            reverse('upload_historico'),
+            data={'historico_pdf': SimpleUploadedFile('historico.pdf', conteudo)},
+            format='multipart'
+        )
+
+    def test_primeiro_envio_nao_reaproveita(self):
+        response = self.enviar(self.conteudo)
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(response.data['reaproveitado'])
+        self.assertEqual(Historico_Academico.objects.get(aluno=self.aluno).hash_pdf, hashlib.sha256(self.conteudo).hexdigest())
+
+    def test_reenvio_identico_na_fila_reaproveita_processamento(self):
+        primeiro = self.enviar(self.conteudo)
+        historico = Historico_Academico.objects.get(aluno=self.aluno)
+
+        segundo = self.enviar(self.conteudo)
+
+        # Asserts
+        self.assertEqual(segundo.status_code, status.HTTP_202_ACCEPTED)
+        self.assertTrue(segundo.data['reaproveitado'])
+        self.assertEqual(segundo.data['id'], primeiro.data['id'])
+        self.assertEqual(Historico_Academico.objects.get(aluno=self.aluno).id, historico.id)
+        self.assertEqual(Processamento_Historico.objects.count(), 1)
+
+    def test_reenvio_identico_processado_reaproveita(self):
+        self.enviar(self.conteudo)
+        historico = Historico_Academico.objects.get(aluno=self.aluno)
+        Historico_Academico.objects.filter(pk=historico.pk).update(versao_interpretador=VERSAO_DO_INTERPRETADOR, cra=9.3)
+        Processamento_Historico.objects.filter(historico=historico).update(status=Processamento_Historico.CONCLUIDO)
+
+        response = self.enviar(self.conteudo)
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['reaproveitado'])
+        self.assertEqual(Historico_Academico.objects.get(aluno=self.aluno).cra, 9.3)
+
+    def test_interpretacao_guardada_dispensa_worker(self):
+        guardar_registros_interpretados(hashlib.sha256(self.conteudo).hexdigest(), [])
+
+        response = self.enviar(self.conteudo)
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['reaproveitado'])
+        self.assertEqual(response.data['status'], Processamento_Historico.CONCLUIDO)
+        self.assertEqual(Historico_Academico.objects.get(aluno=self.aluno).versao_interpretador, VERSAO_DO_INTERPRETADOR)
+
+    @mock.patch('api_aluno.utils.extrair_registros_do_pdf', return_value=[])
+    def test_interpretacao_do_worker_e_reaproveitada_por_outro_aluno(self, extrair):
+        self.enviar(self.conteudo)
+        processar_pendentes()
+        outro = User.objects.create_user(username='maria@example.com', email='maria@example.com', password='senhaSegura')
+        Aluno.objects.create(matricula="987654321", nome="Maria", email="maria@example.com", user=outro)
+        self.client.force_authenticate(user=outro)
+
+        response = self.enviar(self.conteudo)
+
+        # Asserts
+        extrair.assert_called_once()
+        self.assertEqual(Interpretacao_Historico.objects.get().hash_pdf, hashlib.sha256(self.conteudo).hexdigest())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['reaproveitado'])
+
+    @mock.patch('api_aluno.utils.sincronizar_por_disciplina_desconhecida')
+    def test_disciplina_desconhecida_fica_para_o_worker(self, sincronizar):
+        registro = {'codigo': '9999999', 'tipo': 'Obrigatória', 'creditos': 4, 'media': 9.0, 'situacao': 'Aprovado', 'periodo': '2020.1'}
+        guardar_registros_interpretados(hashlib.sha256(self.conteudo).hexdigest(), [registro])
+
+        response = self.enviar(self.conteudo)
+
+        # Asserts
+        sincronizar.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertTrue(response.data['reaproveitado'])
+        self.assertEqual(response.data['status'], Processamento_Historico.NA_FILA)
+
+    def test_envio_diferente_substitui_historico(self):
+        self.enviar(self.conteudo)
+        historico = Historico_Academico.objects.get(aluno=self.aluno)
+
+        response = self.enviar(self.conteudo + b' alterado')
+
+        # Asserts
+        self.assertFalse(response.data['reaproveitado'])
+        historico_atualizado = Historico_Academico.objects.get(aluno=self.aluno)
+        self.assertEqual(historico_atualizado.id, historico.id)
+        self.assertEqual(historico_atualizado.hash_pdf, hashlib.sha256(self.conteudo + b' alterado').hexdigest())
+        self.assertNotEqual(historico_atualizado.historico_pdf.name, historico.historico_pdf.name)
+
+    def test_primeiros_envios_simultaneos_do_mesmo_aluno(self):
+        novo = self.conteudo + b' alterado'
+        Historico_Academico.objects.create(aluno=self.aluno, historico_pdf=SimpleUploadedFile('historico.pdf', self.conteudo), hash_pdf=hashlib.sha256(self.conteudo).hexdigest())
+        primeira = QuerySet.first
+        consultas = []
+
+        def gravado_depois_da_consulta(queryset):
+            # O outro envio grava o histórico entre a consulta e a inserção
+            consultas.append(queryset)
+            return None if len(consultas) == 1 else primeira(queryset)
+
+        with mock.patch.object(QuerySet, 'first', gravado_depois_da_consulta):
+            processamento, reaproveitado = registrar_historico(self.aluno.matricula, SimpleUploadedFile('historico.pdf', novo))
+
+        # Asserts
+        self.assertFalse(reaproveitado)
+        historico = Historico_Academico.objects.get(aluno=self.aluno)
+        self.assertEqual(historico.hash_pdf, hashlib.sha256(novo).hexdigest())
+        self.assertEqual(processamento.historico_id, historico.id)
+
+    def test_processamento_antigo_nao_sobrescreve_envio_mais_recente(self):
+        Disciplina.objects.create(codigo=1411311, nome='Programação 1')
+        registro = {'codigo': '1411311', 'tipo': 'Obrigatória', 'creditos': 4, 'media': 9.0, 'situacao': 'Aprovado', 'periodo': '2020.1'}
+        novo = self.conteudo + b' alterado'
+        guardar_registros_interpretados(hashlib.sha256(self.conteudo).hexdigest(), [])
+        guardar_registros_interpretados(hashlib.sha256(novo).hexdigest(), [registro])
+        Processamento_Historico.objects.create(historico=Historico_Academico.objects.create(
+            aluno=self.aluno, historico_pdf=SimpleUploadedFile('historico.pdf', self.conteudo),
+            hash_pdf=hashlib.sha256(self.conteudo).hexdigest()
+        ))
+        antigo = reivindicar_processamento()
+
+        # O novo PDF é aplicado pelo envio enquanto o worker ainda processa o antigo
+        self.enviar(novo)
+        executar_processamento(antigo)
+
+        # Asserts
+        historico = Historico_Academico.objects.get(aluno=self.aluno)
+        self.assertEqual(historico.hash_pdf, hashlib.sha256(novo).hexdigest())
+        self.assertEqual(historico.disciplinas_matriculadas.count(), 1)
+        antigo.refresh_from_db()
+        self.assertEqual(antigo.status, Processamento_Historico.FALHOU)
+        self.assertIn('HistoricoSubstituido', antigo.erro)
+
+
+class UploadHistoricoHandlerTestCase(MediaTemporariaMixin, APITestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='joao.silva@example.com', email='joao.silva@example.com', password='senhaSegura')
+        self.aluno = Aluno.objects.create(matricula="123456789", nome="João da Silva", email="joao.silva@example.com", user=self.usuario)
+        self.client.force_authenticate(user=self.usuario)
+
+    def enviar(self, conteudo):
+        return self.client.post(
+            reverse('upload_historico'),
+            data={'historico_pdf': SimpleUploadedFile('historico.pdf', conteudo)},
+            format='multipart'
+        )
+
+    def test_upload_guarda_o_hash_calculado_no_recebimento(self):
+        conteudo = b'%PDF-1.4 historico recebido'
+
+        response = self.enviar(conteudo)
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        historico = Historico_Academico.objects.get(aluno=self.aluno)
+        self.assertEqual(historico.hash_pdf, hashlib.sha256(conteudo).hexdigest())
+        with open(historico.historico_pdf.path, 'rb') as arquivo:
+            self.assertEqual(arquivo.read(), conteudo)
+
+    def test_upload_de_arquivo_que_nao_e_pdf(self):
+        response = self.enviar(b'GIF89a nao sou um pdf')
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Historico_Academico.objects.filter(aluno=self.aluno).exists())
+
+    @override_settings(HISTORICO_TAMANHO_MAXIMO=1024)
+    def test_upload_acima_do_tamanho_maximo(self):
+        response = self.enviar(b'%PDF-1.4 ' + b'0' * 2048)
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertFalse(Historico_Academico.objects.filter(aluno=self.aluno).exists())
+
+    def test_corpo_grande_demais_nao_e_lido(self):
+        handler = HistoricoUploadHandler(tamanho_maximo=1024)
+
+        resultado = handler.handle_raw_input(None, {}, 10 * 1024 * 1024, b'fronteira')
+
+        # Asserts
+        self.assertEqual(handler.erro, ERRO_TAMANHO)
+        self.assertEqual((dict(resultado[0]), dict(resultado[1])), ({}, {}))
+
+    def test_assinatura_dividida_entre_blocos(self):
+        handler = HistoricoUploadHandler(tamanho_maximo=1024)
+
+        with self.assertRaises(StopFutureHandlers):
+            handler.new_file('historico_pdf', 'historico.pdf', 'application/pdf', None)
+        handler.receive_data_chunk(b'%P', 0)
+        handler.receive_data_chunk(b'DF-1.4 resto', 2)
+        arquivo = handler.file_complete(14)
+
+        # Asserts
+        self.assertIsNone(handler.erro)
+        self.assertEqual(arquivo.read(), b'%PDF-1.4 resto')
+        self.assertEqual(arquivo.sha256, hashlib.sha256(b'%PDF-1.4 resto').hexdigest())
+        self.assertEqual(calcular_sha256(arquivo), arquivo.sha256)
+        arquivo.close()
+
+    def test_envio_interrompido_remove_o_arquivo_temporario(self):
+        handler = HistoricoUploadHandler(tamanho_maximo=1024)
+
+        with self.assertRaises(StopFutureHandlers):
+            handler.new_file('historico_pdf', 'historico.pdf', 'application/pdf', None)
+        caminho = handler.file.temporary_file_path()
+        with self.assertRaises(StopUpload):
+            handler.receive_data_chunk(b'%PX', 0)
+        handler.upload_interrupted()
+
+        # Asserts
+        self.assertEqual(handler.erro, ERRO_FORMATO)
+        self.assertFalse(os.path.exists(caminho))
+
+    def test_outros_campos_seguem_para_os_demais_handlers(self):
+        handler = HistoricoUploadHandler(tamanho_maximo=1024)
+
+        handler.new_file('foto', 'foto.png', 'image/png', None)
+
+        # Asserts
+        self.assertEqual(handler.receive_data_chunk(b'PNG', 0), b'PNG')
+        self.assertIsNone(handler.file_complete(3))
+
+
+class ArmazenamentoHistoricoTestCase(TestCase):
+    def setUp(self):
+        # A coleta percorre MEDIA_ROOT inteiro: nunca rodá-la sobre o diretório real
+        self.media_root = tempfile.mkdtemp()
+        configuracao = override_settings(MEDIA_ROOT=self.media_root)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.conteudo = b'%PDF-1.4 historico armazenado'
+        self.hash_pdf = hashlib.sha256(self.conteudo).hexdigest()
+
+    def criar_historico(self, matricula, conteudo, nome='historico.pdf'):
+        usuario = User.objects.create_user(username=f'{matricula}@example.com', email=f'{matricula}@example.com', password='senhaSegura')
+        aluno = Aluno.objects.create(matricula=matricula, nome='Aluno', email=f'{matricula}@example.com', user=usuario)
+        return Historico_Academico.objects.create(aluno=aluno, historico_pdf=SimpleUploadedFile(nome, conteudo))
+
+    def arquivos(self):
+        return sorted(
+            os.path.relpath(os.path.join(raiz, arquivo), self.media_root)
+            for raiz, _, arquivos in os.walk(self.media_root) for arquivo in arquivos
+        )
+
+    def envelhecer(self, historico, segundos=7200):
+        instante = time.time() - segundos
+        os.utime(historico.historico_pdf.path, (instante, instante))
+
+    def coletar(self, *args):
+        saida = StringIO()
+        call_command('coletar_historicos', *args, stdout=saida)
+        return saida.getvalue()
+
+    def test_arquivo_gravado_pelo_hash(self):
+        historico = self.criar_historico('100000001', self.conteudo, nome='Meu Histórico.PDF')
+
+        # Asserts
+        self.assertEqual(historico.historico_pdf.name, f'historicos/{self.hash_pdf[:2]}/{self.hash_pdf[2:4]}/{self.hash_pdf}.pdf')
+        with open(historico.historico_pdf.path, 'rb') as arquivo:
+            self.assertEqual(arquivo.read(), self.conteudo)
+
+    def test_envios_identicos_compartilham_o_arquivo(self):
+        primeiro = self.criar_historico('100000001', self.conteudo)
+        segundo = self.criar_historico('100000002', self.conteudo, nome='outro_nome.pdf')
+
+        # Asserts
+        self.assertEqual(primeiro.historico_pdf.name, segundo.historico_pdf.name)
+        self.assertEqual(self.arquivos(), [primeiro.historico_pdf.name])
+
+    def test_coleta_remove_so_arquivos_sem_referencia(self):
+        mantido = self.criar_historico('100000001', self.conteudo)
+        removido = self.criar_historico('100000002', b'%PDF-1.4 outro historico')
+        self.envelhecer(mantido)
+        self.envelhecer(removido)
+        removido.delete()
+
+        saida = self.coletar()
+
+        # Asserts
+        self.assertIn('1 arquivos sem referência removidos', saida)
+        self.assertEqual(self.arquivos(), [mantido.historico_pdf.name])
+
+    def test_coleta_mantem_arquivo_compartilhado(self):
+        primeiro = self.criar_historico('100000001', self.conteudo)
+        self.criar_historico('100000002', self.conteudo)
+        self.envelhecer(primeiro)
+        primeiro.delete()
+
+        self.coletar()
+
+        # Asserts
+        self.assertEqual(self.arquivos(), [primeiro.historico_pdf.name])
+
+    def test_coleta_preserva_arquivos_recentes(self):
+        historico = self.criar_historico('100000001', self.conteudo)
+        historico.delete()
+
+        self.coletar()
+
+        # Asserts
+        self.assertEqual(self.arquivos(), [historico.historico_pdf.name])
+        self.coletar('--idade-minima', '0')
+        self.assertEqual(self.arquivos(), [])
+
+    def test_reaproveitamento_renova_o_arquivo(self):
+        antigo = self.criar_historico('100000001', self.conteudo)
+        self.envelhecer(antigo)
+        antigo.delete()
+
+        self.criar_historico('100000002', self.conteudo)
+
+        # Asserts
+        self.assertGreater(os.stat(antigo.historico_pdf.path).st_mtime, time.time() - 60)
+
+    def test_reaproveitamento_regrava_arquivo_removido_pela_coleta(self):
+        antigo = self.criar_historico('100000001', self.conteudo)
+        antigo.delete()
+        utime = os.utime
+
+        def coletado_antes_do_utime(caminho, *args, **kwargs):
+            os.remove(caminho)
+            utime(caminho, *args, **kwargs)
+
+        with mock.patch('api_aluno.armazenamento.os.utime', side_effect=coletado_antes_do_utime):
+            novo = self.criar_historico('100000002', self.conteudo)
+
+        # Asserts
+        with open(novo.historico_pdf.path, 'rb') as arquivo:
+            self.assertEqual(arquivo.read(), self.conteudo)
+
+    def test_coleta_devolve_arquivo_reaproveitado_durante_a_coleta(self):
+        historico = self.criar_historico('100000001', self.conteudo)
+        self.envelhecer(historico)
+        historico.delete()
+        rename = os.rename
+
+        def reaproveitado_antes_do_rename(origem, destino):
+            # _save renova o arquivo entre o stat e o rename da coleta
+            os.utime(origem)
+            rename(origem, destino)
+
+        with mock.patch('api_aluno.armazenamento.os.rename', side_effect=reaproveitado_antes_do_rename):
+            saida = self.coletar()
+
+        # Asserts
+        self.assertIn('0 arquivos sem referência removidos', saida)
+        self.assertEqual(self.arquivos(), [historico.historico_pdf.name])
+
+    def test_coleta_devolve_arquivo_referenciado_durante_a_coleta(self):
+        historico = self.criar_historico('100000001', self.conteudo)
+        self.envelhecer(historico)
+        campo = Historico_Academico._meta.get_field('historico_pdf')
+
+        removidos = coletar_arquivos_sem_referencia(campo.storage, campo.upload_to, set(), 3600, referenciado=lambda name: True)
+
+        # Asserts
+        self.assertEqual(removidos, [])
+        self.assertEqual(self.arquivos(), [historico.historico_pdf.name])
+
+    def test_coleta_simulada_nao_remove(self):
+        historico = self.criar_historico('100000001', self.conteudo)
+        self.envelhecer(historico)
+        historico.delete()
+
+        saida = self.coletar('--simular')
+
+        # Asserts
+        self.assertIn(historico.historico_pdf.name, saida)
+        self.assertEqual(self.arquivos(), [historico.historico_pdf.name])
+
+
+class DownloadHistoricoTestCase(MediaTemporariaMixin, APITestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='joao.silva@example.com', email='joao.silva@example.com', password='senhaSegura')
+        self.aluno = Aluno.objects.create(matricula="123456789", nome="João da Silva", email="joao.silva@example.com", user=self.usuario)
+        self.conteudo = b'%PDF-1.4 historico de teste'
+        self.hash_pdf = hashlib.sha256(self.conteudo).hexdigest()
+        self.historico = Historico_Academico.objects.create(aluno=self.aluno, historico_pdf=SimpleUploadedFile('historico.pdf', self.conteudo), hash_pdf=self.hash_pdf)
+        self.url = reverse('visualizar_historico', kwargs={'matricula': self.aluno.matricula})
+        self.client.force_authenticate(user=self.usuario)
+
+    def test_entrega_pelo_django(self):
+        response = self.client.get(self.url)
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response['Content-Disposition'].startswith('attachment'))
+        self.assertEqual(b''.join(response.streaming_content), self.conteudo)
+
+    @override_settings(HISTORICO_ENTREGA='x-accel-redirect', HISTORICO_ENTREGA_PREFIXO_INTERNO='/protegido/')
+    def test_entrega_por_x_accel_redirect(self):
+        response = self.client.get(self.url)
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protegido/{self.historico.historico_pdf.name}')
+        self.assertEqual(response.content, b'')
+
+    @override_settings(HISTORICO_ENTREGA='x-sendfile')
+    def test_entrega_por_x_sendfile(self):
+        response = self.client.get(self.url)
+
+        # Asserts
+        self.assertEqual(response['X-Sendfile'], self.historico.historico_pdf.path)
+        self.assertTrue(response['Content-Disposition'].startswith('attachment'))
+
+    def test_validadores(self):
+        response = self.client.get(self.url)
+
+        # Asserts
+        self.assertEqual(response['ETag'], f'"{self.hash_pdf}"')
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_if_none_match_com_o_mesmo_pdf_retorna_304(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{self.hash_pdf}"')
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], f'"{self.hash_pdf}"')
+        self.assertEqual(response.content, b'')
+
+    def test_if_none_match_de_outro_pdf_retorna_o_arquivo(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"outro"')
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), self.conteudo)
+
+    def test_if_modified_since_retorna_304(self):
+        last_modified = self.client.get(self.url)['Last-Modified']
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_last_modified_e_o_envio_e_nao_o_arquivo(self):
+        enviado_em = timezone.now() - timedelta(days=1)
+        Historico_Academico.objects.filter(pk=self.historico.pk).update(enviado_em=enviado_em)
+        # Outro envio do mesmo conteúdo renova o arquivo compartilhado
+        os.utime(self.historico.historico_pdf.path)
+
+        response = self.client.get(self.url)
+
+        # Asserts
+        self.assertEqual(response['Last-Modified'], http_date(int(enviado_em.timestamp())))
+
+    def test_requisicao_condicional_sem_permissao(self):
+        outro = User.objects.create_user(username='maria@example.com', email='maria@example.com', password='senhaSegura')
+        self.client.force_authenticate(user=outro)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{self.hash_pdf}"')
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_range_com_um_intervalo(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-7')
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response['Content-Range'], f'bytes 0-7/{len(self.conteudo)}')
+        self.assertEqual(response['Content-Length'], '8')
+        self.assertEqual(b''.join(response.streaming_content), self.conteudo[:8])
+
+    def test_range_com_sufixo(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), self.conteudo[-5:])
+
+    def test_range_com_varios_intervalos(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=9-17, 0-3')
+        corpo = b''.join(response.streaming_content)
+        fronteira = response['Content-Type'].split('boundary=')[1]
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertTrue(response['Content-Type'].startswith('multipart/byteranges'))
+        self.assertEqual(int(response['Content-Length']), len(corpo))
+        self.assertIn(f'Content-Range: bytes 0-3/{len(self.conteudo)}\r\n\r\n'.encode() + self.conteudo[0:4], corpo)
+        self.assertIn(f'Content-Range: bytes 9-17/{len(self.conteudo)}\r\n\r\n'.encode() + self.conteudo[9:18], corpo)
+        self.assertTrue(corpo.endswith(f'--{fronteira}--\r\n'.encode()))
+
+    def test_range_fora_do_arquivo_retorna_416(self):
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.conteudo)}-')
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.conteudo)}')
+
+    def test_range_invalido_e_ignorado(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=5-2')
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), self.conteudo)
+
+    def test_if_range_de_outro_pdf_retorna_o_arquivo_inteiro(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-3', HTTP_IF_RANGE='"outro"')
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), self.conteudo)
+
+    def test_if_range_com_o_mesmo_pdf(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-3', HTTP_IF_RANGE=f'"{self.hash_pdf}"')
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+
+    def test_interpretar_range(self):
+        # Asserts
+        self.assertEqual(interpretar_range('bytes=0-4,3-9,20-', 30), [(0, 9), (20, 29)])
+        self.assertEqual(interpretar_range('bytes=-100', 30), [(0, 29)])
+        self.assertEqual(interpretar_range('bytes=40-50', 30), [])
+        self.assertIsNone(interpretar_range('items=0-4', 30))
+        self.assertIsNone(interpretar_range('bytes=--4', 30))
+        self.assertIsNone(interpretar_range('bytes=' + ','.join(['0-1'] * 20), 30))
+
+    @override_settings(HISTORICO_ENTREGA='x-accel-redirect')
+    def test_arquivo_ausente_nao_e_delegado_ao_proxy(self):
+        os.remove(self.historico.historico_pdf.path)
+
+        response = self.client.get(self.url)
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Accel-Redirect', response)
+
+
+class ExtracaoHistoricoTestCase(TestCase):
+    def setUp(self):
+        self.pdf_path = os.path.join(os.path.dirname(__file__), 'test_data', 'historico.pdf')
+
+    def test_extracao_paralela_igual_a_serial(self):
+        serial = extrair_linhas_do_pdf(self.pdf_path, processos=1)
+        paralela = extrair_linhas_do_pdf(self.pdf_path, processos=2)
+
+        # Asserts
+        self.assertEqual(paralela, serial)
+        self.assertEqual(len(interpretar_linhas(serial)), 29)
+
+    def test_backends_extraem_as_mesmas_linhas(self):
+        pdfium = extrair_linhas_do_pdf(self.pdf_path, processos=1, backend='pdfium')
+        pdfplumber = extrair_linhas_do_pdf(self.pdf_path, processos=1, backend='pdfplumber')
+
+        # Asserts
+        self.assertEqual(pdfium, pdfplumber)
+        self.assertEqual(interpretar_linhas(pdfium), interpretar_linhas(pdfplumber))
+
+    def test_pdfium_paralelo_igual_a_serial(self):
+        serial = extrair_linhas_do_pdf(self.pdf_path, processos=1, backend='pdfium')
+        paralela = extrair_linhas_do_pdf(self.pdf_path, processos=2, backend='pdfium')
+
+        # Asserts
+        self.assertEqual(paralela, serial)
+
+    @mock.patch.dict('api_aluno.utils.BACKENDS_DE_EXTRACAO', {'pdfium': lambda pdf_path, paginas=None: iter([[]])})
+    def test_recorre_ao_pdfplumber_sem_registros(self):
+        registros = extrair_registros_do_pdf(self.pdf_path, processos=1, backend='pdfium')
+
+        # Asserts
+        self.assertEqual(len(registros), 29)
+
+    def test_memoria_constante_no_numero_de_paginas(self):
+        with tempfile.TemporaryDirectory() as diretorio:
+            pdf_path = os.path.join(diretorio, 'sintetico.pdf')
+            gerar_pdf_ampliado(self.pdf_path, pdf_path, 40)
+
+            tracemalloc.start()
+            try:
+                total = sum(1 for _ in iterar_registros(iterar_linhas_do_pdf(pdf_path, processos=1, backend='pdfium')))
+                _, pico = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+        # Asserts
+        self.assertEqual(total, 40 * 29)
+        self.assertLess(pico, 1024 * 1024)
+
+    @mock.patch('pdfplumber.page.Page.close', autospec=True)
+    def test_pdfplumber_libera_cada_pagina(self, close):
+        # Páginas já liberadas quando cada linha é gerada
+        liberadas = [close.call_count for _ in iterar_linhas_do_pdf(self.pdf_path, processos=1, backend='pdfplumber')]
+
+        # Asserts
+        self.assertEqual(liberadas[0], 1)
+        self.assertEqual(liberadas[-1], contar_paginas(self.pdf_path))
+
+    def test_backend_desconhecido(self):
+        # Asserts
+        with self.assertRaises(ValueError):
+            extrair_linhas_do_pdf(self.pdf_path, processos=1, backend='inexistente')
+
+    def test_professores_continuam_na_pagina_seguinte(self):
+        linhas = [
+            "1411193 BANCO DE DADOS I Obrigatória 4 60 10,0 Aprovado 2023.1",
+            "Cláudio Elízio Calazans Campelo",
+            # Início da página seguinte
+            "Carga",
+            "Código Disciplina Tipo Créditos horária Média Situação Período",
+            "1411313 ANÁLISE DE SISTEMAS Obrigatória 4 60 - Em Curso 2024.1",
+            "Franklin De Souza Ramalho",
+            "Integralização curricular",
+        ]
+
+        registros = interpretar_linhas(linhas)
+
+        # Asserts
+        self.assertEqual([registro['codigo'] for registro in registros], ['1411193', '1411313'])
+        self.assertEqual(registros[0]['media'], 10.0)
+        self.assertEqual(registros[1]['situacao'], 'Em Curso')
+        self.assertIsNone(registros[1]['media'])
+
+
+class HistoricoSinteticoTestCase(TestCase):
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.diretorio.name, 'sintetico.pdf')
+        self.disciplinas = gerar_disciplinas(120, semente=1)
+        self.paginas = gerar_historico_sintetico(self.pdf_path, self.disciplinas)
+
+    def tearDown(self):
+        self.diretorio.cleanup()
+
+    def test_backends_interpretam_o_historico_gerado(self):
+        esperados = registros_esperados(self.disciplinas)
+
+        # Asserts
+        self.assertGreater(self.paginas, 1)
+        self.assertEqual({disciplina['situacao'] for disciplina in self.disciplinas}, {'Aprovado', 'Em Curso', 'Dispensa', 'Reprovado'})
+        self.assertIn('-', {disciplina['media'] for disciplina in self.disciplinas if disciplina['situacao'] == 'Aprovado'})
+        for backend in BACKENDS_DE_EXTRACAO:
+            self.assertEqual(extrair_registros_do_pdf(self.pdf_path, processos=1, backend=backend), esperados)
+
+    def test_professores_continuam_na_pagina_seguinte(self):
+        # Após o cabeçalho da tabela, alguma página começa pelos professores da disciplina anterior
+        paginas = list(BACKENDS_DE_EXTRACAO['pdfium'](self.pdf_path))
+
+        # Asserts
+        self.assertTrue(any(not pagina[2][0].isdigit() for pagina in paginas[1:]))
+
+
+class SalvarRegistrosTestCase(TestCase):
+    def setUp(self):
+        usuario = User.objects.create_user(username='joao.silva@example.com', email='joao.silva@example.com', password='senhaSegura')
+        aluno = Aluno.objects.create(matricula="123456789", nome="João da Silva", email="joao.silva@example.com", user=usuario)
+        self.historico = Historico_Academico.objects.create(aluno=aluno)
+        Disciplina.objects.create(codigo=1411311, nome='FUND DE MATEMÁTICA P/ C.DA COMPUTAÇÃO I')
+        Disciplina.objects.create(codigo=1411313, nome='ANÁLISE DE SISTEMAS')
+        self.registros = [
+            {'codigo': '1411311', 'tipo': 'Obrigatória', 'creditos': 4, 'media': 10.0, 'situacao': 'Aprovado', 'periodo': '2021.2'},
+            {'codigo': '9999999', 'tipo': 'Optativa', 'creditos': 4, 'media': 8.0, 'situacao': 'Aprovado', 'periodo': '2022.1'},
+            {'codigo': '1411313', 'tipo': 'Obrigatória', 'creditos': 4, 'media': None, 'situacao': 'Em Curso', 'periodo': '2024.1'},
+        ]
+
+    @mock.patch('api_aluno.utils.sincronizar_por_disciplina_desconhecida')
+    def test_disciplinas_desconhecidas_sao_reportadas(self, sincronizar):
+        desconhecidas = salvar_registros(self.historico, self.registros)
+
+        # Asserts
+        sincronizar.assert_called_once()
+        self.assertEqual(desconhecidas, [9999999])
+        self.assertEqual(Disciplina_Matriculada.objects.filter(historico=self.historico).count(), 2)
+        self.historico.refresh_from_db()
+        # Disciplinas desconhecidas não são gravadas e não entram no CRA
+        self.assertEqual(self.historico.cra, 10.0)
+        self.assertEqual(Disciplina_Matriculada.objects.get(historico=self.historico, disciplina_id=1411311).creditos, 4)
+
+    @mock.patch('api_aluno.utils.sincronizar_por_disciplina_desconhecida')
+    def test_disciplinas_conhecidas_nao_sincronizam(self, sincronizar):
+        desconhecidas = salvar_registros(self.historico, [self.registros[0], self.registros[2]])
+
+        # Asserts
+        sincronizar.assert_not_called()
+        self.assertEqual(desconhecidas, [])
+        self.assertEqual(Disciplina_Matriculada.objects.filter(historico=self.historico).count(), 2)
+
+    @mock.patch('api_aluno.utils.sincronizar_por_disciplina_desconhecida')
+    def test_reprocessamento_aplica_so_as_diferencas(self, sincronizar):
+        Disciplina.objects.create(codigo=1411314, nome='ENGENHARIA DE SOFTWARE')
+        salvar_registros(self.historico, [self.registros[0], self.registros[2]])
+        ids = dict(Disciplina_Matriculada.objects.filter(historico=self.historico).values_list('disciplina_id', 'id'))
+
+        concluida = dict(self.registros[2], media=9.5, situacao='Aprovado')
+        nova = {'codigo': '1411314', 'tipo': 'Obrigatória', 'creditos': 4, 'media': None, 'situacao': 'Em Curso', 'periodo': '2024.2'}
+        salvar_registros(self.historico, [concluida, nova])
+
+        # Asserts
+        matriculadas = {matriculada.disciplina_id: matriculada for matriculada in Disciplina_Matriculada.objects.filter(historico=self.historico)}
+        self.assertEqual(set(matriculadas), {1411313, 1411314})
+        self.assertEqual(matriculadas[1411313].id, ids[1411313])
+        self.assertEqual(matriculadas[1411313].situacao, 'Aprovado')
+        self.assertEqual(matriculadas[1411313].media, 9.5)
+        self.assertFalse(Disciplina_Matriculada.objects.filter(pk=ids[1411311]).exists())
+
+    @mock.patch('api_aluno.utils.sincronizar_por_disciplina_desconhecida')
+    def test_reprocessamento_identico_nao_altera_linhas(self, sincronizar):
+        salvar_registros(self.historico, self.registros)
+
+        # Asserts: disciplinas, disciplina desconhecida, bloqueio do histórico, disciplinas matriculadas,
+        # CRA (cálculo e leitura) e índices (duas agregações, remoção e inserção)
+        with self.assertNumQueries(12):
+            salvar_registros(self.historico, self.registros)
+
+
+class IndicesAcademicosTestCase(TestCase):
+    def setUp(self):
+        usuario = User.objects.create_user(username='joao.silva@example.com', email='joao.silva@example.com', password='senhaSegura')
+        aluno = Aluno.objects.create(matricula="123456789", nome="João da Silva", email="joao.silva@example.com", user=usuario)
+        self.historico = Historico_Academico.objects.create(aluno=aluno)
+        for codigo, creditos, media, periodo in [(1411311, 4, 10.0, '2021.2'), (1411174, 2, 7.0, '2021.2'), (1411313, 6, 8.0, '2022.1'), (1411314, 4, None, '2022.2')]:
+            disciplina = Disciplina.objects.create(codigo=codigo, nome=str(codigo))
+            Disciplina_Matriculada.objects.create(historico=self.historico, disciplina=disciplina, tipo='Obrigatória',
+                                                  creditos=creditos, media=media, situacao='Aprovado', periodo=periodo)
+
+    def test_recalcular_cra(self):
+        atualizados = recalcular_cra()
+
+        # Asserts
+        self.assertEqual(atualizados, 1)
+        self.historico.refresh_from_db()
+        self.assertEqual(self.historico.cra, 8.5)
+
+    def test_medias_por_periodo(self):
+        # Asserts
+        with self.assertNumQueries(1):
+            periodos = medias_por_periodo(self.historico)
+        self.assertEqual(periodos, [
+            {'periodo': '2021.2', 'media': 9.0, 'creditos': 6},
+            {'periodo': '2022.1', 'media': 8.0, 'creditos': 6},
+        ])
+
+    def test_atualizar_indices(self):
+        Disciplina_Matriculada.objects.filter(disciplina_id=1411314).update(situacao='Em Curso')
+
+        linhas = atualizar_indices([self.historico.pk])
+
+        # Asserts
+        self.assertEqual(linhas, 4)
+        indices = {indice.periodo: indice for indice in Indice_Historico.objects.filter(historico=self.historico)}
+        self.assertEqual(set(indices), {Indice_Historico.GERAL, '2021.2', '2022.1', '2022.2'})
+        geral = indices[Indice_Historico.GERAL]
+        self.assertEqual((geral.media, geral.creditos_cursados, geral.creditos_aprovados, geral.disciplinas, geral.em_curso), (8.5, 12, 12, 4, 1))
+        self.assertEqual((indices['2021.2'].media, indices['2021.2'].creditos_cursados), (9.0, 6))
+        self.assertIsNone(indices['2022.2'].media)
+        self.assertEqual(indices['2022.2'].em_curso, 1)
+
+    def test_atualizar_indices_substitui_linhas_antigas(self):
+        atualizar_indices()
+        Disciplina_Matriculada.objects.filter(periodo='2022.2').delete()
+
+        atualizar_indices([self.historico.pk])
+
+        # Asserts
+        self.assertFalse(Indice_Historico.objects.filter(historico=self.historico, periodo='2022.2').exists())
+        self.assertEqual(Indice_Historico.objects.get(historico=self.historico, periodo=Indice_Historico.GERAL).disciplinas, 3)
+
+    def test_comando_enfileira_historicos_sem_creditos(self):
+        Historico_Academico.objects.filter(pk=self.historico.pk).update(cra=8.3)
+        Disciplina_Matriculada.objects.filter(disciplina_id=1411174).update(creditos=None)
+
+        call_command('recalcular_indices', '--enfileirar-sem-creditos', stdout=StringIO())
+
+        # Asserts
+        self.historico.refresh_from_db()
+        self.assertEqual(self.historico.cra, 8.3)
+        self.assertEqual(Processamento_Historico.objects.filter(historico=self.historico, status=Processamento_Historico.NA_FILA).count(), 1)
+        self.assertFalse(Indice_Historico.objects.filter(historico=self.historico).exists())
+
+    def test_comando_mantem_cra_de_historico_sem_creditos(self):
+        Historico_Academico.objects.filter(pk=self.historico.pk).update(cra=8.3)
+        Disciplina_Matriculada.objects.filter(historico=self.historico).update(creditos=None)
+        usuario = User.objects.create_user(username='maria@example.com', email='maria@example.com', password='senhaSegura')
+        aluno = Aluno.objects.create(matricula="987654321", nome="Maria", email="maria@example.com", user=usuario)
+        completo = Historico_Academico.objects.create(aluno=aluno)
+        Disciplina_Matriculada.objects.create(historico=completo, disciplina_id=1411311, tipo='Obrigatória',
+                                              creditos=4, media=7.0, situacao='Aprovado', periodo='2021.2')
+
+        saida = StringIO()
+        call_command('recalcular_indices', stdout=saida)
+
+        # Asserts
+        self.historico.refresh_from_db()
+        completo.refresh_from_db()
+        self.assertEqual(self.historico.cra, 8.3)
+        self.assertEqual(completo.cra, 7.0)
+        self.assertIn('1 históricos recalculados', saida.getvalue())
+        self.assertIn('não foram recalculados', saida.getvalue())
+
+
 class InteresseNoProjetoTests(TestCase):
     def setUp(self):
         self.client = APIClient()
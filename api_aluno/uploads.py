@@ -0,0 +1,90 @@
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers, StopUpload
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+
+
+ASSINATURA_PDF = b'%PDF-'
+# Espaço para os cabeçalhos do multipart e os demais campos do formulário
+MARGEM_MULTIPART = 64 * 1024
+
+ERRO_TAMANHO = 'tamanho'
+ERRO_FORMATO = 'formato'
+
+
+class HistoricoUploadHandler(FileUploadHandler):
+    """
+    Recebe o campo historico_pdf direto em um arquivo temporário, calculando o SHA-256
+    (guardado em arquivo.sha256) e verificando o tamanho e a assinatura %PDF- à medida
+    que os blocos chegam. Um envio acima de HISTORICO_TAMANHO_MAXIMO ou que não começa
+    como um PDF é interrompido sem ler o resto do corpo, e o motivo fica em self.erro.
+    """
+
+    campo = 'historico_pdf'
+
+    def __init__(self, request=None, tamanho_maximo=None):
+        super().__init__(request)
+        self.tamanho_maximo = tamanho_maximo or settings.HISTORICO_TAMANHO_MAXIMO
+        self.erro = None
+        self.ativo = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length and content_length > self.tamanho_maximo + MARGEM_MULTIPART:
+            # O corpo nem chega a ser lido
+            self.erro = ERRO_TAMANHO
+            return QueryDict(encoding=encoding), MultiValueDict()
+        return None
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self.ativo = field_name == self.campo
+        if not self.ativo:
+            return
+        if self.content_length and self.content_length > self.tamanho_maximo:
+            self.interromper(ERRO_TAMANHO)
+
+        self.file = TemporaryUploadedFile(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+        self.sha256 = hashlib.sha256()
+        self.inicio = b''
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.ativo:
+            return raw_data
+
+        if start + len(raw_data) > self.tamanho_maximo:
+            self.interromper(ERRO_TAMANHO)
+        if len(self.inicio) < len(ASSINATURA_PDF):
+            self.inicio += raw_data[:len(ASSINATURA_PDF) - len(self.inicio)]
+            if not ASSINATURA_PDF.startswith(self.inicio):
+                self.interromper(ERRO_FORMATO)
+
+        self.sha256.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self.ativo:
+            return None
+        self.ativo = False
+        if self.inicio != ASSINATURA_PDF:
+            # Arquivo vazio ou menor que a assinatura
+            self.erro = ERRO_FORMATO
+            raise StopUpload()
+
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self.sha256.hexdigest()
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            self.file.close()
+
+    def interromper(self, erro):
+        self.erro = erro
+        # connection_reset: o restante do corpo não é lido
+        raise StopUpload(connection_reset=True)
@@ -8,7 +8,9 @@ from . import views
 
 urlpatterns = [
     path('cadastrar/', views.criar_aluno, name='criar_aluno'),
+    path('cadastrar/async/', views.criar_aluno_async, name='criar_aluno_async'),
     path('historico/importar/', views.upload_historico, name='upload_historico'),
+    path('historico/status/<int:id_processamento>/', views.status_processamento_historico, name='status_processamento_historico'),
     path('historico/<str:matricula>/', views.visualizar_historico, name='visualizar_historico'),
     path('interesse_projeto/<int:projeto_id>/', views.interessar_no_projeto, name='interessar_no_projeto'),
     path('retirar_interesse_projeto/<int:projeto_id>/', views.retirar_interessar_no_projeto, name='retirar_interesse_no_projeto'),
@@ -1,90 +1,368 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
 import pdfplumber
-from .models import Disciplina_Matriculada
+import pypdfium2 as pdfium
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .armazenamento import sha256_do_conteudo
+from .indices import atualizar_indices, expressao_cra
+from .models import Disciplina_Matriculada, Historico_Academico, Interpretacao_Historico
 from api_rest.models import Disciplina
+from api_rest.sincronizacao import sincronizar_por_disciplina_desconhecida
+
+
+# Incrementar sempre que interpretar_linhas passar a gerar registros diferentes
+# ou que as disciplinas matriculadas passarem a ser gravadas de outra forma
+VERSAO_DO_INTERPRETADOR = 2
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def obter_pool_de_extracao(processos):
+    # Os processos são reaproveitados entre históricos; um pool por quantidade de processos
+    with _pools_lock:
+        if processos not in _pools:
+            _pools[processos] = ProcessPoolExecutor(max_workers=processos)
+        return _pools[processos]
+
+
+def calcular_sha256(arquivo):
+    return sha256_do_conteudo(arquivo)
+
+
+def obter_registros_interpretados(hash_pdf):
+    """Registros que o worker já interpretou para o PDF com a versão corrente do interpretador, ou None."""
+    limite = timezone.now() - timedelta(seconds=settings.HISTORICO_CACHE_REGISTROS_TTL)
+    return Interpretacao_Historico.objects.filter(
+        hash_pdf=hash_pdf,
+        versao_interpretador=VERSAO_DO_INTERPRETADOR,
+        atualizado_em__gte=limite
+    ).values_list('registros', flat=True).first()
+
+
+def guardar_registros_interpretados(hash_pdf, registros):
+    Interpretacao_Historico.objects.update_or_create(
+        hash_pdf=hash_pdf,
+        versao_interpretador=VERSAO_DO_INTERPRETADOR,
+        defaults={'registros': registros}
+    )
+    # Descarta as interpretações expiradas e as de versões anteriores do interpretador
+    limite = timezone.now() - timedelta(seconds=settings.HISTORICO_CACHE_REGISTROS_TTL)
+    Interpretacao_Historico.objects.filter(
+        Q(atualizado_em__lt=limite) | Q(versao_interpretador__lt=VERSAO_DO_INTERPRETADOR)
+    ).delete()
+
+
+def _linhas_da_pagina_pdfium(pagina, tolerancia=3):
+    """
+    Reconstrói as linhas da página como o pdfplumber as extrai. O pdfium devolve o texto
+    na ordem do conteúdo do PDF, em que uma linha da tabela aparece partida (código e nome,
+    professores, demais colunas); os trechos são reagrupados pela altura e ordenados da
+    esquerda para a direita.
+    """
+    altura = pagina.get_height()
+    textpage = pagina.get_textpage()
+    try:
+        texto = textpage.get_text_range(0, textpage.count_chars(), force_this=True)
+
+        # Trecho: [topo, esquerda, caracteres]
+        trechos = []
+        atual = None
+        for indice, caractere in enumerate(texto):
+            if caractere in '\r\n':
+                atual = None
+                continue
+            if caractere.isspace():
+                if atual is not None:
+                    atual[2].append(' ')
+                continue
+
+            esquerda, _, _, topo = textpage.get_charbox(indice, loose=True)
+            topo = altura - topo
+            if atual is None or abs(topo - atual[0]) > tolerancia:
+                atual = [topo, esquerda, []]
+                trechos.append(atual)
+            atual[2].append(caractere)
+    finally:
+        textpage.close()
+
+    linhas = []
+    for trecho in sorted(trechos, key=lambda trecho: trecho[0]):
+        if linhas and trecho[0] - linhas[-1][0] <= tolerancia:
+            linhas[-1][1].append(trecho)
+        else:
+            linhas.append((trecho[0], [trecho]))
 
+    return [
+        ' '.join(''.join(trecho[2]).strip() for trecho in sorted(trechos_da_linha, key=lambda trecho: trecho[1]))
+        for _, trechos_da_linha in linhas
+    ]
 
-def extrair_disciplinas_do_pdf(historico_academico):
-    pdf_path = historico_academico.historico_pdf.path
-    total_creditos = 0
-    soma_pontuada = 0
 
-    with pdfplumber.open(pdf_path) as pdf:
+def _paginas_pdfium(pdf_path, paginas=None):
+    documento = pdfium.PdfDocument(pdf_path)
+    try:
+        for numero in paginas or range(1, len(documento) + 1):
+            pagina = documento[numero - 1]
+            try:
+                linhas = _linhas_da_pagina_pdfium(pagina)
+            finally:
+                pagina.close()
+            yield linhas
+    finally:
+        documento.close()
+
+
+def _paginas_pdfplumber(pdf_path, paginas=None):
+    with pdfplumber.open(pdf_path, pages=paginas) as pdf:
         for page in pdf.pages:
-            # Extrai as linhas de texto da página
-            lines = page.extract_text().splitlines()
-
-            disciplinas = []
-            i = 0
-            while i < len(lines):
-                line = lines[i].strip()
-
-                # Verifica se a linha contém a palavra "Aprovado" ou "Em Curso"
-                if "Aprovado" in line or "Em Curso" in line or "Dispensa" in line:
-                    partes = line.split()
-                    if len(partes) < 8:
-                        i += 1
-                        continue
-
-                    codigo = partes[0]
-                    periodo = partes[-1]
-                    situacao = " ".join(partes[-2:-1])
-
-                    aux = 0
-                    if situacao == "Curso":
-                        situacao = " ".join(partes[-3:-1])
-                        aux = -1
-
-                    nome = " ".join(partes[1:(-6 + aux)])
-                    tipo = partes[(-6 + aux)]
-
-                    try:
-                        creditos = int(partes[(-5 + aux)])
-                    except (ValueError, IndexError):
-                        creditos = 0  # Atribuir valor padrão para evitar null
-
-                    try:
-                        media_str = partes[(-3 + aux)]
-                        media_str = media_str.replace(',', '.')
-                        media = float(media_str)
-                    except ValueError:
-                        media = None
-
-                    nomes_professores = []
-                    i += 1
-
-                    while i < len(lines):
-                        line = lines[i].strip()
-
-                        if not line or line[0].isdigit():
-                            break
-
-                        if line == "Integralização curricular":
-                            break
-
-                        if line:
-                            nomes_professores.append(line)
-
-                        i += 1
-
-                    disciplina = Disciplina.objects.get(pk=codigo)
-                    disciplina_matriculada = Disciplina_Matriculada(
-                        historico=historico_academico,
-                        disciplina=disciplina,
-                        tipo=tipo,
-                        media=media,
-                        situacao=situacao,
-                        periodo=periodo
-                    )
-                    disciplina_matriculada.save()
-                    disciplinas.append(disciplina_matriculada)
-
-                    if media is not None and creditos is not None:
-                        total_creditos += creditos
-                        soma_pontuada += media * creditos
-                else:
-                    i += 1
-
-    if total_creditos > 0:
-        cra = round(soma_pontuada / total_creditos, 2)
-        historico_academico.cra = cra
-        historico_academico.save()
+            linhas = page.extract_text().splitlines()
+            # Libera os caracteres e objetos de leiaute que o pdfplumber mantém em cache na página
+            page.close()
+            yield linhas
+
+
+# Cada backend recebe o caminho do PDF e as páginas (numeradas a partir de 1, todas se None)
+# e gera as linhas de uma página por vez, liberando a página antes de passar à seguinte
+BACKENDS_DE_EXTRACAO = {
+    'pdfium': _paginas_pdfium,
+    'pdfplumber': _paginas_pdfplumber,
+}
+
+
+def extrair_linhas_das_paginas(pdf_path, paginas, backend):
+    # Executada nos processos do pool: cada processo abre o PDF e extrai só as suas páginas
+    return list(BACKENDS_DE_EXTRACAO[backend](pdf_path, paginas))
+
+
+def contar_paginas(pdf_path):
+    documento = pdfium.PdfDocument(pdf_path)
+    try:
+        return len(documento)
+    finally:
+        documento.close()
+
+
+def iterar_linhas_do_pdf(pdf_path, processos=None, backend=None):
+    """
+    Gera as linhas de texto de todas as páginas do PDF, em ordem, extraídas com o
+    backend indicado (padrão: HISTORICO_BACKEND_EXTRACAO). Na extração serial só uma
+    página fica em memória por vez; com mais de um processo, as páginas são divididas
+    em blocos contíguos extraídos em paralelo.
+    """
+    processos = processos or settings.HISTORICO_PROCESSOS_EXTRACAO
+    backend = backend or settings.HISTORICO_BACKEND_EXTRACAO
+    if backend not in BACKENDS_DE_EXTRACAO:
+        raise ValueError(f'Backend de extração desconhecido: {backend}')
+
+    total_paginas = contar_paginas(pdf_path)
+    if processos <= 1 or total_paginas <= 1:
+        for linhas in BACKENDS_DE_EXTRACAO[backend](pdf_path):
+            yield from linhas
+        return
+
+    tamanho_bloco = -(-total_paginas // processos)
+    blocos = [list(range(inicio, min(inicio + tamanho_bloco, total_paginas + 1)))
+              for inicio in range(1, total_paginas + 1, tamanho_bloco)]
+
+    pool = obter_pool_de_extracao(processos)
+    futuros = [pool.submit(extrair_linhas_das_paginas, pdf_path, bloco, backend) for bloco in blocos]
+    for futuro in futuros:
+        for linhas in futuro.result():
+            yield from linhas
+
+
+def extrair_linhas_do_pdf(pdf_path, processos=None, backend=None):
+    return list(iterar_linhas_do_pdf(pdf_path, processos, backend))
+
+
+def iterar_registros(linhas):
+    """
+    Interpreta as linhas do histórico, já concatenadas na ordem das páginas, e gera
+    os registros das disciplinas cursadas à medida que as linhas chegam. Como as páginas
+    são tratadas como um texto contínuo, professores de uma disciplina que continuam na
+    página seguinte não são confundidos com uma nova disciplina.
+    """
+    linhas = iter(linhas)
+    linha = next(linhas, None)
+    while linha is not None:
+        line = linha.strip()
+
+        # Verifica se a linha contém a palavra "Aprovado" ou "Em Curso"
+        if "Aprovado" not in line and "Em Curso" not in line and "Dispensa" not in line:
+            linha = next(linhas, None)
+            continue
+
+        partes = line.split()
+        if len(partes) < 8:
+            linha = next(linhas, None)
+            continue
+
+        codigo = partes[0]
+        periodo = partes[-1]
+        situacao = " ".join(partes[-2:-1])
+
+        aux = 0
+        if situacao == "Curso":
+            situacao = " ".join(partes[-3:-1])
+            aux = -1
+
+        tipo = partes[(-6 + aux)]
+
+        try:
+            creditos = int(partes[(-5 + aux)])
+        except (ValueError, IndexError):
+            creditos = 0  # Atribuir valor padrão para evitar null
+
+        try:
+            media_str = partes[(-3 + aux)]
+            media_str = media_str.replace(',', '.')
+            media = float(media_str)
+        except ValueError:
+            media = None
+
+        # Pula os nomes dos professores, que vêm nas linhas seguintes
+        linha = next(linhas, None)
+        while linha is not None:
+            line = linha.strip()
+
+            if not line or line[0].isdigit():
+                break
+
+            if line == "Integralização curricular":
+                break
+
+            linha = next(linhas, None)
+
+        yield {
+            'codigo': codigo,
+            'tipo': tipo,
+            'creditos': creditos,
+            'media': media,
+            'situacao': situacao,
+            'periodo': periodo
+        }
+
+
+def interpretar_linhas(lines):
+    return list(iterar_registros(lines))
+
+
+def extrair_registros_do_pdf(pdf_path, processos=None, backend=None):
+    """
+    Extrai e interpreta as disciplinas do PDF. Se o backend rápido não produzir nenhum
+    registro (um PDF com leiaute que ele não reconstrói), a extração é refeita com o pdfplumber.
+    """
+    backend = backend or settings.HISTORICO_BACKEND_EXTRACAO
+    registros = list(iterar_registros(iterar_linhas_do_pdf(pdf_path, processos, backend)))
+    if not registros and backend != 'pdfplumber':
+        registros = list(iterar_registros(iterar_linhas_do_pdf(pdf_path, processos, 'pdfplumber')))
+    return registros
+
+
+def extrair_disciplinas_do_pdf(historico_academico, processos=None):
+    """
+    Interpreta o PDF do histórico e grava as disciplinas matriculadas.
+    Retorna os códigos de disciplinas não cadastradas, que são ignorados.
+    """
+    hash_pdf = historico_academico.hash_pdf
+    registros = obter_registros_interpretados(hash_pdf) if hash_pdf else None
+    if registros is None:
+        registros = extrair_registros_do_pdf(historico_academico.historico_pdf.path, processos)
+        # Reenvios do mesmo PDF reaproveitam a interpretação sem abrir o arquivo
+        if hash_pdf:
+            guardar_registros_interpretados(hash_pdf, registros)
+
+    return salvar_registros(historico_academico, registros, hash_pdf=hash_pdf)
+
+
+def resolver_disciplinas(codigos, sincronizar=True):
+    """
+    Retorna as disciplinas dos códigos, indexadas pelo código, e os códigos desconhecidos.
+    Só uma disciplina desconhecida justifica consultar o Eureca durante o processamento;
+    fora do worker (sincronizar=False), o Eureca nunca é consultado.
+    """
+    codigos = {int(codigo) for codigo in codigos}
+    disciplinas = Disciplina.objects.in_bulk(codigos)
+
+    if sincronizar and len(disciplinas) < len(codigos):
+        sincronizar_por_disciplina_desconhecida()
+        disciplinas.update(Disciplina.objects.in_bulk(codigos - disciplinas.keys()))
+
+    return disciplinas, sorted(codigos - disciplinas.keys())
+
+
+class HistoricoSubstituido(Exception):
+    pass
+
+
+def salvar_registros(historico_academico, registros, sincronizar=True, hash_pdf=None):
+    """
+    Aplica ao histórico os registros interpretados e recalcula o CRA e os índices
+    (api_aluno.indices) em uma única transação.
+    Com hash_pdf, o do PDF interpretado, nada é gravado se o histórico já tiver recebido
+    outro PDF: HistoricoSubstituido é levantada e o processamento do novo PDF prevalece.
+    As disciplinas matriculadas são comparadas pela chave (disciplina, período): só as
+    novas são inseridas, só as alteradas são atualizadas e as ausentes do PDF são removidas,
+    mantendo os ids das demais. Registros de disciplinas desconhecidas não são gravados
+    (nem entram no CRA), e os seus códigos são retornados.
+    """
+    disciplinas, desconhecidas = resolver_disciplinas((registro['codigo'] for registro in registros), sincronizar)
+
+    interpretadas = {}
+    for registro in registros:
+        disciplina = disciplinas.get(int(registro['codigo']))
+        if disciplina is not None:
+            interpretadas[(disciplina.pk, registro['periodo'])] = registro
+
+    campos = ['tipo', 'creditos', 'media', 'situacao']
+    with transaction.atomic():
+        # Serializa processamentos concorrentes do mesmo histórico
+        atual = Historico_Academico.objects.select_for_update().only('pk', 'hash_pdf').get(pk=historico_academico.pk)
+        if hash_pdf is not None and atual.hash_pdf != hash_pdf:
+            raise HistoricoSubstituido(f'O histórico {atual.pk} recebeu outro PDF depois de interpretado')
+
+        alteradas = []
+        removidas = []
+        for matriculada in historico_academico.disciplinas_matriculadas.only('id', 'historico_id', 'disciplina_id', 'periodo', *campos):
+            registro = interpretadas.pop((matriculada.disciplina_id, matriculada.periodo), None)
+            if registro is None:
+                removidas.append(matriculada.pk)
+                continue
+            if any(getattr(matriculada, campo) != registro[campo] for campo in campos):
+                for campo in campos:
+                    setattr(matriculada, campo, registro[campo])
+                alteradas.append(matriculada)
+
+        novas = [
+            Disciplina_Matriculada(
+                historico=historico_academico,
+                disciplina_id=disciplina_id,
+                periodo=periodo,
+                **{campo: registro[campo] for campo in campos}
+            )
+            for (disciplina_id, periodo), registro in interpretadas.items()
+        ]
+
+        if removidas:
+            Disciplina_Matriculada.objects.filter(pk__in=removidas).delete()
+        if alteradas:
+            Disciplina_Matriculada.objects.bulk_update(alteradas, campos)
+        Disciplina_Matriculada.objects.bulk_create(novas)
+
+        # O CRA é calculado pelo banco a partir das disciplinas gravadas (ver api_aluno.indices)
+        Historico_Academico.objects.filter(pk=historico_academico.pk).update(
+            cra=expressao_cra(),
+            versao_interpretador=VERSAO_DO_INTERPRETADOR
+        )
+        historico_academico.cra = Historico_Academico.objects.values_list('cra', flat=True).get(pk=historico_academico.pk)
+        historico_academico.versao_interpretador = VERSAO_DO_INTERPRETADOR
+        atualizar_indices([historico_academico.pk])
+
+    return desconhecidas
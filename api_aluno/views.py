@@ -1,24 +1,32 @@
 import os
 from django.http import JsonResponse
+from django.contrib.auth.hashers import make_password
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
 from django.utils import timezone
+from django.urls import reverse
 
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework import status
+
+from api_rest.senhas import executar_hashing, FilaDeHashingCheia, resposta_fila_cheia
+from api_rest.utils import ler_dados_requisicao
 from django.http import FileResponse
 from django.conf import settings
 from rest_framework.permissions import IsAuthenticated
 
-from .utils import extrair_disciplinas_do_pdf
-from api_rest.utils import atualizar_disciplinas
+from .entrega import resposta_do_historico
+from .processamento import registrar_historico
+from .uploads import HistoricoUploadHandler, ERRO_TAMANHO
 from .models import *
 from .serializers import *
 from api_projeto.models import Projeto, Associacao
 from api_rest.models import *
-from django.http import StreamingHttpResponse
 
 
 @api_view(['POST'])
@@ -35,12 +43,29 @@ def criar_aluno(request):
     return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
+@csrf_exempt
+@require_POST
+async def criar_aluno_async(request):
+    serializer = AlunoPostSerializer(data=ler_dados_requisicao(request), context={})
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        serializer.context['senha_hash'] = await executar_hashing(make_password, serializer.validated_data['senha'])
+    except FilaDeHashingCheia:
+        return resposta_fila_cheia()
+
+    aluno = await sync_to_async(serializer.save)()
+    response_serializer = AlunoSerializer(aluno)
+
+    return JsonResponse(response_serializer.data, status=status.HTTP_201_CREATED)
+
+
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
 def editar_perfil_aluno(request):
-    try:
-        aluno = Aluno.objects.get(user=request.user)
-    except Aluno.DoesNotExist:
+    aluno = request.aluno
+    if not aluno:
         return Response(status=status.HTTP_404_NOT_FOUND)
 
     nome = request.data.get('nome')
@@ -81,11 +106,11 @@ def visualizar_perfil_aluno(request, matricula):
     except Aluno.DoesNotExist:
         return Response({'detail': 'Aluno não encontrado'}, status=status.HTTP_404_NOT_FOUND)
 
-    if hasattr(user, 'professor'):
+    if request.professor:
         serializer = AlunoPerfilProfessorSerializer(aluno)
         return Response(serializer.data)
 
-    if user == aluno.user:
+    if user.id == aluno.user_id:
         serializer = AlunoPerfilSerializer(aluno)
         return Response(serializer.data)
 
@@ -118,31 +143,48 @@ def get_by_matricula_aluno(request, matricula):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def upload_historico(request):
-    try:
-        aluno_autenticado = Aluno.objects.get(user=request.user)
-    except Aluno.DoesNotExist:
+    aluno_autenticado = request.aluno
+    if not aluno_autenticado:
         return Response({"detail": "Acesso negado. Apenas alunos podem cadastrar históricos."}, status=status.HTTP_403_FORBIDDEN)
 
+    # Recebe o PDF em disco já calculando o hash; o envio é interrompido se não for um PDF ou for grande demais
+    handler = HistoricoUploadHandler(request)
+    request.upload_handlers.insert(0, handler)
     historico_pdf = request.FILES.get('historico_pdf')
 
+    if handler.erro == ERRO_TAMANHO:
+        limite = settings.HISTORICO_TAMANHO_MAXIMO // (1024 * 1024)
+        return Response({"detail": f"O histórico deve ter no máximo {limite} MB."}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    if handler.erro:
+        return Response({"detail": "O arquivo enviado não é um PDF."}, status=status.HTTP_400_BAD_REQUEST)
     if not historico_pdf or not historico_pdf.size:
         return Response(status=status.HTTP_400_BAD_REQUEST)
     try:
-        historico_antigo = Historico_Academico.objects.filter(aluno=aluno_autenticado).first()
-        if historico_antigo:
-            historico_antigo.delete()
-
-        novo_historico = Historico_Academico.objects.create(
-            aluno=aluno_autenticado,
-            historico_pdf=historico_pdf
-        )
-        atualizar_disciplinas()
-        extrair_disciplinas_do_pdf(novo_historico)
-
-        return Response(status=status.HTTP_200_OK)
+        processamento, reaproveitado = registrar_historico(aluno_autenticado.matricula, historico_pdf)
     except Exception:
         return Response(status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    serializer = ProcessamentoHistoricoSerializer(processamento)
+    url_status = reverse('status_processamento_historico', kwargs={'id_processamento': processamento.id})
+    codigo = status.HTTP_200_OK if processamento.status == Processamento_Historico.CONCLUIDO else status.HTTP_202_ACCEPTED
+    return Response(dict(serializer.data, reaproveitado=reaproveitado), status=codigo, headers={'Location': url_status})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def status_processamento_historico(request, id_processamento):
+    try:
+        processamento = Processamento_Historico.objects.select_related('historico').get(pk=id_processamento)
+    except Processamento_Historico.DoesNotExist:
+        return Response({"detail": "Processamento não encontrado."}, status=status.HTTP_404_NOT_FOUND)
+
+    aluno_autenticado = request.aluno
+    if not aluno_autenticado or processamento.historico.aluno_id != aluno_autenticado.matricula:
+        return Response({"detail": "Acesso não autorizado"}, status=status.HTTP_403_FORBIDDEN)
+
+    serializer = ProcessamentoHistoricoSerializer(processamento)
+    return Response(serializer.data)
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -150,23 +192,14 @@ def visualizar_historico(request, matricula):
     try:
         aluno = Aluno.objects.get(pk=matricula)
 
-        if request.user != aluno.user and not hasattr(request.user, 'professor'):
+        if request.user.id != aluno.user_id and not request.professor:
             return Response(status=status.HTTP_403_FORBIDDEN)
         try:    
             historico = Historico_Academico.objects.get(aluno=aluno)
             if not historico.historico_pdf:
                 return Response(status=status.HTTP_200_OK)
 
-            pdf_path = historico.historico_pdf.path
-
-            def file_iterator(file_path, chunk_size=512):
-                with open(file_path, 'rb') as pdf_file:
-                    while chunk := pdf_file.read(chunk_size):
-                        yield chunk
-
-            response = StreamingHttpResponse(file_iterator(pdf_path), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="{os.path.basename(pdf_path)}"'
-            return response
+            return resposta_do_historico(request, historico)
         
         except (Historico_Academico.DoesNotExist, FileNotFoundError):
             return Response(status=status.HTTP_200_OK)
@@ -181,9 +214,8 @@ def visualizar_historico(request, matricula):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def interessar_no_projeto(request, projeto_id):
-    try:
-        aluno_autenticado = Aluno.objects.get(user=request.user)
-    except Aluno.DoesNotExist:
+    aluno_autenticado = request.aluno
+    if not aluno_autenticado:
         return Response({"detail": "Acesso negado. Apenas alunos podem se associar a projetos."}, status=status.HTTP_403_FORBIDDEN)
 
     try:
@@ -205,9 +237,8 @@ def interessar_no_projeto(request, projeto_id):
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def retirar_interessar_no_projeto(request, projeto_id):
-    try:
-        aluno_autenticado = Aluno.objects.get(user=request.user)
-    except Aluno.DoesNotExist:
+    aluno_autenticado = request.aluno
+    if not aluno_autenticado:
         return Response({"detail": "Acesso negado. Apenas alunos podem se associar a projetos."}, status=status.HTTP_403_FORBIDDEN)
 
     try:
@@ -3,8 +3,9 @@ from rest_framework import serializers
 from .models import Professor
 from api_aluno.models import Avaliacao
 from django.contrib.auth.models import User
+from api_rest.senhas import criar_usuario
 from api_rest.models import Feedback
-from api_rest.serializers import FeedbackSerializer
+from api_rest.serializers import FeedbackSerializer, CatalogoRelatedField
 
 
 class ProfessorSerializer(serializers.ModelSerializer):
@@ -22,11 +23,7 @@ class ProfessorPostSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         senha = validated_data.pop('senha')
-        usuario = User.objects.create_user(
-            username=validated_data['email'],
-            email=validated_data['email'],
-            password=senha
-        )
+        usuario = criar_usuario(validated_data['email'], senha, self.context.get('senha_hash'))
         professor = Professor.objects.create(user=usuario, **validated_data)
         return professor
 
@@ -40,7 +37,7 @@ class AvaliacaoSerializer(serializers.ModelSerializer):
 
 
 class AvaliacaoSemIdSerializer(serializers.ModelSerializer):
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = CatalogoRelatedField(
         many=True,
         queryset=Feedback.objects.all(),
         required=False
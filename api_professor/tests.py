@@ -101,6 +101,20 @@ class CriarProfessorViewTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
+    def test_criar_professor_async_sucesso(self):
+        response = self.client.post(reverse('criar_professor_async'), self.professor_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['nome'], self.professor_data['nome'])
+        self.assertEqual(response.json()['email'], self.professor_data['email'])
+        professor = Professor.objects.get(email=self.professor_data['email'])
+        self.assertTrue(professor.user.check_password(self.professor_data['senha']))
+
+    def test_criar_professor_async_com_email_repetido(self):
+        self.client.post(self.url, self.professor_data, format='json')
+        response = self.client.post(reverse('criar_professor_async'), self.professor_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', response.json())
+
 class GetAllProfessorViewTestCase(APITestCase):
     def setUp(self):
         self.client = APIClient()
@@ -7,6 +7,7 @@ from . import views
 urlpatterns = [
     path('', views.get_professores, name='get_all_professores'),
     path('cadastrar/', views.criar_professor, name='criar_professor'),
+    path('cadastrar/async/', views.criar_professor_async, name='criar_professor_async'),
     path('<int:id_professor>/', views.get_by_id_professor, name='get_by_id_professor'),
     path('avaliar/<str:id_aluno>/', views.criar_avaliacao, name='criar_avaliacao'),
     path('retirar_avaliacao/<int:id_avaliacao>/', views.deletar_avaliacao, name='deletar_avaliacao'),
@@ -1,4 +1,8 @@
 from django.http import JsonResponse
+from django.contrib.auth.hashers import make_password
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
 from django.utils import timezone
 
@@ -8,6 +12,9 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework import status
 
+from api_rest.senhas import executar_hashing, FilaDeHashingCheia, resposta_fila_cheia
+from api_rest.utils import ler_dados_requisicao
+
 from .models import *
 from .serializers import *
 from api_aluno.models import Aluno, Avaliacao
@@ -27,6 +34,24 @@ def criar_professor(request):
     return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
+@csrf_exempt
+@require_POST
+async def criar_professor_async(request):
+    serializer = ProfessorPostSerializer(data=ler_dados_requisicao(request), context={})
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        serializer.context['senha_hash'] = await executar_hashing(make_password, serializer.validated_data['senha'])
+    except FilaDeHashingCheia:
+        return resposta_fila_cheia()
+
+    professor = await sync_to_async(serializer.save)()
+    response_serializer = ProfessorSerializer(professor)
+
+    return JsonResponse(response_serializer.data, status=status.HTTP_201_CREATED)
+
+
 @api_view(['GET'])
 def get_professores(request):
     if request.method == 'GET':
@@ -53,9 +78,8 @@ def get_by_id_professor(request, id_professor):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def criar_avaliacao(request, id_aluno):
-    try:
-        professor_autenticado = Professor.objects.get(user=request.user)
-    except Professor.DoesNotExist:
+    professor_autenticado = request.professor
+    if not professor_autenticado:
         return Response({"detail": "Acesso negado. Apenas professores podem criar avaliações."}, status=status.HTTP_403_FORBIDDEN)
 
     if request.method == 'POST':
@@ -86,9 +110,8 @@ def criar_avaliacao(request, id_aluno):
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def deletar_avaliacao(request, id_avaliacao):
-    try:
-        professor_autenticado = Professor.objects.get(user=request.user)
-    except Professor.DoesNotExist:
+    professor_autenticado = request.professor
+    if not professor_autenticado:
         return Response({"detail": "Acesso negado. Apenas o dono da avaliação pode deletá-la."}, status=status.HTTP_403_FORBIDDEN)
 
     try:
@@ -96,8 +119,7 @@ def deletar_avaliacao(request, id_avaliacao):
     except Avaliacao.DoesNotExist:
         return Response({"detail": "Avaliação não encontrada."}, status=status.HTTP_404_NOT_FOUND)
 
-    dados = AvaliacaoSerializer(avaliacao).data
-    if dados['id_professor'] != professor_autenticado.id:
+    if avaliacao.id_professor_id != professor_autenticado.id:
         return Response({"detail": "Você não tem permissão para deletar esta avaliação."}, status=status.HTTP_403_FORBIDDEN)
 
     avaliacao.delete()
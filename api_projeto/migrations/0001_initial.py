@@ -0,0 +1,68 @@
+# Generated by Django 5.0.8 on 2026-10-18 17:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('api_aluno', '0001_initial'),
+        ('api_professor', '0001_initial'),
+        ('api_rest', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Projeto',
+            fields=[
+                ('id_projeto', models.AutoField(primary_key=True, serialize=False)),
+                ('nome', models.TextField()),
+                ('descricao', models.TextField(null=True)),
+                ('laboratorio', models.TextField(null=True)),
+                ('vagas', models.IntegerField(null=True)),
+                ('data_de_criacao', models.DateTimeField(default=django.utils.timezone.now)),
+                ('encerrado', models.BooleanField(default=False)),
+                ('habilidades', models.ManyToManyField(blank=True, related_name='habilidades_desejadas', to='api_rest.habilidade')),
+                ('responsavel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api_professor.professor')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Lista_Filtragem',
+            fields=[
+                ('id_lista', models.AutoField(primary_key=True, serialize=False)),
+                ('titulo', models.TextField()),
+                ('filtro_disciplinas', models.JSONField(blank=True)),
+                ('filtro_cra', models.FloatField(null=True)),
+                ('filtro_experiencias', models.ManyToManyField(blank=True, related_name='filtros', to='api_rest.experiencia')),
+                ('filtro_habilidades', models.ManyToManyField(blank=True, related_name='filtros', to='api_rest.habilidade')),
+                ('filtro_interesses', models.ManyToManyField(blank=True, related_name='filtros', to='api_rest.interesse')),
+                ('id_professor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api_professor.professor')),
+                ('id_projeto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api_projeto.projeto')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Colaborador',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('professor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api_professor.professor')),
+                ('projeto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='colaboradores', to='api_projeto.projeto')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Associacao',
+            fields=[
+                ('id_associacao', models.AutoField(primary_key=True, serialize=False)),
+                ('status', models.BooleanField(null=True)),
+                ('aluno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api_aluno.aluno')),
+                ('projeto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api_projeto.projeto')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='associacao',
+            constraint=models.UniqueConstraint(fields=('projeto', 'aluno'), name='unique_projeto_aluno'),
+        ),
+    ]
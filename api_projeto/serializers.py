@@ -4,11 +4,11 @@ from .models import Projeto, Lista_Filtragem, Associacao, Colaborador
 from api_rest.models import Habilidade, Experiencia, Interesse
 from api_professor.serializers import ProfessorSerializer
 from api_aluno.serializers import AlunoInformacoesSerializer, AlunoDadosSerializer
-from api_rest.serializers import HabilidadeSerializer, ExperienciaSerializer, FeedbackSerializer, InteresseSerializer
+from api_rest.serializers import HabilidadeSerializer, ExperienciaSerializer, FeedbackSerializer, InteresseSerializer, CatalogoRelatedField
 
 
 class ProjetoSemIdSerializer(serializers.ModelSerializer):
-    habilidades = serializers.PrimaryKeyRelatedField(many=True, queryset=Habilidade.objects.all(), required=False)
+    habilidades = CatalogoRelatedField(many=True, queryset=Habilidade.objects.all(), required=False)
 
     class Meta:
         model = Projeto
@@ -16,7 +16,7 @@ class ProjetoSemIdSerializer(serializers.ModelSerializer):
 
 
 class ProjetoInformacoesSerializer(serializers.ModelSerializer):
-    habilidades = serializers.PrimaryKeyRelatedField(many=True, queryset=Habilidade.objects.all(), required=False)
+    habilidades = CatalogoRelatedField(many=True, queryset=Habilidade.objects.all(), required=False)
 
     class Meta:
         model = Projeto
@@ -24,9 +24,9 @@ class ProjetoInformacoesSerializer(serializers.ModelSerializer):
 
 
 class ListaFiltragemPostSerializer(serializers.ModelSerializer):
-    filtro_habilidades = serializers.PrimaryKeyRelatedField(many=True, queryset=Habilidade.objects.all(), required=False)
-    filtro_experiencias = serializers.PrimaryKeyRelatedField(many=True, queryset=Experiencia.objects.all(), required=False)
-    filtro_interesses = serializers.PrimaryKeyRelatedField(many=True, queryset=Interesse.objects.all(), required=False)
+    filtro_habilidades = CatalogoRelatedField(many=True, queryset=Habilidade.objects.all(), required=False)
+    filtro_experiencias = CatalogoRelatedField(many=True, queryset=Experiencia.objects.all(), required=False)
+    filtro_interesses = CatalogoRelatedField(many=True, queryset=Interesse.objects.all(), required=False)
     filtro_disciplinas = serializers.JSONField(required=False)
     filtro_cra = serializers.FloatField(required=False)
 
@@ -57,9 +57,9 @@ class ListaFiltragemPostSerializer(serializers.ModelSerializer):
 
 
 class ListaFiltragemPutSerializer(serializers.ModelSerializer):
-    filtro_habilidades = serializers.PrimaryKeyRelatedField(many=True, queryset=Habilidade.objects.all(), required=False)
-    filtro_experiencias = serializers.PrimaryKeyRelatedField(many=True, queryset=Experiencia.objects.all(), required=False)
-    filtro_interesses = serializers.PrimaryKeyRelatedField(many=True, queryset=Interesse.objects.all(), required=False)
+    filtro_habilidades = CatalogoRelatedField(many=True, queryset=Habilidade.objects.all(), required=False)
+    filtro_experiencias = CatalogoRelatedField(many=True, queryset=Experiencia.objects.all(), required=False)
+    filtro_interesses = CatalogoRelatedField(many=True, queryset=Interesse.objects.all(), required=False)
     filtro_disciplinas = serializers.JSONField(required=False)
     filtro_cra = serializers.FloatField(required=False)
 
@@ -90,9 +90,9 @@ class ListaFiltragemPutSerializer(serializers.ModelSerializer):
 
 
 class ListaFiltragemSemIdSerializer(serializers.ModelSerializer):
-    filtro_habilidades = serializers.PrimaryKeyRelatedField(many=True, queryset=Habilidade.objects.all(), required=False)
-    filtro_experiencias = serializers.PrimaryKeyRelatedField(many=True, queryset=Experiencia.objects.all(), required=False)
-    filtro_interesses = serializers.PrimaryKeyRelatedField(many=True, queryset=Interesse.objects.all(), required=False)
+    filtro_habilidades = CatalogoRelatedField(many=True, queryset=Habilidade.objects.all(), required=False)
+    filtro_experiencias = CatalogoRelatedField(many=True, queryset=Experiencia.objects.all(), required=False)
+    filtro_interesses = CatalogoRelatedField(many=True, queryset=Interesse.objects.all(), required=False)
     filtro_disciplinas = serializers.JSONField(required=False)
     filtro_cra = serializers.FloatField(required=False)
 
@@ -12,11 +12,14 @@ from django.test import TestCase
 from django.utils import timezone
 from datetime import datetime
 from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from api_projeto.models import Projeto, Associacao, Colaborador
 from api_professor.models import Professor
-from api_aluno.models import Aluno
+from api_aluno.models import Aluno, Historico_Academico, Indice_Historico
 from api_projeto.views import *
+from api_rest.authentication import RefreshTokenComPapel
 
 from io import StringIO
 import pytz
@@ -1227,3 +1230,143 @@ class AbrirProjetoTest(APITestCase):
         response = self.client.post(url_invalido, format='json')
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PapelDoUsuarioConsultasTest(APITestCase):
+    """
+    Com o papel nas claims do token, nenhuma requisição consulta User, Professor ou Aluno
+    para identificar quem está autenticado.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        usuario_professor = User.objects.create_user(
+            username='fabio@example.com',
+            email='fabio@example.com',
+            password='1234'
+        )
+        self.professor = Professor.objects.create(nome="Fabio", email="fabio@example.com", user=usuario_professor)
+        usuario_aluno = User.objects.create_user(
+            username='maria@example.com',
+            email='maria@example.com',
+            password='1234'
+        )
+        self.aluno = Aluno.objects.create(matricula='121210210', nome='Maria', email='maria@example.com', user=usuario_aluno)
+        self.projeto = Projeto.objects.create(nome='Projeto', responsavel=self.professor)
+        self.lista = Lista_Filtragem.objects.create(
+            id_projeto=self.projeto,
+            id_professor=self.professor,
+            titulo='Lista',
+            filtro_disciplinas=[],
+            filtro_cra=7.5
+        )
+        self.token_professor = RefreshTokenComPapel.for_user(usuario_professor).access_token
+        self.token_aluno = RefreshTokenComPapel.for_user(usuario_aluno).access_token
+
+    def autenticar(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_get_by_id_projeto_como_aluno(self):
+        self.autenticar(self.token_aluno)
+        # projeto, responsavel, habilidades, colaboradores, associação do aluno e contagem
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('get_by_id_projeto', kwargs={'id_projeto': self.projeto.id_projeto}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_get_by_id_projeto_como_responsavel(self):
+        self.autenticar(self.token_professor)
+        # projeto, responsavel, habilidades, colaboradores, listas e candidatos
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('get_by_id_projeto', kwargs={'id_projeto': self.projeto.id_projeto}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('candidatos', response.data)
+
+    def test_get_lista_by_id(self):
+        self.autenticar(self.token_professor)
+        # lista e os três filtros de tags
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('get_lista_by_id', kwargs={'id_lista': self.lista.id_lista}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_get_lista_by_id_como_aluno(self):
+        self.autenticar(self.token_aluno)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('get_lista_by_id', kwargs={'id_lista': self.lista.id_lista}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_encerrar_projeto_sem_permissao(self):
+        outro_usuario = User.objects.create_user(username='ana@example.com', email='ana@example.com', password='1234')
+        Professor.objects.create(nome="Ana", email="ana@example.com", user=outro_usuario)
+        self.autenticar(RefreshTokenComPapel.for_user(outro_usuario).access_token)
+        # apenas o projeto
+        with self.assertNumQueries(1):
+            response = self.client.post(reverse('encerrar_projeto', kwargs={'id_projeto': self.projeto.id_projeto}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_get_all_projetos_by_aluno(self):
+        self.autenticar(self.token_aluno)
+        # associações do aluno (nenhuma)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('get_all_projetos_by_aluno'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_token_sem_claims_resolve_papel_em_uma_consulta(self):
+        self.autenticar(RefreshToken.for_user(self.aluno.user).access_token)
+        # usuário, papel (professor e aluno juntos) e associações do aluno
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('get_all_projetos_by_aluno'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class CandidatosComIndicesTest(APITestCase):
+    def setUp(self):
+        usuario_professor = User.objects.create_user(username='fabio@example.com', email='fabio@example.com', password='1234')
+        self.professor = Professor.objects.create(nome="Fabio", email="fabio@example.com", user=usuario_professor)
+        self.projeto = Projeto.objects.create(nome='Projeto', responsavel=self.professor)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshTokenComPapel.for_user(usuario_professor).access_token}')
+        self.url = reverse('get_by_id_projeto', kwargs={'id_projeto': self.projeto.id_projeto})
+
+    def inscrever(self, quantidade):
+        for indice in range(quantidade):
+            matricula = f'1212100{Associacao.objects.count():02d}'
+            usuario = User.objects.create_user(username=f'{matricula}@example.com', email=f'{matricula}@example.com', password='1234')
+            aluno = Aluno.objects.create(matricula=matricula, nome='Aluno', email=f'{matricula}@example.com', user=usuario)
+            historico = Historico_Academico.objects.create(aluno=aluno, cra=8.5)
+            Indice_Historico.objects.create(historico=historico, periodo=Indice_Historico.GERAL, media=8.5, creditos_cursados=12, creditos_aprovados=12, disciplinas=4, em_curso=1)
+            Indice_Historico.objects.create(historico=historico, periodo='2021.2', media=9.0, creditos_cursados=6, creditos_aprovados=6, disciplinas=2)
+            Associacao.objects.create(projeto=self.projeto, aluno=aluno)
+
+    def test_resumo_traz_indices_sem_disciplinas(self):
+        self.inscrever(1)
+
+        response = self.client.get(self.url, {'resumo': '1'})
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        candidato = response.data['candidatos'][0]['aluno']
+        self.assertNotIn('disciplinas_matriculadas', candidato)
+        self.assertEqual(candidato['indices']['geral']['media'], 8.5)
+        self.assertEqual(candidato['indices']['geral']['em_curso'], 1)
+        self.assertEqual([periodo['periodo'] for periodo in candidato['indices']['periodos']], ['2021.2'])
+
+    def test_sem_resumo_mantem_disciplinas(self):
+        self.inscrever(1)
+
+        response = self.client.get(self.url)
+
+        # Asserts
+        candidato = response.data['candidatos'][0]['aluno']
+        self.assertEqual(candidato['disciplinas_matriculadas'], [])
+        self.assertEqual(candidato['indices']['geral']['creditos_cursados'], 12)
+
+    def test_consultas_nao_crescem_com_os_candidatos(self):
+        self.inscrever(1)
+        with CaptureQueriesContext(connection) as um_candidato:
+            self.client.get(self.url, {'resumo': '1'})
+
+        self.inscrever(3)
+        with CaptureQueriesContext(connection) as quatro_candidatos:
+            self.client.get(self.url, {'resumo': '1'})
+
+        # Asserts
+        self.assertEqual(len(quatro_candidatos), len(um_candidato))
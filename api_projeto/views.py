@@ -21,9 +21,8 @@ import csv
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def criar_projeto(request):
-    try:
-        professor_autenticado = Professor.objects.get(user=request.user)
-    except Professor.DoesNotExist:
+    professor = request.professor
+    if not professor:
         return Response({"detail": "Acesso negado. Apenas professores podem criar projetos."}, status=status.HTTP_403_FORBIDDEN)
 
     if request.method == 'POST':
@@ -32,7 +31,7 @@ def criar_projeto(request):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         data = request.data.copy()
-        data['responsavel'] = professor_autenticado.id
+        data['responsavel'] = professor.id
 
         data['data_de_criacao'] = timezone.now()
 
@@ -50,9 +49,8 @@ def criar_projeto(request):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def criar_projeto_csv(request):
-    try:
-        professor_autenticado = Professor.objects.get(user=request.user)
-    except Professor.DoesNotExist:
+    professor = request.professor
+    if not professor:
         return Response({"detail": "Acesso negado. Apenas professores podem criar projetos."}, status=status.HTTP_403_FORBIDDEN)
 
     if 'file' not in request.data:
@@ -77,7 +75,7 @@ def criar_projeto_csv(request):
     projeto = Projeto.objects.create(
         nome="Projeto Novo",
         data_de_criacao=timezone.now(),
-        responsavel=professor_autenticado
+        responsavel_id=professor.id
     )
     matricula_inexistente = []
 
@@ -102,28 +100,27 @@ def get_by_id_projeto(request, id_projeto):
             serializer = ProjetoSerializer(projeto)
         except Projeto.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
-        try:
-            professor = Professor.objects.get(user=request.user)
-        except Professor.DoesNotExist:
-            professor = None
-
-        try:
-            aluno = Aluno.objects.get(user=request.user)
-        except Aluno.DoesNotExist:
-            aluno = None
+        professor = request.professor
+        aluno = request.aluno
 
         data = serializer.data
         associacoes = Associacao.objects.filter(projeto=projeto)
-        colaborador = Colaborador.objects.filter(projeto=projeto, professor=professor)
-        if professor and (projeto.responsavel == professor or colaborador.exists()):
+        if professor and (projeto.responsavel_id == professor.id or Colaborador.objects.filter(projeto=projeto, professor_id=professor.id).exists()):
             listas_de_filtros = Lista_Filtragem.objects.filter(id_projeto=projeto)
             data['listas_com_filtros'] = ListaFiltragemInfoSerializer(listas_de_filtros, many=True).data
 
-            data['candidatos'] = AssociacaoCompletaSerializer(associacoes, many=True).data
+            # Com ?resumo=1, cada candidato traz só os índices do histórico, sem as disciplinas cursadas
+            resumo = request.query_params.get('resumo') in ('1', 'true', 'True')
+            relacionados = ['aluno__habilidades', 'aluno__experiencias', 'aluno__interesses', 'aluno__historicos__indices']
+            if not resumo:
+                relacionados.append('aluno__historicos__disciplinas_matriculadas__disciplina')
+            # Reatribuído para que a contagem de inscritos abaixo use as associações já carregadas
+            associacoes = associacoes.select_related('aluno').prefetch_related(*relacionados)
+            data['candidatos'] = AssociacaoCompletaSerializer(associacoes, many=True, context={'resumo': resumo}).data
 
         if aluno:
             try:
-                associacao = Associacao.objects.get(projeto=projeto, aluno=aluno)
+                associacao = Associacao.objects.get(projeto=projeto, aluno_id=aluno.matricula)
                 data['status'] = associacao.status
             except Associacao.DoesNotExist:
                 None
@@ -165,13 +162,12 @@ def get_all_projetos_by_professor(request):
 @permission_classes([IsAuthenticated])
 def get_all_projetos_by_aluno(request):
     if request.method == 'GET':
-        try:
-            aluno_autenticado = Aluno.objects.get(user=request.user)
-        except Aluno.DoesNotExist:
+        aluno = request.aluno
+        if not aluno:
             return Response({"detail": "Acesso negado. Apenas alunos podem ver seus próprios projetos inscritos."},
                             status=status.HTTP_403_FORBIDDEN)
 
-        associacoes = Associacao.objects.filter(aluno=aluno_autenticado.matricula)
+        associacoes = Associacao.objects.filter(aluno=aluno.matricula)
         projetos_com_status = []
         for associacao in associacoes:
             try:
@@ -190,9 +186,8 @@ def get_all_projetos_by_aluno(request):
 @api_view(['PUT', 'PATCH'])
 @permission_classes([IsAuthenticated])
 def editar_projeto(request, id_projeto):
-    try:
-        professor_autenticado = Professor.objects.get(user=request.user)
-    except Professor.DoesNotExist:
+    professor = request.professor
+    if not professor:
         return Response({"detail": "Acesso negado. Apenas professores podem editar projetos."}, status=status.HTTP_403_FORBIDDEN)
 
     try:
@@ -200,7 +195,7 @@ def editar_projeto(request, id_projeto):
     except Projeto.DoesNotExist:
         return Response({"detail": "Projeto não encontrado."}, status=status.HTTP_404_NOT_FOUND)
 
-    if projeto.responsavel != professor_autenticado:
+    if projeto.responsavel_id != professor.id:
         return Response({"detail": "Você não tem permissão para editar este projeto."}, status=status.HTTP_403_FORBIDDEN)
 
     if request.method in ['PUT', 'PATCH']:
@@ -219,9 +214,8 @@ def editar_projeto(request, id_projeto):
 @permission_classes([IsAuthenticated])
 def salvar_filtragem(request):
     if request.method == 'POST':
-        try:
-            professor = Professor.objects.get(user=request.user)
-        except Professor.DoesNotExist:
+        professor = request.professor
+        if not professor:
             return Response({"detail": "Acesso negado. Apenas professores podem cadastrar listas."}, status=status.HTTP_403_FORBIDDEN)
 
         entradas = ListaFiltragemPostSerializer(data=request.data)
@@ -230,8 +224,8 @@ def salvar_filtragem(request):
 
         id_projeto = entradas.data['id_projeto']
         projeto = Projeto.objects.get(pk=id_projeto)
-        colaborador = Colaborador.objects.filter(projeto=projeto, professor=professor)
-        if projeto.responsavel.id != professor.id and not colaborador.exists():
+        colaborador = Colaborador.objects.filter(projeto=projeto, professor_id=professor.id)
+        if projeto.responsavel_id != professor.id and not colaborador.exists():
             return Response({"detail": "Apenas responsáveis ou colaboradores do projeto podem criar filtros."}, status=status.HTTP_403_FORBIDDEN)
 
         data = entradas.data.copy()
@@ -249,9 +243,8 @@ def salvar_filtragem(request):
 @permission_classes([IsAuthenticated])
 def editar_filtragem(request, id_lista):
     if request.method == 'PUT':
-        try:
-            professor = Professor.objects.get(user=request.user)
-        except Professor.DoesNotExist:
+        professor = request.professor
+        if not professor:
             return Response({"detail": "Acesso negado. Apenas professores podem cadastrar listas."}, status=status.HTTP_403_FORBIDDEN)
 
         entradas = ListaFiltragemPutSerializer(data=request.data)
@@ -263,7 +256,7 @@ def editar_filtragem(request, id_lista):
         except Lista_Filtragem.DoesNotExist:
             return Response({"detail": "Lista não encontrada."}, status=status.HTTP_404_NOT_FOUND)
 
-        if lista.id_professor.id != professor.id:
+        if lista.id_professor_id != professor.id:
             return Response({"detail": "Apenas o dono da lista pode alterá-la."}, status=status.HTTP_403_FORBIDDEN)
 
         lista.titulo = entradas.data['titulo']
@@ -283,9 +276,8 @@ def editar_filtragem(request, id_lista):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def cadastrar_colaborador(request, id_projeto, email_colaborador):
-    try:
-        professor = Professor.objects.get(user=request.user)
-    except Professor.DoesNotExist:
+    professor = request.professor
+    if not professor:
         return Response({"detail": "Acesso negado. Apenas professores podem cadastrar colaboradores."}, status=status.HTTP_403_FORBIDDEN)
 
     try:
@@ -293,7 +285,7 @@ def cadastrar_colaborador(request, id_projeto, email_colaborador):
     except BaseException:
         return Response({"detail": "Projeto não encontrado."}, status=status.HTTP_404_NOT_FOUND)
 
-    if (projeto.responsavel.id != professor.id):
+    if (projeto.responsavel_id != professor.id):
         return Response({"detail": "Acesso negado. Apenas o responsavel do projeto pode cadastrar um colaborador."}, status=status.HTTP_403_FORBIDDEN)
 
     try:
@@ -313,9 +305,8 @@ def cadastrar_colaborador(request, id_projeto, email_colaborador):
 @permission_classes([IsAuthenticated])
 def get_lista_by_id(request, id_lista):
     if request.method == 'GET':
-        try:
-            professor = Professor.objects.get(user=request.user)
-        except Professor.DoesNotExist:
+        professor = request.professor
+        if not professor:
             return Response({"detail": "Acesso negado. Apenas professores podem acessar listas de filtragens."}, status=status.HTTP_403_FORBIDDEN)
 
         try:
@@ -323,7 +314,7 @@ def get_lista_by_id(request, id_lista):
         except BaseException:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
-        if lista.id_professor != professor:
+        if lista.id_professor_id != professor.id:
             return Response({"detail": "Apenas o dono da lista pode visualizá-la"}, status=status.HTTP_403_FORBIDDEN)
 
         serializer = ListaFiltragemSerializer(lista)
@@ -335,9 +326,8 @@ def get_lista_by_id(request, id_lista):
 @permission_classes([IsAuthenticated])
 def deletar_lista_filtragem(request, id_lista):
     if request.method == 'DELETE':
-        try:
-            professor = Professor.objects.get(user=request.user)
-        except Professor.DoesNotExist:
+        professor = request.professor
+        if not professor:
             return Response({"detail": "Acesso negado. Apenas professores podem apagar listas."}, status=status.HTTP_403_FORBIDDEN)
 
         try:
@@ -345,7 +335,7 @@ def deletar_lista_filtragem(request, id_lista):
         except BaseException:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
-        if lista.id_professor != professor:
+        if lista.id_professor_id != professor.id:
             return Response({"detail": "Apenas o dono da lista pode apagá-la"}, status=status.HTTP_403_FORBIDDEN)
 
         lista.delete()
@@ -357,9 +347,8 @@ def deletar_lista_filtragem(request, id_lista):
 @permission_classes([IsAuthenticated])
 def gerenciar_inscricao(request, id_projeto, id_aluno):
     if request.method == 'POST':
-        try:
-            professor = Professor.objects.get(user=request.user)
-        except Professor.DoesNotExist:
+        professor = request.professor
+        if not professor:
             return Response({"detail": "Acesso negado. Apenas professores podem gerenciar inscrições."}, status=status.HTTP_403_FORBIDDEN)
 
         try:
@@ -367,8 +356,8 @@ def gerenciar_inscricao(request, id_projeto, id_aluno):
         except BaseException:
             return Response({"detail": "Projeto não encontrado."}, status=status.HTTP_404_NOT_FOUND)
 
-        colaborador = Colaborador.objects.filter(projeto=projeto, professor=professor)
-        if projeto.responsavel != professor and not colaborador.exists():
+        colaborador = Colaborador.objects.filter(projeto=projeto, professor_id=professor.id)
+        if projeto.responsavel_id != professor.id and not colaborador.exists():
             return Response({"detail": "Apenas responsáveis ou colaboradores do projeto podem gerenciar inscrições."}, status=status.HTTP_403_FORBIDDEN)
 
         try:
@@ -406,15 +395,15 @@ def gerenciar_inscricao(request, id_projeto, id_aluno):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def recomendacao(request):
-    try:
-        aluno = Aluno.objects.get(user=request.user)
-    except Aluno.DoesNotExist:
+    aluno = request.aluno
+    if not aluno:
         return Response({"detail": "Acesso negado. Apenas alunos podem ver recomendações de projetos."}, status=status.HTTP_403_FORBIDDEN)
 
     if request.method == 'GET':
-        if aluno.habilidades.exists():
+        habilidades_do_aluno = Habilidade.objects.filter(alunos=aluno.matricula)
+        if habilidades_do_aluno.exists():
             projetos = Projeto.objects.filter(encerrado=False).annotate(
-                habilidades_em_comum=Count('habilidades', filter=Q(habilidades__in=aluno.habilidades.all()))
+                habilidades_em_comum=Count('habilidades', filter=Q(habilidades__in=habilidades_do_aluno))
             ).order_by('-habilidades_em_comum', '-data_de_criacao')
         else:
             projetos = Projeto.objects.filter(encerrado=False).order_by('-data_de_criacao')
@@ -432,9 +421,8 @@ def recomendacao(request):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def encerrar_projeto(request, id_projeto):
-    try:
-        professor = Professor.objects.get(user=request.user)
-    except Professor.DoesNotExist:
+    professor = request.professor
+    if not professor:
         return Response({"detail": "Acesso negado. Apenas professores podem encerrar projetos."}, status=status.HTTP_403_FORBIDDEN)
 
     try:
@@ -442,7 +430,7 @@ def encerrar_projeto(request, id_projeto):
     except BaseException:
         return Response({"detail": "Projeto não encontrado."}, status=status.HTTP_404_NOT_FOUND)
 
-    if (projeto.responsavel.id != professor.id):
+    if (projeto.responsavel_id != professor.id):
         return Response({"detail": "Acesso negado. Apenas o responsavel do projeto pode encerrar o projeto."}, status=status.HTTP_403_FORBIDDEN)
 
 
@@ -454,9 +442,8 @@ def encerrar_projeto(request, id_projeto):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def abrir_projeto(request, id_projeto):
-    try:
-        professor = Professor.objects.get(user=request.user)
-    except Professor.DoesNotExist:
+    professor = request.professor
+    if not professor:
         return Response({"detail": "Acesso negado. Apenas professores podem abrir projetos."}, status=status.HTTP_403_FORBIDDEN)
 
     try:
@@ -464,7 +451,7 @@ def abrir_projeto(request, id_projeto):
     except BaseException:
         return Response({"detail": "Projeto não encontrado."}, status=status.HTTP_404_NOT_FOUND)
 
-    if (projeto.responsavel.id != professor.id):
+    if (projeto.responsavel_id != professor.id):
         return Response({"detail": "Acesso negado. Apenas o responsavel do projeto pode abrir o projeto."}, status=status.HTTP_403_FORBIDDEN)
 
 
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ApiRestConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api_rest'
+
+    def ready(self):
+        from .signals import conectar_sinais_catalogo
+        conectar_sinais_catalogo()
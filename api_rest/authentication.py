@@ -0,0 +1,76 @@
+from django.contrib.auth.models import User
+from django.utils.functional import cached_property
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+CLAIM_PAPEL = 'papel'
+CLAIM_PROFESSOR = 'professor_id'
+CLAIM_MATRICULA = 'matricula'
+
+PAPEL_PROFESSOR = 'professor'
+PAPEL_ALUNO = 'aluno'
+
+
+def adicionar_papel(token, usuario):
+    if hasattr(usuario, 'professor'):
+        token[CLAIM_PAPEL] = PAPEL_PROFESSOR
+        token[CLAIM_PROFESSOR] = usuario.professor.id
+    elif hasattr(usuario, 'aluno'):
+        token[CLAIM_PAPEL] = PAPEL_ALUNO
+        token[CLAIM_MATRICULA] = usuario.aluno.matricula
+    return token
+
+
+class RefreshTokenComPapel(RefreshToken):
+    """
+    RefreshToken que carrega o papel do usuário (professor ou aluno) e o seu
+    identificador como claims. Os access tokens derivados herdam essas claims.
+    """
+
+    def __init__(self, token=None, verify=True):
+        super().__init__(token, verify)
+
+        # Tokens emitidos antes das claims de papel são completados na renovação
+        if token is not None and CLAIM_PAPEL not in self.payload:
+            usuario = User.objects.select_related('professor', 'aluno').filter(pk=self[api_settings.USER_ID_CLAIM]).first()
+            if usuario is not None:
+                adicionar_papel(self, usuario)
+
+    @classmethod
+    def for_user(cls, user):
+        return adicionar_papel(super().for_user(user), user)
+
+
+class TokenRefreshComPapelSerializer(TokenRefreshSerializer):
+    token_class = RefreshTokenComPapel
+
+
+class UsuarioToken(TokenUser):
+    """
+    Usuário autenticado montado apenas a partir das claims do access token,
+    sem consultar o banco de dados.
+    """
+
+    @cached_property
+    def papel(self):
+        return self.token.get(CLAIM_PAPEL)
+
+    @cached_property
+    def professor_id(self):
+        return self.token.get(CLAIM_PROFESSOR)
+
+    @cached_property
+    def matricula(self):
+        return self.token.get(CLAIM_MATRICULA)
+
+
+class JWTPapelAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if CLAIM_PAPEL in validated_token:
+            return UsuarioToken(validated_token)
+        return super().get_user(validated_token)
@@ -0,0 +1,84 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .registro import registro_catalogo
+from .versoes import incrementar_versoes, versao_da_tabela, versoes_do_catalogo
+from .models import Habilidade, Experiencia, Interesse, Feedback, Disciplina
+from .serializers import HabilidadeSerializer, ExperienciaSerializer, InteresseSerializer, FeedbackSerializer, DisciplinaSerializer
+
+
+CHAVE_CACHE_CATALOGO = 'api_rest:catalogo'
+
+# Tabelas que compõem o catálogo, na ordem em que aparecem no payload
+TABELAS_CATALOGO = {
+    'habilidades': (Habilidade, HabilidadeSerializer),
+    'experiencias': (Experiencia, ExperienciaSerializer),
+    'interesses': (Interesse, InteresseSerializer),
+    'feedbacks': (Feedback, FeedbackSerializer),
+    'disciplinas': (Disciplina, DisciplinaSerializer),
+}
+
+
+def montar_catalogo():
+    dados = {
+        nome: serializer(modelo.objects.order_by('pk'), many=True).data
+        for nome, (modelo, serializer) in TABELAS_CATALOGO.items()
+    }
+    conteudo = json.dumps(dados, ensure_ascii=False, separators=(',', ':'))
+    versao = hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+    corpo = json.dumps({'versao': versao, **dados}, ensure_ascii=False, separators=(',', ':'))
+    return {
+        'versao': versao,
+        'etag': f'"{versao}"',
+        'corpo': corpo.encode('utf-8'),
+    }
+
+
+def chave_cache_catalogo(versoes):
+    return ':'.join([CHAVE_CACHE_CATALOGO] + [
+        str(versao_da_tabela(versoes, modelo)) for modelo, _ in TABELAS_CATALOGO.values()
+    ])
+
+
+def obter_catalogo():
+    """
+    Snapshot do catálogo, em cache pela versão das tabelas gravada no banco. Basta uma consulta
+    às versões para que cada processo perceba alterações feitas por outro, mesmo com um cache
+    local (LocMem) por processo; snapshots de versões antigas expiram com CATALOGO_CACHE_TTL.
+    """
+    # As versões são lidas antes das tabelas: uma alteração concorrente só pode deixar o
+    # snapshot mais novo que a sua chave, e ele é refeito na próxima consulta
+    chave = chave_cache_catalogo(versoes_do_catalogo())
+    catalogo = cache.get(chave)
+    if catalogo is None:
+        catalogo = montar_catalogo()
+        cache.set(chave, catalogo, settings.CATALOGO_CACHE_TTL)
+    return catalogo
+
+
+def invalidar_catalogo(sender=None, **kwargs):
+    """
+    Registra a alteração de uma tabela do catálogo (sender) ou de todas. Conectada a post_save
+    e post_delete; escritas que não disparam sinais (bulk_create, update) devem chamá-la.
+    """
+    incrementar_versoes([sender] if sender is not None else [modelo for modelo, _ in TABELAS_CATALOGO.values()])
+    registro_catalogo.invalidar(sender)
+
+
+def etag_corresponde(if_none_match, etag):
+    if not if_none_match:
+        return False
+
+    for candidato in if_none_match.split(','):
+        candidato = candidato.strip()
+        if candidato == '*':
+            return True
+        if candidato.startswith('W/'):
+            candidato = candidato[2:]
+        if candidato == etag:
+            return True
+    return False
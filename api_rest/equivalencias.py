@@ -0,0 +1,108 @@
+from collections import defaultdict, deque
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Disciplina
+
+
+def calcular_classes(grafo, origens):
+    """
+    Percorre o grafo de equivalências (não direcionado) a partir das origens e
+    retorna, para cada código alcançado, a sua classe de equivalência ordenada.
+    """
+    classes = {}
+    for origem in origens:
+        if origem in classes:
+            continue
+
+        componente = {origem}
+        fila = deque([origem])
+        while fila:
+            for vizinho in grafo[fila.popleft()]:
+                if vizinho not in componente:
+                    componente.add(vizinho)
+                    fila.append(vizinho)
+
+        classe = sorted(componente)
+        for codigo in componente:
+            classes[codigo] = classe
+    return classes
+
+
+def _bloquear_componentes(codigos):
+    """
+    Bloqueia e carrega as disciplinas ligadas aos códigos, por equivalências em qualquer
+    direção ou por uma classe atual em comum, com uma consulta por nível da busca em largura.
+    """
+    linhas = {}
+    visitados = set()
+    pendentes = set(codigos)
+    while pendentes:
+        visitados |= pendentes
+        lote = list(pendentes)
+        consulta = Disciplina.objects.select_for_update().filter(
+            Q(codigo__in=lote) | Q(disciplinas_equivalentes__overlap=lote) | Q(classe_equivalencia__overlap=lote)
+        ).values_list('codigo', 'disciplinas_equivalentes', 'classe_equivalencia')
+
+        pendentes = set()
+        for codigo, equivalentes, classe in consulta:
+            linhas[codigo] = (equivalentes, classe)
+            pendentes.add(codigo)
+            pendentes.update(equivalentes)
+            pendentes.update(classe)
+        pendentes -= visitados
+    return linhas
+
+
+def atualizar_classes_equivalencia(codigos=None):
+    """
+    Recalcula a classe_equivalencia das disciplinas afetadas por uma alteração.
+
+    Sem códigos, todas as disciplinas são bloqueadas e recalculadas. Com códigos, só as
+    componentes que os contêm (antes ou depois da alteração) são bloqueadas e refeitas,
+    e só as linhas cuja classe mudou são gravadas. Disciplinas ainda sem classe são
+    sempre incluídas. Retorna o número de disciplinas atualizadas.
+    """
+    with transaction.atomic():
+        if codigos is None:
+            linhas = {
+                codigo: (equivalentes, classe)
+                for codigo, equivalentes, classe in Disciplina.objects.select_for_update()
+                .values_list('codigo', 'disciplinas_equivalentes', 'classe_equivalencia')
+            }
+            origens = set(linhas)
+        else:
+            origens = {int(codigo) for codigo in codigos}
+            origens.update(Disciplina.objects.filter(classe_equivalencia=[]).values_list('codigo', flat=True))
+            # Uma equivalência removida pode dividir a classe antiga: a busca também segue as classes atuais
+            linhas = _bloquear_componentes(origens)
+            origens.update(linhas)
+
+        grafo = defaultdict(set)
+        classes_atuais = {}
+        for codigo, (equivalentes, classe) in linhas.items():
+            classes_atuais[codigo] = classe
+            for equivalente in equivalentes:
+                grafo[codigo].add(equivalente)
+                grafo[equivalente].add(codigo)
+
+        novas_classes = calcular_classes(grafo, origens)
+
+        alteradas = [
+            Disciplina(codigo=codigo, classe_equivalencia=classe)
+            for codigo, classe in novas_classes.items()
+            if codigo in classes_atuais and classes_atuais[codigo] != classe
+        ]
+        Disciplina.objects.bulk_update(alteradas, ['classe_equivalencia'], batch_size=500)
+
+    return len(alteradas)
+
+
+def disciplinas_equivalentes_a(codigo):
+    """
+    Disciplinas da mesma classe de equivalência do código, incluindo ele próprio,
+    em uma única consulta servida pelo índice GIN. Para filtrar por relacionamento,
+    use o lookup disciplina__classe_equivalencia__contains=[codigo].
+    """
+    return Disciplina.objects.filter(classe_equivalencia__contains=[int(codigo)])
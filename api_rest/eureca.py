@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from django.conf import settings
+
+
+class CacheDeRespostas:
+    """
+    Cache em disco das respostas da API, com os validadores (ETag e Last-Modified)
+    usados nas requisições condicionais. Cada URL é gravada em um arquivo próprio.
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = Path(diretorio)
+
+    def _caminho(self, url):
+        return self.diretorio / f'{hashlib.sha256(url.encode()).hexdigest()}.json'
+
+    def ler(self, url):
+        try:
+            with open(self._caminho(url), encoding='utf-8') as arquivo:
+                return json.load(arquivo)
+        except (OSError, ValueError):
+            return None
+
+    def gravar(self, url, etag, last_modified, corpo):
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        entrada = {'url': url, 'etag': etag, 'last_modified': last_modified, 'corpo': corpo}
+
+        # Grava em um arquivo temporário e renomeia, para leitores nunca verem um arquivo parcial
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix='.tmp')
+        try:
+            with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+                json.dump(entrada, arquivo)
+            os.replace(temporario, self._caminho(url))
+        except BaseException:
+            os.unlink(temporario)
+            raise
+
+
+class ClienteEureca:
+    """
+    Cliente HTTP da API do Eureca com pool de conexões persistente, timeouts,
+    novas tentativas com backoff e requisições condicionais sobre o cache em disco.
+    """
+
+    def __init__(self, url_base, timeout, tentativas, diretorio_cache, conexoes=4, backoff=0.5):
+        self.url_base = url_base.rstrip('/')
+        self.timeout = timeout
+        self.cache = CacheDeRespostas(diretorio_cache)
+        self.conexoes = conexoes
+
+        retry = Retry(
+            total=tentativas,
+            backoff_factor=backoff,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['GET'],
+            respect_retry_after_header=True
+        )
+        adaptador = HTTPAdapter(pool_connections=conexoes, pool_maxsize=conexoes, max_retries=retry)
+        self.sessao = requests.Session()
+        self.sessao.mount('http://', adaptador)
+        self.sessao.mount('https://', adaptador)
+
+    def url_curriculo(self, curso, curriculo):
+        return f'{self.url_base}/curriculos/curriculo?{urlencode({"curso": curso, "curriculo": curriculo})}'
+
+    def obter_json(self, url):
+        """
+        Retorna o JSON da URL, ou None se ela não puder ser obtida. Uma resposta 304
+        reaproveita o corpo em cache; sem conexão, o cache também é usado se existir.
+        """
+        em_cache = self.cache.ler(url)
+        cabecalhos = {}
+        if em_cache:
+            if em_cache.get('etag'):
+                cabecalhos['If-None-Match'] = em_cache['etag']
+            if em_cache.get('last_modified'):
+                cabecalhos['If-Modified-Since'] = em_cache['last_modified']
+
+        try:
+            response = self.sessao.get(url, headers=cabecalhos, timeout=self.timeout)
+        except requests.exceptions.RequestException:
+            return em_cache['corpo'] if em_cache else None
+
+        if response.status_code == 304 and em_cache:
+            return em_cache['corpo']
+        if response.status_code != 200:
+            return None
+
+        try:
+            corpo = response.json()
+        except ValueError:
+            return None
+
+        self.cache.gravar(url, response.headers.get('ETag'), response.headers.get('Last-Modified'), corpo)
+        return corpo
+
+    def obter_varios(self, urls):
+        # As respostas voltam na mesma ordem das URLs
+        with ThreadPoolExecutor(max_workers=max(1, min(len(urls), self.conexoes))) as executor:
+            return list(executor.map(self.obter_json, urls))
+
+    def obter_curriculos(self, curriculos):
+        return self.obter_varios([self.url_curriculo(curso, curriculo) for curso, curriculo in curriculos])
+
+
+_cliente = None
+_cliente_lock = threading.Lock()
+
+
+def obter_cliente():
+    global _cliente
+    with _cliente_lock:
+        if _cliente is None:
+            _cliente = ClienteEureca(
+                settings.EURECA_URL_BASE,
+                (settings.EURECA_TIMEOUT_CONEXAO, settings.EURECA_TIMEOUT_LEITURA),
+                settings.EURECA_TENTATIVAS,
+                settings.EURECA_DIRETORIO_CACHE
+            )
+        return _cliente
@@ -0,0 +1,94 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api_rest.models import Disciplina
+from api_rest.utils import salvar_disciplinas
+
+
+def gerar_curriculo(primeiro_codigo, quantidade, comuns, semente):
+    """
+    Monta um currículo no formato da API do Eureca. As `comuns` primeiras disciplinas
+    usam códigos compartilhados entre currículos; as demais apontam equivalências para eles.
+    """
+    aleatorio = random.Random(semente)
+    disciplinas = []
+    for indice in range(quantidade):
+        codigo = 9000000 + indice if indice < comuns else primeiro_codigo + indice
+        equivalentes = []
+        if indice >= comuns and aleatorio.random() < 0.4:
+            equivalentes.append({'codigo_da_disciplina': 9000000 + aleatorio.randrange(comuns)})
+        disciplinas.append({
+            'codigo_da_disciplina': codigo,
+            'nome_da_disciplina': f'Disciplina {codigo}',
+            'disciplinas_equivalentes': equivalentes
+        })
+    return disciplinas
+
+
+def salvar_disciplinas_por_linha(disciplinas):
+    # Implementação anterior: um exists() e um create() por disciplina
+    for disciplina in disciplinas:
+        codigo_da_disciplina = disciplina['codigo_da_disciplina']
+        if not Disciplina.objects.filter(pk=codigo_da_disciplina).exists():
+            Disciplina.objects.create(
+                codigo=codigo_da_disciplina,
+                nome=disciplina['nome_da_disciplina'],
+                disciplinas_equivalentes=[eq['codigo_da_disciplina'] for eq in disciplina['disciplinas_equivalentes']]
+            )
+
+
+class Command(BaseCommand):
+    help = 'Compara a gravação de currículos por linha com o upsert em lote de salvar_disciplinas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--arquivos', nargs='*', default=[], help='Respostas da API do Eureca salvas em JSON')
+        parser.add_argument('--disciplinas', type=int, default=120, help='Disciplinas por currículo sintético')
+
+    def handle(self, *args, **options):
+        if options['arquivos']:
+            curriculos = []
+            for caminho in options['arquivos']:
+                with open(caminho, encoding='utf-8') as arquivo:
+                    curriculos.append(json.load(arquivo)['disciplinas_do_curriculo'])
+        else:
+            quantidade = options['disciplinas']
+            curriculos = [
+                gerar_curriculo(9100000, quantidade, quantidade // 3, 2017),
+                gerar_curriculo(9200000, quantidade, quantidade // 3, 2023)
+            ]
+
+        disciplinas = [disciplina for curriculo in curriculos for disciplina in curriculo]
+        alteradas = [dict(disciplina, nome_da_disciplina=disciplina['nome_da_disciplina'] + ' (nova ementa)')
+                     if indice % 10 == 0 else disciplina
+                     for indice, disciplina in enumerate(disciplinas)]
+
+        self.stdout.write(f'{len(disciplinas)} disciplinas em {len(curriculos)} currículos')
+        self.relatar('por linha, importação inicial', self.medir(lambda: salvar_disciplinas_por_linha(disciplinas)))
+        self.relatar('por linha, reimportação', self.medir(lambda: salvar_disciplinas_por_linha(disciplinas), disciplinas))
+        self.relatar('em lote, importação inicial', self.medir(lambda: salvar_disciplinas(disciplinas)))
+        self.relatar('em lote, reimportação', self.medir(lambda: salvar_disciplinas(disciplinas), disciplinas))
+        self.relatar('em lote, 10% alteradas', self.medir(lambda: salvar_disciplinas(alteradas), disciplinas))
+
+    def medir(self, funcao, preexistentes=None):
+        # Cada cenário roda em uma transação desfeita ao final, sem deixar dados no banco
+        with transaction.atomic():
+            if preexistentes is not None:
+                salvar_disciplinas(preexistentes)
+
+            with CaptureQueriesContext(connection) as consultas:
+                inicio = time.perf_counter()
+                resultado = funcao()
+                duracao = time.perf_counter() - inicio
+
+            transaction.set_rollback(True)
+        return resultado, duracao, len(consultas)
+
+    def relatar(self, cenario, medicao):
+        resultado, duracao, consultas = medicao
+        contagem = f' | {resultado}' if resultado else ''
+        self.stdout.write(f'{cenario:>30}: {duracao * 1000:8.1f} ms | {consultas:5d} consultas{contagem}')
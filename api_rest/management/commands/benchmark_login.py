@@ -0,0 +1,81 @@
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from api_professor.models import Professor
+
+
+class Command(BaseCommand):
+    help = 'Compara a vazão de logins concorrentes entre a view síncrona e a assíncrona'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requisicoes', type=int, default=50, help='Total de logins por modo')
+        parser.add_argument('--concorrencia', type=int, default=10, help='Logins simultâneos')
+
+    def handle(self, *args, **options):
+        requisicoes = options['requisicoes']
+        concorrencia = options['concorrencia']
+
+        email = f'benchmark.{uuid.uuid4().hex}@example.com'
+        senha = uuid.uuid4().hex
+        usuario = User.objects.create_user(username=email, email=email, password=senha)
+        Professor.objects.create(user=usuario, nome='Benchmark', email=email)
+        corpo = json.dumps({'email': email, 'senha': senha})
+
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                resultado_sync = self.medir_sync(reverse('login'), corpo, requisicoes, concorrencia)
+                resultado_async = asyncio.run(self.medir_async(reverse('login_async'), corpo, requisicoes, concorrencia))
+        finally:
+            usuario.delete()
+
+        self.stdout.write(f'{requisicoes} logins, concorrência {concorrencia}')
+        self.relatar('sync', resultado_sync)
+        self.relatar('async', resultado_async)
+
+    def medir_sync(self, url, corpo, requisicoes, concorrencia):
+        def requisitar(_):
+            inicio = time.perf_counter()
+            response = Client().post(url, corpo, content_type='application/json')
+            return response.status_code, time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            respostas = list(executor.map(requisitar, range(requisicoes)))
+        return respostas, time.perf_counter() - inicio
+
+    async def medir_async(self, url, corpo, requisicoes, concorrencia):
+        client = AsyncClient()
+        limite = asyncio.Semaphore(concorrencia)
+
+        async def requisitar():
+            async with limite:
+                inicio = time.perf_counter()
+                response = await client.post(url, corpo, content_type='application/json')
+                return response.status_code, time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        respostas = await asyncio.gather(*(requisitar() for _ in range(requisicoes)))
+        return respostas, time.perf_counter() - inicio
+
+    def relatar(self, modo, resultado):
+        respostas, duracao = resultado
+        latencias = sorted(latencia for _, latencia in respostas)
+        status_http = Counter(codigo for codigo, _ in respostas)
+        p95 = latencias[max(0, int(len(latencias) * 0.95) - 1)]
+
+        self.stdout.write(
+            f'{modo:>5}: {len(respostas) / duracao:8.1f} req/s | '
+            f'p50 {statistics.median(latencias) * 1000:7.1f} ms | '
+            f'p95 {p95 * 1000:7.1f} ms | '
+            f'status {dict(status_http)}'
+        )
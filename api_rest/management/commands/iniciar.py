@@ -1,11 +1,35 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from api_aluno.models import Experiencia, Habilidade, Interesse, Feedback
-from api_rest.utils import atualizar_disciplinas
+from api_rest.catalogo import invalidar_catalogo
+from api_rest.sincronizacao import sincronizar_disciplinas
+from api_rest.utils import importar_disciplinas_de_arquivos
+
+
+def curso_e_curriculo(valor):
+    curso, separador, curriculo = valor.partition(':')
+    if not separador or not curso or not curriculo:
+        raise ValueError(valor)
+    return curso, curriculo
+
 
 class Command(BaseCommand):
     help = 'Preenche as tabelas de Tags e Disciplinas'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--curriculo', action='append', type=curso_e_curriculo, dest='curriculos',
+            help='Curso e currículo a importar do Eureca no formato CURSO:CURRICULO (repetível; padrão: EURECA_CURRICULOS)'
+        )
+        parser.add_argument(
+            '--arquivos', nargs='+', default=[],
+            help='Respostas da API do Eureca salvas em JSON (arquivos ou diretórios), importadas sem acesso à rede'
+        )
+
+    def handle(self, *args, **options):
+        if options['curriculos'] and options['arquivos']:
+            raise CommandError('Use --curriculo ou --arquivos, não ambos')
+
         tags_habilidades = [
             # Soft Skills
             ('Organização de Projetos', 'Soft Skills'),
@@ -96,17 +120,27 @@ class Command(BaseCommand):
             ('Flexível', 'Feedbacks'),
         ]
 
-        for nome, grupo in tags_habilidades:
-            Habilidade.objects.get_or_create(nome=nome, grupo=grupo)
+        tabelas = [
+            (Habilidade, tags_habilidades),
+            (Experiencia, tags_experiencias),
+            (Interesse, tags_interesses),
+            (Feedback, tags_feedbacks)
+        ]
 
-        for nome, grupo in tags_experiencias:
-            Experiencia.objects.get_or_create(nome=nome, grupo=grupo)
+        with transaction.atomic():
+            # Uma inserção por tabela; tags já existentes são mantidas
+            for modelo, tags in tabelas:
+                modelo.objects.bulk_create([modelo(nome=nome, grupo=grupo) for nome, grupo in tags], ignore_conflicts=True)
+                transaction.on_commit(lambda modelo=modelo: invalidar_catalogo(modelo))
 
-        for nome, grupo in tags_interesses:
-            Interesse.objects.get_or_create(nome=nome, grupo=grupo)
+            if options['arquivos']:
+                contagem = importar_disciplinas_de_arquivos(options['arquivos'])
 
-        for nome, grupo in tags_feedbacks:
-            Feedback.objects.get_or_create(nome=nome, grupo=grupo)
+        if not options['arquivos']:
+            sincronizacao = sincronizar_disciplinas(forcar=True, curriculos=options['curriculos'])
+            if sincronizacao.erro:
+                raise CommandError(sincronizacao.erro)
+            contagem = {'inseridas': sincronizacao.inseridas, 'atualizadas': sincronizacao.atualizadas, 'inalteradas': sincronizacao.inalteradas}
 
-        atualizar_disciplinas()
+        self.stdout.write(f'Disciplinas: {contagem["inseridas"]} inseridas, {contagem["atualizadas"]} atualizadas, {contagem["inalteradas"]} inalteradas')
         self.stdout.write(self.style.SUCCESS('Preenchido as tabelas de Habilidades, Experiências, Interesses, Feedbacks e Disciplinas'))
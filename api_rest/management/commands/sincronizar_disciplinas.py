@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from api_rest.sincronizacao import sincronizar_disciplinas
+
+
+class Command(BaseCommand):
+    help = 'Sincroniza as disciplinas com o Eureca quando a última sincronização expirou'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forcar', action='store_true', help='Sincroniza mesmo que a última sincronização seja recente')
+
+    def handle(self, *args, **options):
+        sincronizacao = sincronizar_disciplinas(forcar=options['forcar'])
+
+        if sincronizacao is None:
+            self.stdout.write('Disciplinas já sincronizadas recentemente')
+        elif sincronizacao.erro:
+            self.stderr.write(self.style.ERROR(sincronizacao.erro))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Disciplinas sincronizadas: {sincronizacao.inseridas} inseridas, '
+                f'{sincronizacao.atualizadas} atualizadas, {sincronizacao.inalteradas} inalteradas'
+            ))
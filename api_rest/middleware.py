@@ -0,0 +1,68 @@
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.functional import SimpleLazyObject
+
+from api_professor.models import Professor
+from api_aluno.models import Aluno
+from .authentication import UsuarioToken
+
+
+def _instancia_parcial(modelo, **valores):
+    # Instância com os demais campos adiados: carregados do banco apenas se forem acessados
+    return modelo.from_db(DEFAULT_DB_ALIAS, list(valores), list(valores.values()))
+
+
+class PapelDoUsuario:
+    """
+    Resolve, uma única vez por requisição, o Professor ou Aluno do usuário autenticado.
+
+    Com um token que carrega as claims de papel, as instâncias são montadas sem consulta,
+    com os campos além da chave primária adiados. Para um User do banco, professor e aluno
+    são obtidos juntos com select_related, reaproveitando o que já estiver em cache.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self._resolvido = False
+        self._professor = None
+        self._aluno = None
+
+    def professor(self):
+        self._resolver()
+        return self._professor
+
+    def aluno(self):
+        self._resolver()
+        return self._aluno
+
+    def _resolver(self):
+        if self._resolvido:
+            return
+        self._resolvido = True
+
+        user = self.request.user
+        if isinstance(user, UsuarioToken):
+            if user.professor_id is not None:
+                self._professor = _instancia_parcial(Professor, id=user.professor_id, user_id=user.id)
+            elif user.matricula is not None:
+                self._aluno = _instancia_parcial(Aluno, matricula=user.matricula, user_id=user.id)
+            return
+
+        if not user.is_authenticated:
+            return
+
+        if not (User.professor.is_cached(user) and User.aluno.is_cached(user)):
+            user = User.objects.select_related('professor', 'aluno').get(pk=user.pk)
+        self._professor = getattr(user, 'professor', None)
+        self._aluno = getattr(user, 'aluno', None)
+
+
+class PapelMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        papel = PapelDoUsuario(request)
+        request.professor = SimpleLazyObject(papel.professor)
+        request.aluno = SimpleLazyObject(papel.aluno)
+        return self.get_response(request)
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 
 
 class Habilidade(models.Model):
@@ -42,3 +43,35 @@ class Disciplina(models.Model):
     codigo = models.PositiveIntegerField(primary_key=True)
     nome = models.TextField(null=False)
     disciplinas_equivalentes = ArrayField(models.PositiveIntegerField(), default=list)
+    # Fecho transitivo das equivalências, incluindo a própria disciplina (ver api_rest.equivalencias)
+    classe_equivalencia = ArrayField(models.PositiveIntegerField(), default=list)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['classe_equivalencia'], name='disciplina_classe_equiv_gin')
+        ]
+
+
+class SincronizacaoDisciplinas(models.Model):
+    origem = models.CharField(max_length=50, primary_key=True)
+    ultima_tentativa = models.DateTimeField(null=True, blank=True)
+    ultimo_sucesso = models.DateTimeField(null=True, blank=True)
+    inseridas = models.PositiveIntegerField(default=0)
+    atualizadas = models.PositiveIntegerField(default=0)
+    inalteradas = models.PositiveIntegerField(default=0)
+    erro = models.TextField(blank=True, default='')
+    # Currículos importados com iniciar --curriculo além de EURECA_CURRICULOS, como pares [curso, curriculo]
+    curriculos = models.JSONField(default=list, blank=True)
+
+    def __str__(self):
+        return f'{self.origem}: {self.ultimo_sucesso}'
+
+
+class VersaoCatalogo(models.Model):
+    # Incrementada a cada alteração de uma tabela do catálogo (ver api_rest.versoes), para que
+    # todos os processos percebam a alteração, e não só o que a fez
+    tabela = models.CharField(max_length=100, primary_key=True)
+    versao = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.tabela}: {self.versao}'
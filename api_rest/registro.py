@@ -0,0 +1,43 @@
+import threading
+
+from .versoes import versao_da_tabela, versoes_do_catalogo
+
+
+class RegistroCatalogo:
+    """
+    Cópia em memória das tabelas do catálogo, indexadas pela chave primária.
+
+    Cada processo guarda a tabela com a versão (VersaoCatalogo) em que a carregou. Obter a
+    tabela custa uma consulta às versões, e ela só é recarregada quando algum processo a
+    alterou. Uma chave ausente não provoca recarga: com a versão em dia, ela não existe.
+    """
+
+    def __init__(self):
+        self._tabelas = {}
+        self._lock = threading.Lock()
+
+    def tabela(self, modelo):
+        # A versão é lida antes da tabela: uma alteração concorrente só faz a tabela ser recarregada de novo
+        versao = versao_da_tabela(versoes_do_catalogo(), modelo)
+        with self._lock:
+            carregada = self._tabelas.get(modelo)
+        if carregada is not None and carregada[0] == versao:
+            return carregada[1]
+
+        tabela = modelo.objects.in_bulk()
+        with self._lock:
+            self._tabelas[modelo] = (versao, tabela)
+        return tabela
+
+    def obter(self, modelo, pk):
+        return self.tabela(modelo).get(pk)
+
+    def invalidar(self, modelo=None):
+        with self._lock:
+            if modelo is None:
+                self._tabelas.clear()
+            else:
+                self._tabelas.pop(modelo, None)
+
+
+registro_catalogo = RegistroCatalogo()
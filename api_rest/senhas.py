@@ -0,0 +1,70 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.http import JsonResponse
+
+
+class FilaDeHashingCheia(Exception):
+    pass
+
+
+class ExecutorDeSenhas:
+    """
+    Executa o hashing de senhas (PBKDF2) fora do event loop, em um pool de threads
+    limitado. Quando todas as threads estão ocupadas e a fila atingiu o limite,
+    novas submissões são recusadas com FilaDeHashingCheia em vez de se acumularem.
+    """
+
+    def __init__(self, max_workers, max_fila):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='senhas')
+        self._vagas = threading.BoundedSemaphore(max_workers + max_fila)
+
+    def submeter(self, funcao, *args):
+        if not self._vagas.acquire(blocking=False):
+            raise FilaDeHashingCheia()
+
+        try:
+            future = self._executor.submit(funcao, *args)
+        except BaseException:
+            self._vagas.release()
+            raise
+
+        future.add_done_callback(lambda _: self._vagas.release())
+        return asyncio.wrap_future(future)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def obter_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ExecutorDeSenhas(settings.HASHING_MAX_WORKERS, settings.HASHING_MAX_FILA)
+    return _executor
+
+
+async def executar_hashing(funcao, *args):
+    return await obter_executor().submeter(funcao, *args)
+
+
+def resposta_fila_cheia():
+    response = JsonResponse({"detail": "Servidor sobrecarregado. Tente novamente em instantes."}, status=503)
+    response['Retry-After'] = '1'
+    return response
+
+
+def criar_usuario(email, senha=None, senha_hash=None):
+    usuario = User(
+        username=User.normalize_username(email),
+        email=User.objects.normalize_email(email)
+    )
+    usuario.password = senha_hash if senha_hash is not None else make_password(senha)
+    usuario.save()
+    return usuario
@@ -1,5 +1,56 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 from .models import Experiencia, Interesse, Feedback, Habilidade, Disciplina
+from .registro import registro_catalogo
+
+
+class CatalogoManyRelatedField(serializers.ManyRelatedField):
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        # Uma única consulta às versões do catálogo para todos os ids enviados
+        tabela = registro_catalogo.tabela(self.child_relation.get_queryset().model)
+        return [self.child_relation.obter_instancia(item, tabela) for item in data]
+
+
+class CatalogoRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField para as tabelas do catálogo que valida os ids contra o
+    registro em memória, com uma consulta (às versões do catálogo) por campo validado
+    em vez de uma por id enviado.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return CatalogoManyRelatedField(**list_kwargs)
+
+    def to_internal_value(self, data):
+        return self.obter_instancia(data, registro_catalogo.tabela(self.get_queryset().model))
+
+    def obter_instancia(self, data, tabela):
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+
+        modelo = self.get_queryset().model
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = modelo._meta.pk.to_python(data)
+        except (DjangoValidationError, TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+        instancia = tabela.get(pk)
+        if instancia is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instancia
 
 
 class HabilidadeSerializer(serializers.ModelSerializer):
@@ -29,7 +80,7 @@ class FeedbackSerializer(serializers.ModelSerializer):
 class DisciplinaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Disciplina
-        fields = '__all__'
+        fields = ['codigo', 'nome', 'disciplinas_equivalentes']
 
 
 class DisciplinaCodigoENomeSerializer(serializers.ModelSerializer):
@@ -0,0 +1,9 @@
+from django.db.models.signals import post_save, post_delete
+
+from .catalogo import TABELAS_CATALOGO, invalidar_catalogo
+
+
+def conectar_sinais_catalogo():
+    for modelo, _ in TABELAS_CATALOGO.values():
+        post_save.connect(invalidar_catalogo, sender=modelo, dispatch_uid=f'catalogo_save_{modelo.__name__}')
+        post_delete.connect(invalidar_catalogo, sender=modelo, dispatch_uid=f'catalogo_delete_{modelo.__name__}')
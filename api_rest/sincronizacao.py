@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import SincronizacaoDisciplinas
+from .utils import atualizar_disciplinas, CurriculoIndisponivel
+
+
+ORIGEM_EURECA = 'eureca'
+
+
+def obter_sincronizacao():
+    sincronizacao, _ = SincronizacaoDisciplinas.objects.get_or_create(origem=ORIGEM_EURECA)
+    return sincronizacao
+
+
+def sincronizacao_expirada(sincronizacao=None):
+    sincronizacao = sincronizacao or obter_sincronizacao()
+    if sincronizacao.ultimo_sucesso is None:
+        return True
+    ttl = timedelta(seconds=settings.DISCIPLINAS_SINCRONIZACAO_TTL)
+    return sincronizacao.ultimo_sucesso <= timezone.now() - ttl
+
+
+def curriculos_conhecidos(sincronizacao=None):
+    # EURECA_CURRICULOS primeiro: na sincronização completa, os demais não sobrescrevem os configurados
+    sincronizacao = sincronizacao or obter_sincronizacao()
+    curriculos = [tuple(curriculo) for curriculo in settings.EURECA_CURRICULOS]
+    for curriculo in sincronizacao.curriculos:
+        if tuple(curriculo) not in curriculos:
+            curriculos.append(tuple(curriculo))
+    return curriculos
+
+
+def _registrar_curriculos(curriculos):
+    sincronizacao = obter_sincronizacao()
+    conhecidos = curriculos_conhecidos(sincronizacao)
+    novos = [list(curriculo) for curriculo in curriculos if tuple(curriculo) not in conhecidos]
+    if novos:
+        SincronizacaoDisciplinas.objects.filter(origem=ORIGEM_EURECA).update(curriculos=sincronizacao.curriculos + novos)
+
+
+def _reivindicar(agora):
+    # Atualização condicional: só um processo por intervalo mínimo consulta o Eureca
+    limite = agora - timedelta(seconds=settings.DISCIPLINAS_SINCRONIZACAO_INTERVALO_MINIMO)
+    return SincronizacaoDisciplinas.objects.filter(
+        Q(ultima_tentativa__isnull=True) | Q(ultima_tentativa__lte=limite),
+        origem=ORIGEM_EURECA
+    ).update(ultima_tentativa=agora) == 1
+
+
+def _executar(forcar=False, curriculos=None):
+    sincronizacao = obter_sincronizacao()
+    agora = timezone.now()
+    if forcar:
+        SincronizacaoDisciplinas.objects.filter(origem=ORIGEM_EURECA).update(ultima_tentativa=agora)
+    elif not _reivindicar(agora):
+        return None
+
+    try:
+        contagem = atualizar_disciplinas(curriculos or curriculos_conhecidos(sincronizacao))
+    except CurriculoIndisponivel as erro:
+        SincronizacaoDisciplinas.objects.filter(origem=ORIGEM_EURECA).update(erro=f'Currículo indisponível: {erro}')
+        return obter_sincronizacao()
+
+    if curriculos:
+        # Sincronização parcial: não adia a completa, e os currículos passam a fazer parte dela
+        _registrar_curriculos(curriculos)
+        SincronizacaoDisciplinas.objects.filter(origem=ORIGEM_EURECA).update(erro='', **contagem)
+    else:
+        SincronizacaoDisciplinas.objects.filter(origem=ORIGEM_EURECA).update(ultimo_sucesso=timezone.now(), erro='', **contagem)
+    return obter_sincronizacao()
+
+
+def sincronizar_disciplinas(forcar=False, curriculos=None):
+    """
+    Sincroniza as disciplinas com o Eureca se a última sincronização bem-sucedida
+    for mais antiga que DISCIPLINAS_SINCRONIZACAO_TTL. Sem curriculos, sincroniza
+    EURECA_CURRICULOS e os currículos já importados (curriculos_conhecidos); com
+    curriculos, só eles, sem contar como sincronização completa. Retorna o registro da
+    sincronização, ou None se ela não foi necessária ou já está em andamento.
+    """
+    if not forcar and not sincronizacao_expirada():
+        return None
+    return _executar(forcar, curriculos)
+
+
+def sincronizar_por_disciplina_desconhecida():
+    """
+    Sincroniza ignorando o TTL, quando um histórico cita uma disciplina ainda não cadastrada.
+    Continua limitado a uma tentativa por DISCIPLINAS_SINCRONIZACAO_INTERVALO_MINIMO.
+    """
+    return _executar()
@@ -1,10 +1,36 @@
-from django.test import TestCase
+import asyncio
+import json
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from rest_framework.test import APITestCase, APIClient
-from rest_framework import status
+from rest_framework import status, serializers
 from django.urls import reverse
 from api_professor.models import Professor
-from .models import Habilidade, Experiencia, Interesse, Feedback
+from .models import Habilidade, Experiencia, Interesse, Feedback, Disciplina, SincronizacaoDisciplinas
 from .views import *
+from .catalogo import invalidar_catalogo
+from .registro import registro_catalogo
+from .versoes import incrementar_versoes
+from .serializers import CatalogoRelatedField
+from .senhas import ExecutorDeSenhas, FilaDeHashingCheia
+from .authentication import RefreshTokenComPapel
+from .utils import salvar_disciplinas, CurriculoIndisponivel
+from .eureca import ClienteEureca
+from .sincronizacao import sincronizar_disciplinas, sincronizar_por_disciplina_desconhecida, sincronizacao_expirada, ORIGEM_EURECA
+from .equivalencias import calcular_classes, atualizar_classes_equivalencia, disciplinas_equivalentes_a, _bloquear_componentes
+from rest_framework_simplejwt.tokens import AccessToken
 
 
 class LoginTestCase(APITestCase):
@@ -123,6 +149,167 @@ class LoginTestCase(APITestCase):
         self.assertEqual(response.data['detail'], 'Senha incorreta.')
 
 
+    def test_login_email_sem_diferenciar_maiusculas(self):
+        dados = {
+            "email": "Andre@Example.com",
+            "senha": "1234"
+        }
+        response = self.client.post(self.url, dados, format='json')
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['isTeacher'])
+
+    def test_login_professor_uma_consulta(self):
+        with self.assertNumQueries(1):
+            response = self.client.post(self.url, self.login_professor, format='json')
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['isTeacher'])
+        self.assertEqual(response.data['id'], self.professor.id)
+
+    def test_login_aluno_uma_consulta(self):
+        with self.assertNumQueries(1):
+            response = self.client.post(self.url, self.login_aluno, format='json')
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['isTeacher'])
+        self.assertEqual(response.data['matricula'], self.aluno.matricula)
+
+class LoginAsyncTestCase(APITestCase):
+    def setUp(self):
+        usuario_professor = User.objects.create_user(
+            username='andre@example.com',
+            email='andre@example.com',
+            password='1234'
+        )
+        self.professor = Professor.objects.create(
+            nome='Andre Souza',
+            email='andre@example.com',
+            user=usuario_professor
+        )
+        self.url = reverse('login_async')
+
+    def test_login_async_sucesso(self):
+        response = self.client.post(self.url, {"email": "andre@example.com", "senha": "1234"}, format='json')
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()['isTeacher'])
+        self.assertNotEqual(response.json()['access'], '')
+
+    def test_login_async_senha_incorreta(self):
+        response = self.client.post(self.url, {"email": "andre@example.com", "senha": "12345"}, format='json')
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json()['detail'], 'Senha incorreta.')
+
+    def test_login_async_inexistente(self):
+        response = self.client.post(self.url, {"email": "joao@example.com", "senha": "1234"}, format='json')
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_login_async_metodo_nao_permitido(self):
+        response = self.client.get(self.url)
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_executor_recusa_quando_fila_cheia(self):
+        async def submeter():
+            executor = ExecutorDeSenhas(max_workers=1, max_fila=0)
+            liberar = threading.Event()
+            ocupado = executor.submeter(liberar.wait)
+            try:
+                with self.assertRaises(FilaDeHashingCheia):
+                    executor.submeter(liberar.wait)
+            finally:
+                liberar.set()
+            await ocupado
+            await executor.submeter(lambda: None)
+
+        asyncio.run(submeter())
+
+
+class TokenComPapelTestCase(APITestCase):
+    def setUp(self):
+        self.usuario_professor = User.objects.create_user(
+            username='andre@example.com',
+            email='andre@example.com',
+            password='1234'
+        )
+        self.professor = Professor.objects.create(
+            nome='Andre Souza',
+            email='andre@example.com',
+            user=self.usuario_professor
+        )
+        self.usuario_aluno = User.objects.create_user(
+            username='andre1@example.com',
+            email='andre1@example.com',
+            password='1234'
+        )
+        self.aluno = Aluno.objects.create(
+            matricula='121210210',
+            nome='Andre Souza',
+            email='andre1@example.com',
+            user=self.usuario_aluno
+        )
+
+    def test_login_emite_claims_de_professor(self):
+        response = self.client.post(reverse('login'), {"email": "andre@example.com", "senha": "1234"}, format='json')
+        access = AccessToken(response.data['access'])
+
+        # Asserts
+        self.assertEqual(access['papel'], 'professor')
+        self.assertEqual(access['professor_id'], self.professor.id)
+        self.assertNotIn('matricula', access)
+
+    def test_login_emite_claims_de_aluno(self):
+        response = self.client.post(reverse('login'), {"email": "andre1@example.com", "senha": "1234"}, format='json')
+        access = AccessToken(response.data['access'])
+
+        # Asserts
+        self.assertEqual(access['papel'], 'aluno')
+        self.assertEqual(access['matricula'], self.aluno.matricula)
+
+    def test_renovar_token_antigo_adiciona_claims(self):
+        refresh = RefreshToken.for_user(self.usuario_aluno)
+        response = self.client.post(reverse('token_refresh'), {"refresh": str(refresh)}, format='json')
+        access = AccessToken(response.data['access'])
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(access['papel'], 'aluno')
+        self.assertEqual(access['matricula'], self.aluno.matricula)
+
+    def test_autenticacao_sem_consultar_usuario(self):
+        refresh = RefreshTokenComPapel.for_user(self.usuario_professor)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        url = reverse('deletar_avaliacao', kwargs={'id_avaliacao': 999})
+
+        # Apenas a busca pela avaliação
+        with self.assertNumQueries(1):
+            response = self.client.delete(url)
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_autenticacao_token_sem_claims_consulta_banco(self):
+        refresh = RefreshToken.for_user(self.usuario_professor)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        url = reverse('deletar_avaliacao', kwargs={'id_avaliacao': 999})
+
+        with self.assertNumQueries(3):
+            response = self.client.delete(url)
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
 class TagTestCase(APITestCase):
     def setUp(self):
         Habilidade.objects.create(nome='Programação', grupo='Hard Skills')
@@ -169,3 +356,514 @@ class TagTestCase(APITestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['nome'], 'Boa Comunicação')
         self.assertEqual(response.data[0]['grupo'], 'Feedbacks')
+
+
+class CatalogoTestCase(APITestCase):
+    def setUp(self):
+        invalidar_catalogo()
+        Habilidade.objects.create(nome='Programação', grupo='Hard Skills')
+        Experiencia.objects.create(nome='Gestão de Projetos', grupo='Experiências')
+        Interesse.objects.create(nome='Inteligência Artificial', grupo='Interesses')
+        Feedback.objects.create(nome='Boa Comunicação', grupo='Feedbacks')
+        self.url = reverse('get_catalogo')
+
+    def tearDown(self):
+        invalidar_catalogo()
+
+    def test_get_catalogo(self):
+        response = self.client.get(self.url)
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', response)
+        dados = response.json()
+        self.assertEqual(f'"{dados["versao"]}"', response['ETag'])
+        self.assertEqual(dados['habilidades'][0]['nome'], 'Programação')
+        self.assertEqual(dados['experiencias'][0]['nome'], 'Gestão de Projetos')
+        self.assertEqual(dados['interesses'][0]['nome'], 'Inteligência Artificial')
+        self.assertEqual(dados['feedbacks'][0]['nome'], 'Boa Comunicação')
+        self.assertEqual(dados['disciplinas'], [])
+
+    def test_get_catalogo_nao_modificado_so_consulta_as_versoes(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_get_catalogo_etag_muda_apos_alteracao(self):
+        etag = self.client.get(self.url)['ETag']
+
+        Habilidade.objects.create(nome='Banco de Dados', grupo='Hard Skills')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['habilidades']), 2)
+
+    def test_get_catalogo_percebe_alteracao_feita_por_outro_processo(self):
+        etag = self.client.get(self.url)['ETag']
+
+        # Outro processo: a alteração chega só pela versão gravada no banco
+        Habilidade.objects.bulk_create([Habilidade(nome='Banco de Dados', grupo='Hard Skills')])
+        incrementar_versoes([Habilidade])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        # Asserts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['habilidades']), 2)
+
+
+class CatalogoRelatedFieldTestCase(TestCase):
+    def setUp(self):
+        invalidar_catalogo()
+        self.habilidades = [
+            Habilidade.objects.create(nome=f'Habilidade {i}', grupo='Hard Skills')
+            for i in range(20)
+        ]
+        self.ids = [habilidade.id for habilidade in self.habilidades]
+
+    def tearDown(self):
+        invalidar_catalogo()
+
+    def test_validacao_com_uma_consulta_com_registro_carregado(self):
+        registro_catalogo.obter(Habilidade, self.ids[0])
+        campo = CatalogoRelatedField(many=True, queryset=Habilidade.objects.all())
+
+        # Só a consulta às versões do catálogo, independente da quantidade de ids
+        with self.assertNumQueries(1):
+            validados = campo.run_validation(self.ids)
+
+        # Asserts
+        self.assertEqual([habilidade.id for habilidade in validados], self.ids)
+
+    def test_validacao_padrao_consulta_por_id(self):
+        campo = serializers.PrimaryKeyRelatedField(many=True, queryset=Habilidade.objects.all())
+
+        with self.assertNumQueries(len(self.ids)):
+            campo.run_validation(self.ids)
+
+    def test_validacao_id_inexistente(self):
+        campo = CatalogoRelatedField(many=True, queryset=Habilidade.objects.all())
+
+        with self.assertRaises(serializers.ValidationError):
+            campo.run_validation([max(self.ids) + 1])
+
+    def test_ids_inexistentes_nao_recarregam_o_registro(self):
+        registro_catalogo.obter(Habilidade, self.ids[0])
+        campo = CatalogoRelatedField(many=True, queryset=Habilidade.objects.all())
+
+        with self.assertNumQueries(5):
+            for inexistente in range(5):
+                with self.assertRaises(serializers.ValidationError):
+                    campo.run_validation([max(self.ids) + 1 + inexistente])
+
+    def test_tag_excluida_por_outro_processo(self):
+        campo = CatalogoRelatedField(many=True, queryset=Habilidade.objects.all())
+        campo.run_validation(self.ids)
+
+        # Outro processo: o registro local não é invalidado, só a versão no banco muda
+        with mock.patch.object(registro_catalogo, 'invalidar'):
+            self.habilidades[0].delete()
+
+        # Asserts
+        with self.assertRaises(serializers.ValidationError):
+            campo.run_validation([self.ids[0]])
+        self.assertEqual(len(campo.run_validation(self.ids[1:])), len(self.ids) - 1)
+
+    def test_validacao_sem_many(self):
+        campo = CatalogoRelatedField(queryset=Habilidade.objects.all())
+
+        # Asserts
+        self.assertEqual(campo.run_validation(self.ids[3]).id, self.ids[3])
+
+    def test_validacao_tipo_incorreto(self):
+        campo = CatalogoRelatedField(many=True, queryset=Habilidade.objects.all())
+
+        with self.assertRaises(serializers.ValidationError):
+            campo.run_validation(['abc'])
+
+    def test_registro_invalidado_ao_criar_tag(self):
+        campo = CatalogoRelatedField(many=True, queryset=Habilidade.objects.all())
+        campo.run_validation(self.ids)
+
+        nova = Habilidade.objects.create(nome='Nova Habilidade', grupo='Hard Skills')
+        validados = campo.run_validation([nova.id])
+
+        # Asserts
+        self.assertEqual(validados[0].nome, 'Nova Habilidade')
+
+
+class CalcularClassesTestCase(TestCase):
+    def test_calcular_classes(self):
+        grafo = {1: {2}, 2: {1, 3}, 3: {2}, 4: set()}
+
+        classes = calcular_classes(grafo, [1, 4])
+
+        # Asserts
+        self.assertEqual(classes[1], [1, 2, 3])
+        self.assertEqual(classes[3], [1, 2, 3])
+        self.assertEqual(classes[4], [4])
+
+
+class EquivalenciaTestCase(TestCase):
+    def setUp(self):
+        # 1411167 (2017) e 1411311 (2023) são equivalentes, e 1411311 e 1411180 também
+        Disciplina.objects.create(codigo=1411167, nome='Programação I', disciplinas_equivalentes=[1411311])
+        Disciplina.objects.create(codigo=1411311, nome='Programação 1', disciplinas_equivalentes=[1411180])
+        Disciplina.objects.create(codigo=1411180, nome='Programação', disciplinas_equivalentes=[])
+        Disciplina.objects.create(codigo=1109049, nome='Álgebra Linear I', disciplinas_equivalentes=[])
+
+    def test_atualizar_classes_fecho_transitivo(self):
+        atualizar_classes_equivalencia()
+
+        # Asserts
+        self.assertEqual(Disciplina.objects.get(pk=1411167).classe_equivalencia, [1411167, 1411180, 1411311])
+        self.assertEqual(Disciplina.objects.get(pk=1411180).classe_equivalencia, [1411167, 1411180, 1411311])
+        self.assertEqual(Disciplina.objects.get(pk=1109049).classe_equivalencia, [1109049])
+
+    def test_disciplinas_equivalentes_a_uma_consulta(self):
+        atualizar_classes_equivalencia()
+
+        with self.assertNumQueries(1):
+            codigos = sorted(disciplinas_equivalentes_a(1411180).values_list('codigo', flat=True))
+
+        # Asserts
+        self.assertEqual(codigos, [1411167, 1411180, 1411311])
+
+    def test_atualizacao_incremental(self):
+        atualizar_classes_equivalencia()
+        Disciplina.objects.filter(pk=1411311).update(disciplinas_equivalentes=[])
+
+        atualizadas = atualizar_classes_equivalencia([1411311])
+
+        # Asserts
+        self.assertEqual(atualizadas, 3)
+        self.assertEqual(Disciplina.objects.get(pk=1411167).classe_equivalencia, [1411167, 1411311])
+        self.assertEqual(Disciplina.objects.get(pk=1411180).classe_equivalencia, [1411180])
+        self.assertEqual(atualizar_classes_equivalencia([1411311]), 0)
+
+    def test_atualizacao_incremental_une_classes(self):
+        atualizar_classes_equivalencia()
+        Disciplina.objects.filter(pk=1109049).update(disciplinas_equivalentes=[1411180])
+
+        atualizadas = atualizar_classes_equivalencia([1109049])
+
+        # Asserts
+        self.assertEqual(atualizadas, 4)
+        self.assertEqual(Disciplina.objects.get(pk=1411167).classe_equivalencia, [1109049, 1411167, 1411180, 1411311])
+
+    def test_atualizacao_incremental_so_bloqueia_a_componente(self):
+        atualizar_classes_equivalencia()
+
+        linhas = _bloquear_componentes({1411180})
+
+        # Asserts
+        self.assertEqual(sorted(linhas), [1411167, 1411180, 1411311])
+
+
+class SalvarDisciplinasTestCase(TestCase):
+    def setUp(self):
+        self.curriculo = [
+            {'codigo_da_disciplina': 1411167, 'nome_da_disciplina': 'Programação I', 'disciplinas_equivalentes': [{'codigo_da_disciplina': 1411311}]},
+            {'codigo_da_disciplina': 1411311, 'nome_da_disciplina': 'Programação 1', 'disciplinas_equivalentes': []},
+            {'codigo_da_disciplina': 1109049, 'nome_da_disciplina': 'Álgebra Linear I', 'disciplinas_equivalentes': []}
+        ]
+
+    def test_importacao_inicial(self):
+        contagem = salvar_disciplinas(self.curriculo)
+
+        # Asserts
+        self.assertEqual(contagem, {'inseridas': 3, 'atualizadas': 0, 'inalteradas': 0})
+        self.assertEqual(Disciplina.objects.get(pk=1411167).disciplinas_equivalentes, [1411311])
+        self.assertEqual(Disciplina.objects.get(pk=1411311).classe_equivalencia, [1411167, 1411311])
+
+    def test_reimportacao_sem_alteracoes(self):
+        salvar_disciplinas(self.curriculo)
+
+        contagem = salvar_disciplinas(self.curriculo)
+
+        # Asserts
+        self.assertEqual(contagem, {'inseridas': 0, 'atualizadas': 0, 'inalteradas': 3})
+
+    def test_reimportacao_atualiza_nome_e_equivalencias(self):
+        salvar_disciplinas(self.curriculo)
+        self.curriculo[0]['nome_da_disciplina'] = 'Programação I (nova ementa)'
+        self.curriculo[0]['disciplinas_equivalentes'] = []
+
+        contagem = salvar_disciplinas(self.curriculo)
+
+        # Asserts
+        self.assertEqual(contagem, {'inseridas': 0, 'atualizadas': 1, 'inalteradas': 2})
+        disciplina = Disciplina.objects.get(pk=1411167)
+        self.assertEqual(disciplina.nome, 'Programação I (nova ementa)')
+        self.assertEqual(disciplina.classe_equivalencia, [1411167])
+        self.assertEqual(Disciplina.objects.get(pk=1411311).classe_equivalencia, [1411311])
+
+    def test_codigo_repetido_prevalece_o_ultimo(self):
+        self.curriculo.append({'codigo_da_disciplina': 1109049, 'nome_da_disciplina': 'Álgebra Linear', 'disciplinas_equivalentes': []})
+
+        contagem = salvar_disciplinas(self.curriculo)
+
+        # Asserts
+        self.assertEqual(contagem['inseridas'], 3)
+        self.assertEqual(Disciplina.objects.get(pk=1109049).nome, 'Álgebra Linear')
+
+
+@override_settings(DISCIPLINAS_SINCRONIZACAO_TTL=3600, DISCIPLINAS_SINCRONIZACAO_INTERVALO_MINIMO=600)
+class SincronizacaoDisciplinasTestCase(TestCase):
+    def setUp(self):
+        self.contagem = {'inseridas': 2, 'atualizadas': 1, 'inalteradas': 5}
+
+    @mock.patch('api_rest.sincronizacao.atualizar_disciplinas')
+    def test_primeira_sincronizacao(self, atualizar):
+        atualizar.return_value = self.contagem
+
+        sincronizacao = sincronizar_disciplinas()
+
+        # Asserts
+        atualizar.assert_called_once()
+        self.assertIsNotNone(sincronizacao.ultimo_sucesso)
+        self.assertEqual(sincronizacao.inseridas, 2)
+        self.assertEqual(sincronizacao.atualizadas, 1)
+        self.assertEqual(sincronizacao.inalteradas, 5)
+
+    @mock.patch('api_rest.sincronizacao.atualizar_disciplinas')
+    def test_sincronizacao_recente_nao_consulta_eureca(self, atualizar):
+        SincronizacaoDisciplinas.objects.create(origem=ORIGEM_EURECA, ultimo_sucesso=timezone.now())
+
+        sincronizacao = sincronizar_disciplinas()
+
+        # Asserts
+        self.assertIsNone(sincronizacao)
+        atualizar.assert_not_called()
+
+    @mock.patch('api_rest.sincronizacao.atualizar_disciplinas')
+    def test_sincronizacao_expirada(self, atualizar):
+        atualizar.return_value = self.contagem
+        SincronizacaoDisciplinas.objects.create(origem=ORIGEM_EURECA, ultimo_sucesso=timezone.now() - timedelta(hours=2))
+
+        sincronizacao = sincronizar_disciplinas()
+
+        # Asserts
+        atualizar.assert_called_once()
+        self.assertGreater(sincronizacao.ultimo_sucesso, timezone.now() - timedelta(minutes=1))
+
+    @mock.patch('api_rest.sincronizacao.atualizar_disciplinas')
+    def test_forcar_ignora_ttl(self, atualizar):
+        atualizar.return_value = self.contagem
+        SincronizacaoDisciplinas.objects.create(origem=ORIGEM_EURECA, ultimo_sucesso=timezone.now(), ultima_tentativa=timezone.now())
+
+        sincronizar_disciplinas(forcar=True)
+
+        # Asserts
+        atualizar.assert_called_once()
+
+    @mock.patch('api_rest.sincronizacao.atualizar_disciplinas')
+    def test_disciplina_desconhecida_respeita_intervalo_minimo(self, atualizar):
+        atualizar.return_value = self.contagem
+        SincronizacaoDisciplinas.objects.create(origem=ORIGEM_EURECA, ultimo_sucesso=timezone.now())
+
+        primeira = sincronizar_por_disciplina_desconhecida()
+        segunda = sincronizar_por_disciplina_desconhecida()
+
+        # Asserts
+        self.assertIsNotNone(primeira)
+        self.assertIsNone(segunda)
+        atualizar.assert_called_once()
+
+    @mock.patch('api_rest.sincronizacao.atualizar_disciplinas')
+    def test_falha_registra_erro_sem_atualizar_sucesso(self, atualizar):
+        atualizar.side_effect = CurriculoIndisponivel('https://eureca.sti.ufcg.edu.br')
+
+        sincronizacao = sincronizar_disciplinas()
+
+        # Asserts
+        self.assertIsNone(sincronizacao.ultimo_sucesso)
+        self.assertIn('Currículo indisponível', sincronizacao.erro)
+
+    @mock.patch('api_rest.sincronizacao.atualizar_disciplinas')
+    def test_sincronizacao_parcial_nao_adia_a_completa(self, atualizar):
+        atualizar.return_value = self.contagem
+
+        parcial = sincronizar_disciplinas(forcar=True, curriculos=[('14102200', '2019')])
+
+        # Asserts
+        self.assertIsNone(parcial.ultimo_sucesso)
+        self.assertTrue(sincronizacao_expirada())
+
+    @mock.patch('api_rest.sincronizacao.atualizar_disciplinas')
+    def test_sincronizacao_parcial_apos_falha_limpa_o_erro(self, atualizar):
+        atualizar.side_effect = [CurriculoIndisponivel('https://eureca.sti.ufcg.edu.br'), self.contagem]
+        sincronizar_disciplinas()
+
+        call_command('iniciar', '--curriculo', '14102200:2019', stdout=StringIO())
+
+        # Asserts
+        sincronizacao = SincronizacaoDisciplinas.objects.get(origem=ORIGEM_EURECA)
+        self.assertEqual(sincronizacao.erro, '')
+        self.assertIsNone(sincronizacao.ultimo_sucesso)
+
+    @mock.patch('api_rest.sincronizacao.atualizar_disciplinas')
+    def test_sincronizacao_completa_inclui_curriculos_importados(self, atualizar):
+        atualizar.return_value = self.contagem
+        sincronizar_disciplinas(forcar=True, curriculos=[('14102100', '2023'), ('14102200', '2019')])
+        atualizar.reset_mock()
+
+        with override_settings(EURECA_CURRICULOS=[('14102100', '2017'), ('14102100', '2023')]):
+            sincronizacao = sincronizar_disciplinas(forcar=True)
+
+        # Asserts
+        atualizar.assert_called_once_with([('14102100', '2017'), ('14102100', '2023'), ('14102200', '2019')])
+        self.assertEqual(sincronizacao.curriculos, [['14102200', '2019']])
+        self.assertIsNotNone(sincronizacao.ultimo_sucesso)
+
+
+class EurecaStubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        servidor = self.server
+        servidor.requisicoes.append((self.path, self.headers.get('If-None-Match')))
+
+        if self.path.startswith('/instavel') and servidor.falhas_restantes > 0:
+            servidor.falhas_restantes -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        if self.path.startswith('/lento'):
+            time.sleep(0.5)
+
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        corpo = json.dumps({'caminho': self.path}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.send_header('ETag', '"v1"')
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+class ClienteEurecaTestCase(TestCase):
+    def setUp(self):
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', 0), EurecaStubHandler)
+        self.servidor.requisicoes = []
+        self.servidor.falhas_restantes = 0
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+        self.diretorio_cache = tempfile.mkdtemp()
+        self.url_base = f'http://127.0.0.1:{self.servidor.server_address[1]}'
+        self.cliente = ClienteEureca(self.url_base, (1, 0.2), 2, self.diretorio_cache, backoff=0)
+
+    def tearDown(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        shutil.rmtree(self.diretorio_cache)
+
+    def test_requisicao_condicional_reaproveita_cache(self):
+        primeira = self.cliente.obter_json(f'{self.url_base}/curriculo')
+        segunda = self.cliente.obter_json(f'{self.url_base}/curriculo')
+
+        # Asserts
+        self.assertEqual(primeira, {'caminho': '/curriculo'})
+        self.assertEqual(segunda, primeira)
+        self.assertEqual(self.servidor.requisicoes, [('/curriculo', None), ('/curriculo', '"v1"')])
+
+    def test_novas_tentativas_em_erro_do_servidor(self):
+        self.servidor.falhas_restantes = 2
+
+        corpo = self.cliente.obter_json(f'{self.url_base}/instavel')
+
+        # Asserts
+        self.assertEqual(corpo, {'caminho': '/instavel'})
+        self.assertEqual(len(self.servidor.requisicoes), 3)
+
+    def test_timeout_de_leitura(self):
+        cliente = ClienteEureca(self.url_base, (1, 0.1), 0, self.diretorio_cache)
+
+        # Asserts
+        self.assertIsNone(cliente.obter_json(f'{self.url_base}/lento'))
+
+    def test_servidor_indisponivel_usa_cache(self):
+        url = f'{self.url_base}/curriculo'
+        self.cliente.obter_json(url)
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        cliente = ClienteEureca(self.url_base, (0.2, 0.2), 0, self.diretorio_cache)
+
+        # Asserts
+        self.assertEqual(cliente.obter_json(url), {'caminho': '/curriculo'})
+
+    def test_obter_curriculos_em_ordem(self):
+        respostas = self.cliente.obter_curriculos([('14102100', '2017'), ('14102100', '2023')])
+
+        # Asserts
+        self.assertEqual(respostas, [
+            {'caminho': '/curriculos/curriculo?curso=14102100&curriculo=2017'},
+            {'caminho': '/curriculos/curriculo?curso=14102100&curriculo=2023'}
+        ])
+
+
+class IniciarCommandTestCase(TestCase):
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        curriculos = {
+            '2017.json': [{'codigo_da_disciplina': 1411167, 'nome_da_disciplina': 'Programação I', 'disciplinas_equivalentes': []}],
+            '2023.json': [
+                {'codigo_da_disciplina': 1411311, 'nome_da_disciplina': 'Programação 1', 'disciplinas_equivalentes': [{'codigo_da_disciplina': 1411167}]},
+                {'codigo_da_disciplina': 1109049, 'nome_da_disciplina': 'Álgebra Linear I', 'disciplinas_equivalentes': []}
+            ]
+        }
+        for nome, disciplinas in curriculos.items():
+            Path(self.diretorio, nome).write_text(json.dumps({'disciplinas_do_curriculo': disciplinas}), encoding='utf-8')
+
+    def tearDown(self):
+        shutil.rmtree(self.diretorio)
+
+    def test_iniciar_com_arquivos_locais(self):
+        call_command('iniciar', arquivos=[self.diretorio], stdout=StringIO())
+        saida = StringIO()
+        call_command('iniciar', arquivos=[self.diretorio], stdout=saida)
+
+        # Asserts
+        self.assertEqual(Disciplina.objects.count(), 3)
+        self.assertEqual(Disciplina.objects.get(pk=1411167).classe_equivalencia, [1411167, 1411311])
+        self.assertGreater(Habilidade.objects.count(), 0)
+        self.assertIn('0 inseridas, 0 atualizadas, 3 inalteradas', saida.getvalue())
+
+    @mock.patch('api_rest.management.commands.iniciar.sincronizar_disciplinas')
+    def test_iniciar_com_curriculos_informados(self, sincronizar):
+        sincronizar.return_value = SincronizacaoDisciplinas(origem=ORIGEM_EURECA, inseridas=10)
+
+        call_command('iniciar', '--curriculo', '14102100:2023', '--curriculo', '14102200:2019', stdout=StringIO())
+        quantidade_habilidades = Habilidade.objects.count()
+        call_command('iniciar', '--curriculo', '14102100:2023', stdout=StringIO())
+
+        # Asserts
+        sincronizar.assert_any_call(forcar=True, curriculos=[('14102100', '2023'), ('14102200', '2019')])
+        self.assertGreater(quantidade_habilidades, 0)
+        self.assertEqual(Habilidade.objects.count(), quantidade_habilidades)
+
+    @mock.patch('api_rest.management.commands.iniciar.sincronizar_disciplinas')
+    def test_iniciar_eureca_indisponivel(self, sincronizar):
+        sincronizar.return_value = SincronizacaoDisciplinas(origem=ORIGEM_EURECA, erro='Currículo indisponível')
+
+        # Asserts
+        with self.assertRaises(CommandError):
+            call_command('iniciar', stdout=StringIO())
+
+    def test_iniciar_curriculo_e_arquivos_juntos(self):
+        # Asserts
+        with self.assertRaises(CommandError):
+            call_command('iniciar', '--curriculo', '14102100:2023', '--arquivos', self.diretorio, stdout=StringIO())
@@ -1,38 +1,105 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
 from .models import Disciplina
+from .catalogo import invalidar_catalogo
+from .equivalencias import atualizar_classes_equivalencia
+from .eureca import obter_cliente
+
+
+def ler_dados_requisicao(request):
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError:
+            return {}
+    return request.POST
+
+
+class CurriculoIndisponivel(Exception):
+    pass
 
-import requests
 
+def atualizar_disciplinas(curriculos=None):
+    """
+    Obtém do Eureca os currículos (pares de curso e currículo, por padrão EURECA_CURRICULOS)
+    e salva as suas disciplinas. Em códigos repetidos prevalece o último currículo.
+    """
+    curriculos = curriculos or settings.EURECA_CURRICULOS
+    respostas = obter_cliente().obter_curriculos(curriculos)
 
-def atualizar_disciplinas():
-    url = "https://eureca.sti.ufcg.edu.br/das/v2/curriculos/curriculo?curso=14102100&curriculo=2023"
-    response = realizer_requisicao(url)
-    if response:
-        salvar_disciplinas(response["disciplinas_do_curriculo"])
+    disciplinas = []
+    for (curso, curriculo), response in zip(curriculos, respostas):
+        if not response:
+            # Nada é gravado se algum currículo não puder ser obtido
+            raise CurriculoIndisponivel(f'curso {curso}, currículo {curriculo}')
+        disciplinas.extend(response["disciplinas_do_curriculo"])
 
-    url = "https://eureca.sti.ufcg.edu.br/das/v2/curriculos/curriculo?curso=14102100&curriculo=2017"
-    response = realizer_requisicao(url)
-    if response:
-        salvar_disciplinas(response["disciplinas_do_curriculo"])
+    return salvar_disciplinas(disciplinas)
 
 
-def realizer_requisicao(url):
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            return response.json()
-        return None
-    except requests.exceptions.RequestException as e:
-        return None
+def importar_disciplinas_de_arquivos(caminhos):
+    """
+    Salva as disciplinas de respostas da API do Eureca gravadas em JSON, sem acesso à rede.
+    Diretórios são expandidos para os seus arquivos .json em ordem alfabética.
+    """
+    arquivos = []
+    for caminho in map(Path, caminhos):
+        arquivos.extend(sorted(caminho.glob('*.json')) if caminho.is_dir() else [caminho])
+
+    disciplinas = []
+    for arquivo in arquivos:
+        with open(arquivo, encoding='utf-8') as conteudo:
+            disciplinas.extend(json.load(conteudo)["disciplinas_do_curriculo"])
+
+    return salvar_disciplinas(disciplinas)
 
 
 def salvar_disciplinas(disciplinas):
+    """
+    Insere ou atualiza em lote as disciplinas de um currículo do Eureca.
+    Retorna a contagem de disciplinas inseridas, atualizadas e inalteradas.
+    """
+    recebidas = {}
     for disciplina in disciplinas:
-        codigo_da_disciplina = disciplina['codigo_da_disciplina']
-        existe_disciplina = Disciplina.objects.filter(pk=codigo_da_disciplina).exists()
-        if not existe_disciplina:
-            disciplinas_equivalentes = [eq['codigo_da_disciplina'] for eq in disciplina['disciplinas_equivalentes']]
-            disciplina = Disciplina.objects.create(
-                codigo=codigo_da_disciplina,
-                nome=disciplina['nome_da_disciplina'],
-                disciplinas_equivalentes=disciplinas_equivalentes
+        codigo = int(disciplina['codigo_da_disciplina'])
+        recebidas[codigo] = Disciplina(
+            codigo=codigo,
+            nome=disciplina['nome_da_disciplina'],
+            disciplinas_equivalentes=[int(eq['codigo_da_disciplina']) for eq in disciplina['disciplinas_equivalentes']]
+        )
+
+    with transaction.atomic():
+        existentes = {
+            codigo: (nome, equivalentes)
+            for codigo, nome, equivalentes in Disciplina.objects.filter(pk__in=recebidas)
+            .values_list('codigo', 'nome', 'disciplinas_equivalentes')
+        }
+
+        inseridas = [codigo for codigo in recebidas if codigo not in existentes]
+        atualizadas = [
+            codigo for codigo, disciplina in recebidas.items()
+            if codigo in existentes and existentes[codigo] != (disciplina.nome, disciplina.disciplinas_equivalentes)
+        ]
+
+        alteradas = inseridas + atualizadas
+        if alteradas:
+            Disciplina.objects.bulk_create(
+                [recebidas[codigo] for codigo in alteradas],
+                update_conflicts=True,
+                unique_fields=['codigo'],
+                update_fields=['nome', 'disciplinas_equivalentes'],
+                batch_size=500
             )
+            atualizar_classes_equivalencia(alteradas)
+            # Operações em lote não disparam os sinais que invalidam o catálogo
+            transaction.on_commit(lambda: invalidar_catalogo(Disciplina))
+
+    return {
+        'inseridas': len(inseridas),
+        'atualizadas': len(atualizadas),
+        'inalteradas': len(recebidas) - len(alteradas)
+    }
@@ -0,0 +1,23 @@
+from django.db.models import F
+
+from .models import VersaoCatalogo
+
+
+def versoes_do_catalogo():
+    """Versão gravada de cada tabela do catálogo, pelo label do modelo (0 se nunca alterada)."""
+    return dict(VersaoCatalogo.objects.values_list('tabela', 'versao'))
+
+
+def versao_da_tabela(versoes, modelo):
+    return versoes.get(modelo._meta.label_lower, 0)
+
+
+def incrementar_versoes(modelos):
+    """
+    Incrementa a versão das tabelas. Chamada de dentro da transação que altera a tabela,
+    a nova versão fica visível aos outros processos junto com a alteração.
+    """
+    for modelo in modelos:
+        versao, criada = VersaoCatalogo.objects.get_or_create(tabela=modelo._meta.label_lower, defaults={'versao': 1})
+        if not criada:
+            VersaoCatalogo.objects.filter(pk=versao.pk).update(versao=F('versao') + 1)
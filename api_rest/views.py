@@ -1,5 +1,8 @@
 from django.contrib.auth.models import User
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -13,6 +16,32 @@ from api_aluno.serializers import AlunoInformacoesSerializer
 from rest_framework import status
 
 from .serializers import *
+from .catalogo import obter_catalogo, etag_corresponde
+from .senhas import executar_hashing, FilaDeHashingCheia, resposta_fila_cheia
+from .utils import ler_dados_requisicao
+from .authentication import RefreshTokenComPapel
+
+
+def _selecionar_usuario(usuarios, email):
+    if len(usuarios) > 1:
+        usuarios = [usuario for usuario in usuarios if usuario.email == email]
+    return usuarios[0] if usuarios else None
+
+
+def _dados_login(usuario):
+    if hasattr(usuario, 'professor'):
+        response = ProfessorSerializer(usuario.professor).data
+        response['isTeacher'] = True
+    elif hasattr(usuario, 'aluno'):
+        response = AlunoInformacoesSerializer(usuario.aluno).data
+        response['isTeacher'] = False
+    else:
+        return None
+
+    refresh = RefreshTokenComPapel.for_user(usuario)
+    response['refresh'] = str(refresh)
+    response['access'] = str(refresh.access_token)
+    return response
 
 
 @api_view(['POST'])
@@ -22,35 +51,50 @@ def login(request):
 
     if not email or not senha:
         return Response({"detail": "Email e senha são obrigatórios."}, status=status.HTTP_400_BAD_REQUEST)
-    try:
-        usuario = User.objects.get(email=email)
-    except User.DoesNotExist:
+    usuarios = list(User.objects.select_related('professor', 'aluno').filter(email__iexact=email)[:2])
+    usuario = _selecionar_usuario(usuarios, email)
+    if usuario is None:
         return Response({"detail": "Usuário não encontrado."}, status=status.HTTP_404_NOT_FOUND)
 
     if not usuario.check_password(senha):
         return Response({"detail": "Senha incorreta."}, status=status.HTTP_401_UNAUTHORIZED)
 
-    response = {}
-    isTeacher = True
-    try:
-        professor = Professor.objects.get(user=usuario)
-        response = ProfessorSerializer(professor).data
-    except Professor.DoesNotExist:
-        try:
-            aluno = Aluno.objects.get(user=usuario)
-            isTeacher = False
-            response = AlunoInformacoesSerializer(aluno).data
-        except Aluno.DoesNotExist:
-            return Response({"detail": "Usuário não cadastrado"}, status=status.HTTP_400_BAD_REQUEST)
-
-    refresh = RefreshToken.for_user(usuario)
-    response['isTeacher'] = isTeacher
-    response['refresh'] = str(refresh)
-    response['access'] = str(refresh.access_token)
+    response = _dados_login(usuario)
+    if response is None:
+        return Response({"detail": "Usuário não cadastrado"}, status=status.HTTP_400_BAD_REQUEST)
 
     return Response(response)
 
 
+@csrf_exempt
+@require_POST
+async def login_async(request):
+    dados = ler_dados_requisicao(request)
+    email = dados.get('email')
+    senha = dados.get('senha')
+
+    if not email or not senha:
+        return JsonResponse({"detail": "Email e senha são obrigatórios."}, status=status.HTTP_400_BAD_REQUEST)
+    usuarios = [usuario async for usuario in User.objects.select_related('professor', 'aluno').filter(email__iexact=email)[:2]]
+    usuario = _selecionar_usuario(usuarios, email)
+    if usuario is None:
+        return JsonResponse({"detail": "Usuário não encontrado."}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        senha_correta = await executar_hashing(usuario.check_password, senha)
+    except FilaDeHashingCheia:
+        return resposta_fila_cheia()
+
+    if not senha_correta:
+        return JsonResponse({"detail": "Senha incorreta."}, status=status.HTTP_401_UNAUTHORIZED)
+
+    response = _dados_login(usuario)
+    if response is None:
+        return JsonResponse({"detail": "Usuário não cadastrado"}, status=status.HTTP_400_BAD_REQUEST)
+
+    return JsonResponse(response)
+
+
 @api_view(['GET'])
 def get_all_habilidades(request):
     if request.method == 'GET':
@@ -99,3 +143,20 @@ def get_all_disciplinas(request):
         return Response(serializer.data)
 
     return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+@api_view(['GET'])
+def get_catalogo(request):
+    if request.method == 'GET':
+        catalogo = obter_catalogo()
+
+        if etag_corresponde(request.headers.get('If-None-Match'), catalogo['etag']):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(catalogo['corpo'], content_type='application/json')
+
+        response['ETag'] = catalogo['etag']
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índice case-insensitive em auth_user.email, usado pelo login
+    (User.objects.filter(email__iexact=...) gera UPPER("auth_user"."email")).
+    """
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS auth_user_email_upper_idx ON auth_user (UPPER(email));',
+            reverse_sql='DROP INDEX IF EXISTS auth_user_email_upper_idx;',
+        ),
+    ]
@@ -56,7 +56,7 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api_rest.authentication.JWTPapelAuthentication',
     ),
 }
 
@@ -69,8 +69,53 @@ SIMPLE_JWT = {
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': settings.SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_REFRESH_SERIALIZER': 'api_rest.authentication.TokenRefreshComPapelSerializer',
 }
 
+# Hashing de senhas das views assíncronas de login e cadastro
+HASHING_MAX_WORKERS = os.cpu_count() or 1
+HASHING_MAX_FILA = int(os.getenv('HASHING_MAX_FILA', '32'))
+
+# API do Eureca. Os currículos são salvos em ordem, o mais recente por último prevalece
+EURECA_URL_BASE = os.getenv('EURECA_URL_BASE', 'https://eureca.sti.ufcg.edu.br/das/v2')
+EURECA_CURRICULOS = [('14102100', '2017'), ('14102100', '2023')]
+EURECA_TIMEOUT_CONEXAO = float(os.getenv('EURECA_TIMEOUT_CONEXAO', '3.05'))
+EURECA_TIMEOUT_LEITURA = float(os.getenv('EURECA_TIMEOUT_LEITURA', '15'))
+EURECA_TENTATIVAS = int(os.getenv('EURECA_TENTATIVAS', '3'))
+EURECA_DIRETORIO_CACHE = os.getenv('EURECA_DIRETORIO_CACHE', str(BASE_DIR / 'cache' / 'eureca'))
+
+# Processos usados para extrair o texto das páginas de um histórico (1 extrai na própria thread)
+HISTORICO_PROCESSOS_EXTRACAO = int(os.getenv('HISTORICO_PROCESSOS_EXTRACAO', '1'))
+
+# Biblioteca usada para extrair o texto do histórico: 'pdfium' (rápido, com recurso ao
+# pdfplumber quando nenhuma disciplina é encontrada) ou 'pdfplumber'
+HISTORICO_BACKEND_EXTRACAO = os.getenv('HISTORICO_BACKEND_EXTRACAO', 'pdfium')
+
+# Por quanto tempo (em segundos) um snapshot do catálogo fica em cache; alterações nas tabelas
+# são percebidas antes disso por todos os processos, pela versão gravada no banco (VersaoCatalogo)
+CATALOGO_CACHE_TTL = int(os.getenv('CATALOGO_CACHE_TTL', '3600'))
+
+# Por quanto tempo (em segundos) a interpretação de um PDF fica guardada no banco para reenvios idênticos
+HISTORICO_CACHE_REGISTROS_TTL = int(os.getenv('HISTORICO_CACHE_REGISTROS_TTL', str(7 * 24 * 60 * 60)))
+
+# Como o PDF do histórico é entregue: 'django' (FileResponse, com sendfile quando o servidor WSGI
+# oferece wsgi.file_wrapper), 'x-accel-redirect' (nginx) ou 'x-sendfile' (Apache, lighttpd)
+HISTORICO_ENTREGA = os.getenv('HISTORICO_ENTREGA', 'django')
+# Location interna do nginx que aponta para MEDIA_ROOT, usada no modo 'x-accel-redirect'
+HISTORICO_ENTREGA_PREFIXO_INTERNO = os.getenv('HISTORICO_ENTREGA_PREFIXO_INTERNO', '/protegido/')
+
+# Tamanho máximo (em bytes) do PDF do histórico; envios maiores são interrompidos durante o upload
+HISTORICO_TAMANHO_MAXIMO = int(os.getenv('HISTORICO_TAMANHO_MAXIMO', str(10 * 1024 * 1024)))
+
+# Processamentos de histórico presos em andamento por mais que isso (em segundos) voltam para a fila
+PROCESSAMENTO_HISTORICO_TIMEOUT = int(os.getenv('PROCESSAMENTO_HISTORICO_TIMEOUT', '600'))
+# Tentativas de um processamento antes de ele ser marcado como falho, se continuar preso em andamento
+PROCESSAMENTO_HISTORICO_MAX_TENTATIVAS = int(os.getenv('PROCESSAMENTO_HISTORICO_MAX_TENTATIVAS', '3'))
+
+# Sincronização das disciplinas com o Eureca (em segundos)
+DISCIPLINAS_SINCRONIZACAO_TTL = int(os.getenv('DISCIPLINAS_SINCRONIZACAO_TTL', str(24 * 60 * 60)))
+DISCIPLINAS_SINCRONIZACAO_INTERVALO_MINIMO = int(os.getenv('DISCIPLINAS_SINCRONIZACAO_INTERVALO_MINIMO', str(10 * 60)))
+
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,6 +123,7 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api_rest.middleware.PapelMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]